@@ -0,0 +1,61 @@
+r"""
+Per-image overhead of :func:`menpodetect.detect.detect` for each ``attach``
+mode, using a fake detector that returns many boxes so that only the
+framework overhead (rescaling and landmark attachment) is measured.
+
+Requires menpodetect to be importable (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_attach.py --n-repeats 20
+"""
+import argparse
+import time
+
+import numpy as np
+from menpo.image import Image
+
+from menpodetect.detect import detect
+from menpodetect.detections import Detections
+
+
+def make_fake_detector(n_boxes):
+    rng = np.random.RandomState(0)
+    min_corner = rng.uniform(0, 400, size=(n_boxes, 2))
+    boxes = np.hstack([min_corner, min_corner + rng.uniform(10, 50, (n_boxes, 2))])
+
+    def fake_detector(uint8_image):
+        return Detections(boxes)
+
+    return fake_detector
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-repeats", type=int, default=20)
+    parser.add_argument("--n-boxes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    args = parser.parse_args()
+
+    pixels = np.zeros((1, 480, 640), dtype=np.uint8)
+    modes = ["per_box", "combined", None]
+    print(
+        "{:>7} ".format("n_boxes")
+        + " ".join("{:>12}".format(str(m)) for m in modes)
+        + "   (milliseconds per image)"
+    )
+    for n_boxes in args.n_boxes:
+        fake_detector = make_fake_detector(n_boxes)
+        timings = []
+        for attach in modes:
+            elapsed = 0.0
+            for _ in range(args.n_repeats):
+                image = Image(pixels, copy=False)
+                start = time.perf_counter()
+                detect(fake_detector, image, greyscale=False, attach=attach)
+                elapsed += time.perf_counter() - start
+            timings.append(1000 * elapsed / args.n_repeats)
+        print(
+            "{:>7} ".format(n_boxes) + " ".join("{:>12.3f}".format(t) for t in timings)
+        )
+
+
+if __name__ == "__main__":
+    main()
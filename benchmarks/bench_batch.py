@@ -0,0 +1,76 @@
+r"""
+Throughput of :func:`menpodetect.batch.detect_batch` against the number of
+worker threads.
+
+Requires menpodetect to be importable (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_batch.py --backend opencv --n-images 64
+"""
+import argparse
+import multiprocessing
+import time
+
+import menpo.io as mio
+
+
+def load_detector(backend):
+    if backend == "opencv":
+        from menpodetect.opencv import load_opencv_frontal_face_detector
+
+        return load_opencv_frontal_face_detector()
+    else:
+        from menpodetect.dlib import load_dlib_frontal_face_detector
+
+        return load_dlib_frontal_face_detector()
+
+
+def worker_counts(max_workers):
+    counts = [1]
+    while counts[-1] * 2 <= max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", choices=["opencv", "dlib"], default="opencv")
+    parser.add_argument("--n-images", type=int, default=64)
+    parser.add_argument("--scale", type=float, default=2.0)
+    parser.add_argument("--max-workers", type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args()
+
+    detector = load_detector(args.backend)
+    image = mio.import_builtin_asset.takeo_ppm().rescale(args.scale)
+    # Warm up (the copies of the model are created lazily)
+    detector.detect_batch([image.copy()], n_workers=1)
+
+    print(
+        "backend={} image_shape={} n_images={} cores={}".format(
+            args.backend, image.shape, args.n_images, multiprocessing.cpu_count()
+        )
+    )
+    print(
+        "{:>9} {:>10} {:>12} {:>8}".format(
+            "n_workers", "seconds", "images/sec", "speedup"
+        )
+    )
+    baseline = None
+    for n_workers in worker_counts(args.max_workers):
+        images = [image.copy() for _ in range(args.n_images)]
+        start = time.perf_counter()
+        detector.detect_batch(images, n_workers=n_workers)
+        elapsed = time.perf_counter() - start
+        throughput = args.n_images / elapsed
+        if baseline is None:
+            baseline = throughput
+        print(
+            "{:>9} {:>10.3f} {:>12.2f} {:>7.2f}x".format(
+                n_workers, elapsed, throughput, throughput / baseline
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+r"""
+Throughput of detecting high resolution photos at their full resolution
+against automatically downscaling them with ``expected_min_object_size``.
+
+The photos are synthesised by upscaling the takeo asset, so the face is
+roughly ``100 * scale`` pixels across.
+
+Requires menpodetect to be importable (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_object_size.py --backend dlib --scale 8
+"""
+import argparse
+import time
+
+import menpo.io as mio
+
+
+def load_detector(backend):
+    if backend == "opencv":
+        from menpodetect.opencv import load_opencv_frontal_face_detector
+
+        return load_opencv_frontal_face_detector()
+    else:
+        from menpodetect.dlib import load_dlib_frontal_face_detector
+
+        return load_dlib_frontal_face_detector()
+
+
+def images_per_second(detector, image, n_repeats, **kwargs):
+    start = time.perf_counter()
+    for _ in range(n_repeats):
+        detections = detector(image, attach=None, **kwargs)
+    return n_repeats / (time.perf_counter() - start), len(detections)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", choices=["opencv", "dlib"], default="opencv")
+    parser.add_argument("--scale", type=float, default=8.0)
+    parser.add_argument("--n-repeats", type=int, default=3)
+    parser.add_argument(
+        "--expected-min-object-size",
+        type=int,
+        default=None,
+        help="Defaults to half of the synthesised face size",
+    )
+    args = parser.parse_args()
+
+    detector = load_detector(args.backend)
+    image = mio.import_builtin_asset.takeo_ppm().rescale(args.scale)
+    object_size = args.expected_min_object_size
+    if object_size is None:
+        object_size = int(50 * args.scale)
+
+    print(
+        "backend={} image_shape={} expected_min_object_size={}".format(
+            args.backend, image.shape, object_size
+        )
+    )
+    print("{:>10} {:>12} {:>12}".format("mode", "images/sec", "detections"))
+    full, n_full = images_per_second(detector, image, args.n_repeats)
+    print("{:>10} {:>12.3f} {:>12}".format("full", full, n_full))
+    auto, n_auto = images_per_second(
+        detector, image, args.n_repeats, expected_min_object_size=object_size
+    )
+    print("{:>10} {:>12.3f} {:>12}".format("auto", auto, n_auto))
+    print("speedup={:.2f}x".format(auto / full))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+r"""
+Latency and throughput of many small concurrent requests, when each request
+is handed to a pool of threads individually, against grouping them into
+micro-batches with :class:`menpodetect.scheduler.MicroBatchScheduler`.
+
+The load is synthetic: several client threads submit small crops with
+exponentially distributed gaps between their requests.
+
+Requires menpodetect to be importable (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_scheduler.py --n-clients 16 --rate 200
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import random
+import threading
+import time
+
+import numpy as np
+import menpo.io as mio
+
+
+def run_load(submit, image, n_clients, n_requests, rate):
+    r"""
+    Submit requests from client threads and return the latency of each
+    request and the total time taken. Each future resolves to the time at
+    which its detection finished.
+    """
+    latencies = []
+    lock = threading.Lock()
+
+    def client(seed):
+        rng = random.Random(seed)
+        pending = []
+        for _ in range(n_requests):
+            time.sleep(rng.expovariate(rate))
+            pending.append((time.perf_counter(), submit(image.copy())))
+        for submitted, future in pending:
+            finished = future.result()
+            with lock:
+                latencies.append(finished - submitted)
+
+    start = time.perf_counter()
+    clients = [threading.Thread(target=client, args=(i,)) for i in range(n_clients)]
+    for c in clients:
+        c.start()
+    for c in clients:
+        c.join()
+    return np.array(latencies), time.perf_counter() - start
+
+
+def main():
+    from menpodetect.opencv import load_opencv_frontal_face_detector
+    from menpodetect.scheduler import MicroBatchScheduler
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-clients", type=int, default=16)
+    parser.add_argument("--n-requests", type=int, default=50)
+    parser.add_argument(
+        "--rate", type=float, default=200, help="Requests per second per client"
+    )
+    parser.add_argument("--size", type=int, default=48)
+    parser.add_argument("--n-workers", type=int, default=4)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait", type=float, default=0.002)
+    args = parser.parse_args()
+
+    detector = load_opencv_frontal_face_detector()
+    image = mio.import_builtin_asset.takeo_ppm().resize((args.size, args.size))
+
+    def timed_detector(image):
+        detector(image, attach=None)
+        return time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=args.n_workers) as executor:
+        results = {
+            "per-request": run_load(
+                lambda image: executor.submit(timed_detector, image),
+                image,
+                args.n_clients,
+                args.n_requests,
+                args.rate,
+            )
+        }
+
+    with MicroBatchScheduler(
+        max_batch_size=args.max_batch_size,
+        max_wait=args.max_wait,
+        n_workers=args.n_workers,
+    ) as scheduler:
+        results["micro-batched"] = run_load(
+            lambda image: scheduler.submit(timed_detector, image),
+            image,
+            args.n_clients,
+            args.n_requests,
+            args.rate,
+        )
+        metrics = scheduler.metrics()
+
+    n_total = args.n_clients * args.n_requests
+    print(
+        "n_clients={} rate={}/s/client image={}x{} n_workers={}".format(
+            args.n_clients, args.rate, args.size, args.size, args.n_workers
+        )
+    )
+    print(
+        "{:>14} {:>12} {:>9} {:>9} {:>9}".format(
+            "mode", "requests/s", "p50_ms", "p99_ms", "max_ms"
+        )
+    )
+    for mode, (latencies, elapsed) in results.items():
+        print(
+            "{:>14} {:>12.1f} {:>9.2f} {:>9.2f} {:>9.2f}".format(
+                mode,
+                n_total / elapsed,
+                1000 * np.percentile(latencies, 50),
+                1000 * np.percentile(latencies, 99),
+                1000 * latencies.max(),
+            )
+        )
+    print(
+        "mean batch size {:.1f}, max queue depth {}, p99 wait {:.2f}ms".format(
+            metrics["batch_size"]["mean"],
+            metrics["max_queue_depth"],
+            1000 * metrics["wait_time"]["p99"],
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
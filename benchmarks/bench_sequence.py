@@ -0,0 +1,89 @@
+r"""
+Frames per second of :class:`menpodetect.sequence.SequenceDetector` against
+running the full detector on every frame, for a synthetic sequence of a face
+moving across a larger frame.
+
+Requires menpodetect to be importable (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_sequence.py --backend dlib --n-frames 60
+"""
+import argparse
+import time
+
+import menpo.io as mio
+import numpy as np
+from menpo.image import Image
+
+from menpodetect.sequence import SequenceDetector
+
+
+def load_detector(backend):
+    if backend == "opencv":
+        from menpodetect.opencv import load_opencv_frontal_face_detector
+
+        return load_opencv_frontal_face_detector()
+    else:
+        from menpodetect.dlib import load_dlib_frontal_face_detector
+
+        return load_dlib_frontal_face_detector()
+
+
+def synthetic_sequence(n_frames, frame_shape):
+    r"""
+    Frames of a face moving diagonally across a textured background.
+    """
+    face = mio.import_builtin_asset.takeo_ppm().pixels
+    rng = np.random.RandomState(0)
+    background = rng.uniform(0.3, 0.5, size=(3,) + frame_shape)
+    max_offset = np.array(frame_shape) - face.shape[1:]
+    frames = []
+    for i in range(n_frames):
+        min_y, min_x = (max_offset * i / max(1, n_frames - 1)).astype(int)
+        pixels = background.copy()
+        pixels[:, min_y : min_y + face.shape[1], min_x : min_x + face.shape[2]] = face
+        frames.append(Image(pixels, copy=False))
+    return frames
+
+
+def frames_per_second(detector, frames):
+    start = time.perf_counter()
+    n_detections = 0
+    for frame in frames:
+        n_detections += len(detector(frame, attach=None))
+    return len(frames) / (time.perf_counter() - start), n_detections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", choices=["opencv", "dlib"], default="opencv")
+    parser.add_argument("--n-frames", type=int, default=60)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--keyframe-interval", type=int, default=10)
+    args = parser.parse_args()
+
+    detector = load_detector(args.backend)
+    frames = synthetic_sequence(args.n_frames, (args.height, args.width))
+    sequence_detector = SequenceDetector(
+        detector, keyframe_interval=args.keyframe_interval
+    )
+
+    print(
+        "backend={} frame_shape={} n_frames={} keyframe_interval={}".format(
+            args.backend, frames[0].shape, args.n_frames, args.keyframe_interval
+        )
+    )
+    print("{:>10} {:>8} {:>12}".format("mode", "fps", "detections"))
+    full_fps, full_n = frames_per_second(detector, frames)
+    print("{:>10} {:>8.2f} {:>12}".format("full", full_fps, full_n))
+    sequence_fps, sequence_n = frames_per_second(sequence_detector, frames)
+    print("{:>10} {:>8.2f} {:>12}".format("sequence", sequence_fps, sequence_n))
+    print(
+        "speedup={:.2f}x keyframes={}".format(
+            sequence_fps / full_fps, sequence_detector.n_keyframes
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
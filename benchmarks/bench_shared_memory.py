@@ -0,0 +1,96 @@
+r"""
+Throughput of :class:`menpodetect.shared_memory.SharedMemoryExecutor` when
+frames are sent to the worker processes through shared memory, against
+pickling each frame with its task.
+
+The frames are synthesised by resizing the takeo asset to 4K. By default the
+opencv detector only searches for large objects, so that detection is cheap
+and the cost of moving the frames between processes dominates.
+
+Requires menpodetect to be importable (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_shared_memory.py --backend opencv --n-workers 4
+"""
+import argparse
+import multiprocessing
+import time
+
+import menpo.io as mio
+
+
+def load_detector(backend):
+    if backend == "opencv":
+        from menpodetect.opencv import load_opencv_frontal_face_detector
+
+        return load_opencv_frontal_face_detector()
+    else:
+        from menpodetect.dlib import load_dlib_frontal_face_detector
+
+        return load_dlib_frontal_face_detector()
+
+
+def images_per_second(detect_batch, image, n_images, **kwargs):
+    # The same image is detected repeatedly (without attaching landmarks), as
+    # each copy of a 4K image takes ~200MB
+    start = time.perf_counter()
+    detect_batch([image] * n_images, attach=None, **kwargs)
+    return n_images / (time.perf_counter() - start)
+
+
+def main():
+    from menpodetect.shared_memory import SharedMemoryExecutor
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", choices=["opencv", "dlib"], default="opencv")
+    parser.add_argument("--n-images", type=int, default=32)
+    parser.add_argument("--shape", type=int, nargs=2, default=[2160, 3840])
+    parser.add_argument("--n-workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument(
+        "--min-size",
+        type=int,
+        default=1024,
+        help="The opencv min_size, large values make detection cheap",
+    )
+    args = parser.parse_args()
+
+    detector = load_detector(args.backend)
+    image = mio.import_builtin_asset.takeo_ppm().resize(args.shape)
+    kwargs = {"greyscale": True} if args.backend == "dlib" else {}
+    if args.backend == "opencv":
+        kwargs["min_size"] = (args.min_size, args.min_size)
+
+    print(
+        "backend={} image_shape={} n_images={} n_workers={} cores={}".format(
+            args.backend,
+            image.shape,
+            args.n_images,
+            args.n_workers,
+            multiprocessing.cpu_count(),
+        )
+    )
+    print("{:>14} {:>12} {:>8}".format("transport", "images/sec", "speedup"))
+    baseline = images_per_second(
+        lambda images, **kw: detector.detect_batch(images, n_workers=1, **kw),
+        image,
+        args.n_images,
+        **kwargs
+    )
+    print("{:>14} {:>12.2f} {:>7.2f}x".format("in-process", baseline, 1.0))
+    for transport in ("pickle", "shared_memory"):
+        with SharedMemoryExecutor(
+            detector, n_workers=args.n_workers, transport=transport
+        ) as executor:
+            # Warm up, so that the workers have started
+            executor.detect_batch([image], attach=None, **kwargs)
+            throughput = images_per_second(
+                executor.detect_batch, image, args.n_images, **kwargs
+            )
+        print(
+            "{:>14} {:>12.2f} {:>7.2f}x".format(
+                transport, throughput, throughput / baseline
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
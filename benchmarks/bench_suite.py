@@ -0,0 +1,425 @@
+r"""
+A benchmark suite that times each stage of detection separately, for every
+shipped loader, at several resolutions and detection densities.
+
+The stages are those performed by :func:`menpodetect.detect.detect`. Stages
+that rely on private functions, or on anything newer than the baseline
+release, are reported as ``n/a`` when they are unavailable, so that any two
+commits can be compared:
+
+  - ``greyscale``: :func:`menpodetect.detect._greyscale`
+  - ``rescale``: ``Image.rescale`` (to half size)
+  - ``to_uint8``: :func:`menpodetect.detect.menpo_image_to_uint8`
+  - ``backend``: the raw dlib/opencv call on the uint8 buffer
+  - ``marshal``: converting the raw rectangles to :map:`Detections`
+  - ``attach``: attaching the detections to the image as landmarks
+  - ``total``: calling the detector on the image
+
+The images are the bundled takeo asset and synthetic images of the given
+resolutions, with a grid of ``n_faces`` copies of takeo pasted onto noise.
+
+Results are written as JSON, so that runs of different commits can be
+compared. Requires menpodetect to be importable (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_suite.py --output before.json
+    # ... change something ...
+    python benchmarks/bench_suite.py --output after.json
+    python benchmarks/bench_suite.py --compare before.json after.json
+"""
+import argparse
+import datetime
+import importlib
+import json
+import multiprocessing
+from pathlib import Path
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import menpo.io as mio
+from menpo.image import Image
+
+LOADERS = ["dlib_frontal", "opencv_frontal", "opencv_profile", "opencv_eye"]
+
+
+def load_detector(name):
+    if name == "dlib_frontal":
+        from menpodetect.dlib import load_dlib_frontal_face_detector
+
+        return load_dlib_frontal_face_detector()
+    from menpodetect import opencv
+
+    loader = {
+        "opencv_frontal": opencv.load_opencv_frontal_face_detector,
+        "opencv_profile": opencv.load_opencv_profile_face_detector,
+        "opencv_eye": opencv.load_opencv_eye_detector,
+    }[name]
+    return loader()
+
+
+def synthetic_image(height, n_faces, seed=0):
+    r"""
+    A 16:9 RGB image of noise with a grid of ``n_faces`` copies of takeo.
+    """
+    width = int(round(height * 16 / 9))
+    rng = np.random.RandomState(seed)
+    pixels = rng.uniform(0.3, 0.7, size=(3, height, width))
+    n_rows = int(np.ceil(np.sqrt(n_faces)))
+    if n_faces > 0:
+        n_cols = int(np.ceil(n_faces / n_rows))
+        cell = min(height // n_rows, width // n_cols)
+        face = mio.import_builtin_asset.takeo_ppm().resize((cell, cell)).pixels
+        for i in range(n_faces):
+            y, x = (i // n_cols) * cell, (i % n_cols) * cell
+            pixels[:, y : y + cell, x : x + cell] = face
+    return Image(pixels, copy=False)
+
+
+def benchmark_images(resolutions, densities):
+    yield "takeo", 1, mio.import_builtin_asset.takeo_ppm()
+    for height in resolutions:
+        for n_faces in densities:
+            yield "synthetic", n_faces, synthetic_image(height, n_faces)
+
+
+def time_stage(function, n_repeats, setup=None):
+    r"""
+    The median and minimum time in seconds of ``n_repeats`` calls of
+    ``function``, which is passed the result of ``setup`` (if given). If the
+    stage is not available in this version of menpodetect (``function`` is
+    ``None``), ``(None, None)`` is returned.
+    """
+    if function is None:
+        return None, None
+    timings = []
+    for _ in range(n_repeats):
+        argument = setup() if setup is not None else None
+        start = time.perf_counter()
+        function(argument) if setup is not None else function()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)), float(np.min(timings))
+
+
+def optional_import(module, name):
+    r"""
+    Import ``name`` from ``module``, or return ``None`` if it does not exist
+    in this version of menpodetect. The suite only relies on the public API
+    of the baseline, and stages that need anything newer are reported as
+    unavailable, so that it can be run on any commit.
+    """
+    try:
+        return getattr(importlib.import_module(module), name)
+    except (ImportError, AttributeError):
+        return None
+
+
+def native_model(name):
+    r"""
+    The native dlib/opencv model of the loader, built directly rather than
+    taken from the internals of the detector.
+    """
+    if name.startswith("dlib"):
+        import dlib
+
+        return dlib.get_frontal_face_detector()
+    import cv2
+    from menpodetect.paths import models_dir_path
+
+    filename = {
+        "opencv_frontal": "haarcascade_frontalface_alt.xml",
+        "opencv_profile": "haarcascade_profileface.xml",
+        "opencv_eye": "haarcascade_eye.xml",
+    }[name]
+    return cv2.CascadeClassifier(str(Path(models_dir_path(), "opencv", filename)))
+
+
+def backend_stages(name, uint8_image):
+    r"""
+    The raw backend call and the marshalling of its output to
+    :map:`Detections`, as callables. Returns ``(backend, marshal)``, where
+    ``marshal`` is ``None`` if :map:`Detections` is not available.
+    """
+    Detections = optional_import("menpodetect.detections", "Detections")
+    model = native_model(name)
+    if name.startswith("dlib"):
+        rects_to_boxes = optional_import(
+            "menpodetect.dlib.conversion", "rects_to_boxes"
+        )
+        image = uint8_image[..., 0] if uint8_image.shape[-1] == 1 else uint8_image
+        image = np.ascontiguousarray(image)
+
+        def backend():
+            return model.run(image, 0, 0.0)
+
+        rects, scores, ids = backend()
+
+        def marshal():
+            return Detections(rects_to_boxes(rects), scores=scores, detector_ids=ids)
+
+        available = Detections is not None and rects_to_boxes is not None
+    else:
+        import cv2
+
+        boxes_from_rects = optional_import(
+            "menpodetect.opencv.conversion", "boxes_from_rects"
+        )
+
+        def backend():
+            return model.detectMultiScale3(
+                uint8_image,
+                scaleFactor=1.1,
+                minNeighbors=5,
+                minSize=(30, 30),
+                flags=cv2.CASCADE_SCALE_IMAGE,
+                outputRejectLevels=True,
+            )
+
+        rects, _, scores = backend()
+
+        def marshal():
+            return Detections(boxes_from_rects(rects), scores=np.ravel(scores))
+
+        available = Detections is not None and boxes_from_rects is not None
+    return backend, marshal if available else None
+
+
+def run_case(name, detector, greyscale, image, n_repeats):
+    from menpodetect.detect import menpo_image_to_uint8
+
+    # The greyscale conversion and landmark attachment of detect() are
+    # private, so are only timed if they exist in this version
+    greyscale_function = optional_import("menpodetect.detect", "_greyscale")
+    attach_landmarks = optional_import("menpodetect.detect", "_attach_landmarks")
+
+    greyscale_stage = None
+    if greyscale_function is not None:
+
+        def greyscale_stage():
+            return greyscale_function(image)
+
+    grey = image
+    if greyscale:
+        grey = image.as_greyscale() if greyscale_stage is None else greyscale_stage()
+    uint8_image = menpo_image_to_uint8(grey, channels_at_back=True)
+    backend, marshal = backend_stages(name, uint8_image)
+
+    def fresh_image():
+        return Image(image.pixels, copy=False)
+
+    attach = None
+    n_detections = len(detector(fresh_image()))
+    if attach_landmarks is not None and marshal is not None:
+        detections = marshal()
+
+        def attach(im):
+            attach_landmarks(im, detections, "object")
+
+    stages = {
+        "greyscale": time_stage(greyscale_stage, n_repeats),
+        "rescale": time_stage(lambda: grey.rescale(0.5), n_repeats),
+        "to_uint8": time_stage(
+            lambda: menpo_image_to_uint8(grey, channels_at_back=True), n_repeats
+        ),
+        "backend": time_stage(backend, n_repeats),
+        "marshal": time_stage(marshal, n_repeats),
+        "attach": time_stage(attach, n_repeats, setup=fresh_image),
+        "total": time_stage(detector, n_repeats, setup=fresh_image),
+    }
+    return stages, n_detections
+
+
+def environment():
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL
+        )
+        commit = commit.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    versions = {"python": platform.python_version(), "numpy": np.__version__}
+    for module in ("menpo", "menpodetect", "cv2", "dlib"):
+        try:
+            versions[module] = __import__(module).__version__
+        except (ImportError, AttributeError):
+            versions[module] = None
+    return {
+        "commit": commit,
+        "date": datetime.datetime.now().isoformat(),
+        "platform": platform.platform(),
+        "cores": multiprocessing.cpu_count(),
+        "versions": versions,
+    }
+
+
+def run_suite(args):
+    results = []
+    images = list(benchmark_images(args.resolutions, args.faces))
+    for name in args.loaders:
+        detector = load_detector(name)
+        # dlib detects on the RGB image, opencv always on the greyscale one
+        greyscale = not name.startswith("dlib")
+        for image_name, n_faces, image in images:
+            stages, n_detections = run_case(
+                name, detector, greyscale, image, args.n_repeats
+            )
+            case = {
+                "loader": name,
+                "image": image_name,
+                "shape": list(image.shape),
+                "n_faces": n_faces,
+                "n_detections": n_detections,
+            }
+            for stage, (median, minimum) in stages.items():
+                results.append(dict(case, stage=stage, median_s=median, min_s=minimum))
+            print(
+                "{:>15} {:>10} {:>12} faces={:<3} detections={:<3} "
+                "total={:>8}ms backend={:>8}ms".format(
+                    name,
+                    image_name,
+                    "x".join(str(s) for s in image.shape),
+                    n_faces,
+                    n_detections,
+                    format_ms(stages["total"][0]),
+                    format_ms(stages["backend"][0]),
+                ),
+                file=sys.stderr,
+            )
+    return {
+        "environment": environment(),
+        "n_repeats": args.n_repeats,
+        "results": results,
+    }
+
+
+def result_key(result):
+    return (
+        result["loader"],
+        result["image"],
+        tuple(result["shape"]),
+        result["n_faces"],
+        result["stage"],
+    )
+
+
+def format_ms(seconds):
+    return "n/a" if seconds is None else "{:.3f}".format(1000 * seconds)
+
+
+def compare(before_path, after_path, threshold, min_difference):
+    r"""
+    Print the change in the time of every stage between two runs, and return
+    the number of stages that became slower by more than ``threshold`` (a
+    fraction) and by more than ``min_difference`` seconds.
+
+    The minimum times are compared, as they are far less noisy than the
+    medians for the stages that take well under a millisecond. Stages that
+    are unavailable in either run are shown as ``n/a``.
+    """
+    with open(before_path) as f:
+        before = {result_key(r): r for r in json.load(f)["results"]}
+    with open(after_path) as f:
+        after = {result_key(r): r for r in json.load(f)["results"]}
+    print(
+        "{:>15} {:>10} {:>12} {:>5} {:>9} {:>11} {:>11} {:>7}".format(
+            "loader",
+            "image",
+            "shape",
+            "faces",
+            "stage",
+            "before_ms",
+            "after_ms",
+            "change",
+        )
+    )
+    n_regressions = 0
+    for key in sorted(set(before) & set(after), key=str):
+        old, new = before[key]["min_s"], after[key]["min_s"]
+        change, flag = "n/a", ""
+        if old is not None and new is not None:
+            ratio = new / old - 1 if old > 0 else 0.0
+            change = "{:+.0%}".format(ratio)
+            if ratio > threshold and new - old > min_difference:
+                n_regressions += 1
+                flag = "  SLOWER"
+        print(
+            "{:>15} {:>10} {:>12} {:>5} {:>9} {:>11} {:>11} {:>7}{}".format(
+                key[0],
+                key[1],
+                "x".join(str(s) for s in key[2]),
+                key[3],
+                key[4],
+                format_ms(old),
+                format_ms(new),
+                change,
+                flag,
+            )
+        )
+    missing = set(before) ^ set(after)
+    if missing:
+        print("{} cases are only in one of the runs".format(len(missing)))
+    return n_regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--loaders", nargs="+", choices=LOADERS, default=LOADERS)
+    parser.add_argument(
+        "--resolutions",
+        type=int,
+        nargs="+",
+        default=[480, 1080],
+        help="The heights of the (16:9) synthetic images",
+    )
+    parser.add_argument(
+        "--faces",
+        type=int,
+        nargs="+",
+        default=[0, 1, 16],
+        help="The number of faces in each synthetic image",
+    )
+    parser.add_argument("--n-repeats", type=int, default=5)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BEFORE", "AFTER"),
+        help="Compare two JSON results instead of running the suite",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="The fractional slow down reported as a regression by --compare",
+    )
+    parser.add_argument(
+        "--min-difference-ms",
+        type=float,
+        default=0.05,
+        help="Slow downs smaller than this are never reported as regressions",
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        n_regressions = compare(
+            args.compare[0],
+            args.compare[1],
+            args.threshold,
+            args.min_difference_ms / 1000,
+        )
+        # A non-zero exit status allows regressions to fail a CI job
+        sys.exit(1 if n_regressions else 0)
+
+    report = run_suite(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
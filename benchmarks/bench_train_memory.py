@@ -0,0 +1,132 @@
+r"""
+Peak memory of :func:`menpodetect.dlib.train_dlib_detector` when the
+training images are:
+
+  - ``list``: a materialised list of (float) Menpo images, as before
+  - ``lazy``: a lazy iterable, converted to uint8 in memory in one pass
+  - ``cache``: a lazy iterable, converted to uint8 into a memory mapped file
+
+Each mode is run in a fresh process, and its peak resident memory is
+reported. The images are synthesised by pasting takeo at random positions
+and scales onto noise.
+
+Requires menpodetect to be importable (e.g. ``pip install -e .``)::
+
+    python benchmarks/bench_train_memory.py --n-images 200
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ["list", "lazy", "cache"]
+
+
+def synthetic_images(n_images, shape, seed=0):
+    import numpy as np
+    import menpo.io as mio
+    from menpo.image import Image
+    from menpo.shape import bounding_box
+
+    takeo = mio.import_builtin_asset.takeo_ppm()
+    rng = np.random.RandomState(seed)
+    for _ in range(n_images):
+        pixels = rng.uniform(0.3, 0.7, size=(3,) + tuple(shape))
+        size = rng.randint(100, min(shape) // 2)
+        face = takeo.resize((size, size)).pixels
+        y, x = rng.randint(0, shape[0] - size), rng.randint(0, shape[1] - size)
+        pixels[:, y : y + size, x : x + size] = face
+        image = Image(pixels, copy=False)
+        # The face occupies roughly the centre of the takeo asset
+        image.landmarks["face"] = bounding_box(
+            (y + 0.25 * size, x + 0.2 * size), (y + 0.75 * size, x + 0.8 * size)
+        )
+        yield image
+
+
+def peak_memory_mb():
+    # ru_maxrss is in kilobytes on Linux, but bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024**2 if sys.platform == "darwin" else 1024)
+
+
+def worker(mode, n_images, shape):
+    from menpodetect.dlib import train_dlib_detector
+
+    images = synthetic_images(n_images, shape)
+    before = peak_memory_mb()
+    start = time.perf_counter()
+    if mode == "list":
+        train_dlib_detector(list(images), num_threads=1, epsilon=0.1)
+    elif mode == "lazy":
+        train_dlib_detector(images, num_threads=1, epsilon=0.1)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            train_dlib_detector(
+                images,
+                num_threads=1,
+                epsilon=0.1,
+                cache_path=os.path.join(directory, "cache.bin"),
+            )
+    print(
+        json.dumps(
+            {
+                "baseline_mb": before,
+                "peak_mb": peak_memory_mb(),
+                "seconds": time.perf_counter() - start,
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-images", type=int, default=200)
+    parser.add_argument("--shape", type=int, nargs=2, default=[480, 640])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.n_images, args.shape)
+        return
+
+    height, width = args.shape
+    float_mb = args.n_images * 3 * height * width * 8 / 1024**2
+    uint8_mb = args.n_images * 3 * height * width / 1024**2
+    print(
+        "n_images={} shape={}x{} (float64 {:.0f}MB, uint8 {:.0f}MB)".format(
+            args.n_images, height, width, float_mb, uint8_mb
+        )
+    )
+    print(
+        "{:>6} {:>12} {:>12} {:>9}".format("mode", "baseline_mb", "peak_mb", "seconds")
+    )
+    for mode in args.modes:
+        output = subprocess.check_output(
+            [
+                sys.executable,
+                __file__,
+                "--worker",
+                mode,
+                "--n-images",
+                str(args.n_images),
+                "--shape",
+                str(height),
+                str(width),
+            ]
+        )
+        result = json.loads(output.decode().strip().splitlines()[-1])
+        print(
+            "{:>6} {:>12.0f} {:>12.0f} {:>9.1f}".format(
+                mode, result["baseline_mb"], result["peak_mb"], result["seconds"]
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
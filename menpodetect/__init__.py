@@ -1,4 +1,100 @@
-from menpodetect.dlib import *
-from menpodetect.opencv import *
+import importlib
+import importlib.util
 
 from ._version import __version__
+
+# The public API is imported on first access, so that importing menpodetect
+# does not import dlib, opencv or menpo until they are actually used (for
+# example, a worker that only uses opencv never imports dlib).
+# The backend names are resolved from the modules that define them, so that
+# accessing one whose backend is not installed raises the
+# MenpoMissingDependencyError (which menpodetect.dlib and menpodetect.opencv
+# swallow)
+_backend_imports = {
+    "dlib": {
+        "load_dlib_frontal_face_detector": "menpodetect.dlib.detect",
+        "DlibDetector": "menpodetect.dlib.detect",
+        "train_dlib_detector": "menpodetect.dlib.train",
+        "save_dlib_detector": "menpodetect.dlib.model",
+        "dlib_model_metadata": "menpodetect.dlib.model",
+    },
+    "cv2": {
+        "load_opencv_frontal_face_detector": "menpodetect.opencv.detect",
+        "load_opencv_profile_face_detector": "menpodetect.opencv.detect",
+        "load_opencv_eye_detector": "menpodetect.opencv.detect",
+        "OpenCVDetector": "menpodetect.opencv.detect",
+    },
+}
+_lazy_imports = {
+    "PreprocessedImage": "menpodetect.detect",
+    "adetect": "menpodetect.aio",
+    "Detections": "menpodetect.detections",
+    "EnsembleDetector": "menpodetect.ensemble",
+    "SequenceDetector": "menpodetect.sequence",
+    "detect_tiled": "menpodetect.tiled",
+    "detect_coarse_to_fine": "menpodetect.coarse_to_fine",
+    "ModelRegistry": "menpodetect.registry",
+    "model_registry": "menpodetect.registry",
+    "detect_batch": "menpodetect.batch",
+    "detect_batch_processes": "menpodetect.batch",
+    "detect_stream": "menpodetect.batch",
+    "DetectorSpec": "menpodetect.batch",
+    "SharedMemoryExecutor": "menpodetect.shared_memory",
+    "MicroBatchScheduler": "menpodetect.scheduler",
+    "DetectionStats": "menpodetect.profiling",
+}
+_submodules = {
+    "aio",
+    "batch",
+    "coarse_to_fine",
+    "detect",
+    "detections",
+    "dlib",
+    "ensemble",
+    "nms",
+    "opencv",
+    "profiling",
+    "registry",
+    "scheduler",
+    "sequence",
+    "shared_memory",
+    "tiled",
+}
+
+
+def _installed(module):
+    # Finding the module does not import it
+    try:
+        return importlib.util.find_spec(module) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+# As when the backends were imported eagerly, only the names of the installed
+# backends are exported by "from menpodetect import *"
+__all__ = [
+    name
+    for backend, names in _backend_imports.items()
+    if _installed(backend)
+    for name in names
+] + list(_lazy_imports)
+
+for _names in _backend_imports.values():
+    _lazy_imports.update(_names)
+del _names
+
+
+def __getattr__(name):
+    if name in _lazy_imports:
+        value = getattr(importlib.import_module(_lazy_imports[name]), name)
+    elif name in _submodules:
+        value = importlib.import_module("." + name, __name__)
+    else:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    # Cache the value so that __getattr__ is only called once per name
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_imports) | _submodules)
@@ -0,0 +1,135 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
+import threading
+
+from menpodetect.batch import _n_workers
+from menpodetect.detect import detect, _attach_landmarks, _check_attach
+
+# The executor that runs the detections of adetect, created on first use
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _default_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_n_workers(None), thread_name_prefix="menpodetect"
+            )
+        return _executor
+
+
+def set_max_workers(max_workers):
+    r"""
+    Set the number of threads used by the asynchronous detection functions,
+    which is the maximum number of detections that run at once. Further
+    detections wait (without blocking the event loop) for a free thread.
+
+    Detections that are already running on the previous threads are allowed
+    to finish.
+
+    Parameters
+    ----------
+    max_workers : `int` > 0 or ``None``
+        The number of threads. If ``None``, one thread per core is used
+        (the default).
+
+    Raises
+    ------
+    ValueError
+        If ``max_workers`` is less than 1.
+    """
+    global _executor
+    executor = ThreadPoolExecutor(
+        max_workers=_n_workers(max_workers), thread_name_prefix="menpodetect"
+    )
+    with _executor_lock:
+        previous, _executor = _executor, executor
+    if previous is not None:
+        previous.shutdown(wait=False)
+
+
+async def _adetect(detect_function, image, group_prefix, attach, executor):
+    r"""
+    Run ``detect_function(image, attach=None)`` on the executor, and then
+    attach the detections to the image in the calling (event loop) thread.
+
+    Attaching the landmarks in the event loop means that a cancelled
+    detection never modifies the image, even if it was already running.
+    """
+    _check_attach(attach)
+    if executor is None:
+        executor = _default_executor()
+    loop = asyncio.get_running_loop()
+    # If the task is cancelled whilst waiting for a thread, the detection is
+    # removed from the queue of the executor and never runs
+    detections = await loop.run_in_executor(
+        executor, partial(detect_function, image, attach=None)
+    )
+    _attach_landmarks(
+        getattr(image, "image", image), detections, group_prefix, attach=attach
+    )
+    return detections
+
+
+async def adetect(
+    detector_callable,
+    image,
+    group_prefix="object",
+    attach="per_box",
+    executor=None,
+    **kwargs
+):
+    r"""
+    Apply the general detection framework without blocking the event loop.
+
+    This is the asynchronous version of :func:`menpodetect.detect.detect`.
+    The preprocessing and detection run on a managed pool of threads (see
+    :func:`set_max_workers`), so at most that many detections run at once,
+    and the detections are attached to the image once they are complete.
+
+    The returned coroutine may be cancelled (for example, by
+    ``asyncio.wait_for``). A detection that has not yet started never runs.
+    A detection that is already running finishes in the background, but its
+    result is discarded and the image is not modified.
+
+    Parameters
+    ----------
+    detector_callable : `callable` or `function`
+        A callable object that will perform detection given a single
+        parameter, a `uint8` numpy array. See :func:`menpodetect.detect.detect`.
+    image : `menpo.image.Image` or :map:`PreprocessedImage`
+        A Menpo image to detect. The bounding boxes of the detected objects
+        will be attached to this image.
+    group_prefix : `str`, optional
+        The prefix string to be appended to each each landmark group that is
+        stored on the image. Each detection will be stored as group_prefix_#
+        where # is a count starting from 0.
+    attach : ``{per_box, combined}`` or ``None``, optional
+        How the detections are attached to the image as landmarks.
+        See :func:`menpodetect.detect.detect`.
+    executor : `concurrent.futures.Executor`, optional
+        The executor to run the detection on, instead of the managed pool of
+        threads.
+    kwargs : `dict`, optional
+        Passed through to :func:`menpodetect.detect.detect`.
+
+    Returns
+    -------
+    bounding_boxes : :map:`Detections`
+        The detections found.
+
+    Raises
+    ------
+    ValueError
+        If ``attach`` is not one of ``{per_box, combined, None}``.
+    """
+    return await _adetect(
+        partial(detect, detector_callable, group_prefix=group_prefix, **kwargs),
+        image,
+        group_prefix,
+        attach,
+        executor,
+    )
@@ -0,0 +1,339 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from pathlib import Path
+import multiprocessing
+
+import menpo.io as mio
+
+from menpodetect.detect import PreprocessedImage, _accepts_attach
+
+
+def _n_workers(n_workers, n_items=None):
+    r"""
+    The number of workers that should be used to process the given number
+    of items. If ``n_workers`` is ``None``, one worker per core is used. If
+    ``n_items`` is ``None``, the number of items is unknown.
+    """
+    if n_workers is None:
+        n_workers = multiprocessing.cpu_count()
+    if n_workers < 1:
+        raise ValueError("n_workers must be > 0, got {}".format(n_workers))
+    if n_items is not None:
+        n_workers = max(1, min(n_workers, n_items))
+    return n_workers
+
+
+def detect_batch(detector, images, n_workers=None, **kwargs):
+    r"""
+    Apply a detector to a batch of images using a pool of threads.
+
+    Both dlib and opencv release the GIL whilst detecting, so the native
+    detection of several images can proceed on several cores at once. Every
+    thread is given its own copy of the underlying native model as required,
+    and the copies are kept by the detector for later batches.
+
+    The detections are attached to each image as landmarks, exactly as if
+    the detector had been called on each image in turn.
+
+    Parameters
+    ----------
+    detector : `callable`
+        A detector such as :map:`DlibDetector` or :map:`OpenCVDetector`. It is
+        called with a single image and the given ``kwargs``.
+    images : `iterable` of `menpo.image.Image`
+        The Menpo images to detect.
+    n_workers : `int` > 0, optional
+        The number of threads to use. If ``None``, one thread per core is used.
+        If ``1``, the images are detected in the calling thread.
+    kwargs : `dict`, optional
+        Passed through to the detector for every image.
+
+    Returns
+    -------
+    bounding_boxes : `list` of :map:`Detections`
+        The detected objects for each image, in the order of ``images``.
+
+    Examples
+    --------
+    >>> detector = load_opencv_frontal_face_detector()
+    >>> images = list(mio.import_images('./images/path'))
+    >>> bounding_boxes = detector.detect_batch(images, n_workers=4)
+    """
+    images = list(images)
+    n_workers = _n_workers(n_workers, len(images))
+    detect_one = partial(detector, **kwargs)
+    if n_workers == 1:
+        return [detect_one(image) for image in images]
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        return list(executor.map(detect_one, images))
+
+
+class DetectorSpec(object):
+    r"""
+    A lightweight, picklable description of how to build a detector.
+
+    Native detectors hold handles (``dlib.fhog_object_detector``,
+    ``cv2.CascadeClassifier``) that cannot be pickled directly. Whilst
+    :map:`DlibDetector` and :map:`OpenCVDetector` pickle their serialised
+    models, a spec instead records *how* to build the detector, so that
+    each worker process can build its own copy once without the model being
+    sent at all.
+
+    Parameters
+    ----------
+    loader : `callable`
+        A picklable (module level) callable that returns a detector. For
+        example, :map:`load_dlib_frontal_face_detector` or the
+        :map:`DlibDetector` class itself.
+    args : `tuple`, optional
+        Positional arguments passed to ``loader``, such as a model path.
+    kwargs : `dict`, optional
+        Keyword arguments passed to ``loader``.
+
+    Examples
+    --------
+    >>> frontal_spec = DetectorSpec(load_dlib_frontal_face_detector)
+    >>> custom_spec = DetectorSpec(DlibDetector, './my_detector.svm')
+    """
+
+    def __init__(self, loader, *args, **kwargs):
+        self.loader = loader
+        self.args = args
+        self.kwargs = kwargs
+
+    def build(self):
+        r"""
+        Build the detector described by this spec.
+
+        Returns
+        -------
+        detector : `callable`
+            The detector returned by the loader.
+        """
+        return self.loader(*self.args, **self.kwargs)
+
+    def __repr__(self):
+        arguments = [repr(a) for a in self.args]
+        arguments += ["{}={!r}".format(k, v) for k, v in self.kwargs.items()]
+        return "{}({})".format(
+            getattr(self.loader, "__name__", repr(self.loader)), ", ".join(arguments)
+        )
+
+
+# The detector built by each worker process of detect_batch_processes
+_worker_detector = None
+
+
+def _init_worker(detector):
+    global _worker_detector
+    if isinstance(detector, DetectorSpec):
+        detector = detector.build()
+    _worker_detector = detector
+
+
+def _detect_in_worker(item, kwargs):
+    r"""
+    Detect a single item inside a worker process. Returns the bounding boxes
+    and the landmark groups that were attached to the image, so that they can
+    be attached to the original image in the parent process.
+
+    Images imported from paths only exist in the worker, so no landmarks are
+    attached to them (if the detector allows it) or returned.
+    """
+    if isinstance(item, (str, Path)):
+        image = mio.import_image(item)
+        if _accepts_attach(_worker_detector):
+            kwargs = dict(kwargs, attach=None)
+        return _worker_detector(image, **kwargs), ()
+    existing_groups = set(item.landmarks.keys())
+    pcs = _worker_detector(item, **kwargs)
+    new_groups = [
+        (group, item.landmarks[group])
+        for group in item.landmarks.keys()
+        if group not in existing_groups
+    ]
+    return pcs, new_groups
+
+
+def _detect_shard(shard, kwargs):
+    return [_detect_in_worker(item, kwargs) for item in shard]
+
+
+def _shards(iterable, shard_size):
+    iterator = iter(iterable)
+    shard = list(islice(iterator, shard_size))
+    while shard:
+        yield shard
+        shard = list(islice(iterator, shard_size))
+
+
+def _ordered_bounded_map(executor, function, iterable, max_in_flight):
+    r"""
+    Lazily map the function over the iterable using the executor, yielding
+    ``(item, result)`` pairs in input order. At most ``max_in_flight`` items
+    are submitted to the executor at any one time.
+    """
+    pending = deque()
+    try:
+        for item in iterable:
+            pending.append((item, executor.submit(function, item)))
+            if len(pending) >= max_in_flight:
+                item, future = pending.popleft()
+                yield item, future.result()
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+    finally:
+        # If the consumer stops early, don't do work that will never be used
+        for _, future in pending:
+            future.cancel()
+
+
+def detect_batch_processes(
+    detector_spec, images, n_workers=None, shard_size=8, **kwargs
+):
+    r"""
+    Apply a detector to a batch of images using a pool of processes.
+
+    Each worker process builds the detector described by ``detector_spec``
+    (or unpickles the given detector) exactly once, and shards of
+    ``shard_size`` images are then streamed through it. At most
+    ``2 * n_workers`` shards are in flight at once, so ``images`` may be a
+    lazy iterable over millions of items.
+
+    Items may either be Menpo images, which are pickled to the workers and
+    have their detections attached as landmarks in this process, or paths,
+    which are imported inside the workers so that no pixels are transferred.
+
+    Parameters
+    ----------
+    detector_spec : :map:`DetectorSpec` or `callable`
+        Describes how each worker should build its detector, or a picklable
+        detector such as :map:`DlibDetector` or :map:`OpenCVDetector`.
+    images : `iterable` of `menpo.image.Image` or `Path` or `str`
+        The Menpo images or image paths to detect.
+    n_workers : `int` > 0, optional
+        The number of processes to use. If ``None``, one process per core is
+        used.
+    shard_size : `int` > 0, optional
+        The number of images sent to a worker at a time. Larger shards reduce
+        the inter-process overhead.
+    kwargs : `dict`, optional
+        Passed through to the detector for every image.
+
+    Returns
+    -------
+    bounding_boxes : `list` of :map:`Detections`
+        The detected objects for each image, in the order of ``images``.
+
+    Examples
+    --------
+    >>> spec = DetectorSpec(load_dlib_frontal_face_detector)
+    >>> paths = mio.image_paths('./images/path')
+    >>> bounding_boxes = detect_batch_processes(spec, paths, n_workers=8)
+    """
+    n_workers = _n_workers(n_workers)
+    if shard_size < 1:
+        raise ValueError("shard_size must be > 0, got {}".format(shard_size))
+
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=n_workers, initializer=_init_worker, initargs=(detector_spec,)
+    ) as executor:
+        detect_shard = partial(_detect_shard, kwargs=kwargs)
+        for shard, shard_results in _ordered_bounded_map(
+            executor, detect_shard, _shards(images, shard_size), 2 * n_workers
+        ):
+            for item, (pcs, new_groups) in zip(shard, shard_results):
+                # No groups are returned for paths
+                for group, pc in new_groups:
+                    item.landmarks[group] = pc
+                results.append(pcs)
+    return results
+
+
+def _load_image(item, preprocess=None, detector=None, kwargs=None):
+    r"""
+    Import the item if it is a path and then apply the preprocessing. If the
+    detector is a :map:`DlibDetector` or :map:`OpenCVDetector`, the image is
+    also prepared for it, and returned as a :map:`PreprocessedImage`.
+    """
+    if isinstance(item, (str, Path)):
+        item = mio.import_image(item)
+    if preprocess is not None:
+        item = preprocess(item)
+    preprocess_args = getattr(detector, "_preprocess_args", None)
+    if preprocess_args is not None:
+        if not isinstance(item, PreprocessedImage):
+            item = PreprocessedImage(item)
+        item.uint8_pixels(**preprocess_args(item, **kwargs))
+    return item
+
+
+def detect_stream(
+    detector, source, max_in_flight=4, n_workers=None, preprocess=None, **kwargs
+):
+    r"""
+    Lazily detect a stream of images, importing and preprocessing the next
+    images on background threads whilst the current image is detected.
+
+    For a :map:`DlibDetector` or :map:`OpenCVDetector`, the background
+    threads also prepare each image for the detector (the greyscale
+    conversion, rescaling and uint8 conversion), so that only the native
+    detection runs on the consuming thread. Each prefetched image then also
+    holds its prepared buffer in memory.
+
+    Only ``max_in_flight`` images are held in memory at any one time (the
+    image being detected plus those prefetched), so datasets far larger than
+    the available memory can be processed. Images are discarded once their
+    detections have been yielded.
+
+    Parameters
+    ----------
+    detector : `callable`
+        A detector such as :map:`DlibDetector` or :map:`OpenCVDetector`. It is
+        called with a single image and the given ``kwargs``.
+    source : `str` or `Path` or `iterable` of `menpo.image.Image` or `Path`
+        Either a glob pattern (or directory) of images to import, or an
+        iterable of Menpo images and/or image paths.
+    max_in_flight : `int` > 0, optional
+        The maximum number of images held in memory at once, including the
+        image currently being detected.
+    n_workers : `int` > 0, optional
+        The number of threads used to import and preprocess images. If
+        ``None``, one thread per core is used (up to ``max_in_flight``).
+    preprocess : `callable`, optional
+        A callable that takes a Menpo image and returns a Menpo image. It is
+        applied on the background threads, for example to crop the image.
+    kwargs : `dict`, optional
+        Passed through to the detector for every image.
+
+    Yields
+    ------
+    path : `Path` or ``None``
+        The path of the image, if known.
+    bounding_boxes : :map:`Detections`
+        The detected objects.
+
+    Examples
+    --------
+    >>> detector = load_dlib_frontal_face_detector()
+    >>> for path, bboxes in detect_stream(detector, './images/path/*.jpg'):
+    ...     print(path, len(bboxes))
+    """
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be > 0, got {}".format(max_in_flight))
+    if isinstance(source, (str, Path)):
+        source = mio.image_paths(source)
+    n_workers = _n_workers(n_workers, max_in_flight)
+
+    load = partial(_load_image, preprocess=preprocess, detector=detector, kwargs=kwargs)
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        for item, image in _ordered_bounded_map(executor, load, source, max_in_flight):
+            if isinstance(item, (str, Path)):
+                path = Path(item)
+            else:
+                path = getattr(getattr(image, "image", image), "path", None)
+            yield path, detector(image, **kwargs)
@@ -0,0 +1,124 @@
+import time
+
+import numpy as np
+
+from menpodetect.detect import PreprocessedImage, _attach_landmarks, _check_attach
+from menpodetect.detections import Detections
+
+
+def _enlarge(boxes, margin):
+    r"""
+    Enlarge each box by ``margin`` times its size on every side.
+    """
+    size = boxes[:, 2:] - boxes[:, :2]
+    return np.hstack([boxes[:, :2] - margin * size, boxes[:, 2:] + margin * size])
+
+
+def detect_coarse_to_fine(
+    detector,
+    image,
+    proposal_scale=0.25,
+    crop_margin=0.5,
+    group_prefix="object",
+    attach="per_box",
+    timings=None,
+    **kwargs
+):
+    r"""
+    Detect objects in two stages: a proposal pass over a heavily downscaled
+    image, followed by a verification pass over full resolution crops around
+    each proposal.
+
+    The proposal pass is cheap because the image is small, and the
+    verification pass is cheap because only small parts of the image are
+    searched. The verified detections are found at full resolution, so are
+    more accurate than the proposals. Proposals that are not confirmed by
+    the verification pass are discarded.
+
+    Parameters
+    ----------
+    detector : `callable`
+        A detector such as :map:`DlibDetector` or :map:`OpenCVDetector`. It must
+        accept the ``image_diagonal``, ``regions`` and ``attach`` arguments.
+    image : `menpo.image.Image` or :map:`PreprocessedImage`
+        A Menpo image to detect. The bounding boxes of the detected objects
+        will be attached to this image.
+    proposal_scale : `float`, optional
+        The scale (in ``(0, 1]``) of the image that the proposal pass is run
+        on. Objects must still be detectable at this scale to be found.
+    crop_margin : `float`, optional
+        Each proposal is verified within a crop of the full resolution image,
+        enlarged by this fraction of the proposal size on every side.
+        Overlapping crops are merged.
+    group_prefix : `str`, optional
+        The prefix string to be appended to each each landmark group that is
+        stored on the image. Each detection will be stored as group_prefix_#
+        where # is a count starting from 0.
+    attach : ``{per_box, combined}`` or ``None``, optional
+        How the detections are attached to the image as landmarks.
+        See :func:`menpodetect.detect.detect`.
+    timings : `dict`, optional
+        If given, the time in seconds spent in the ``proposal`` and
+        ``verification`` stages, and in ``total``, is stored in this dict,
+        along with the number of proposals as ``n_proposals``.
+    kwargs : `dict`, optional
+        Passed through to the detector for both stages.
+
+    Returns
+    -------
+    bounding_boxes : :map:`Detections`
+        The verified detections.
+
+    Raises
+    ------
+    ValueError
+        If ``proposal_scale`` is not in ``(0, 1]``, or if ``image_diagonal``,
+        ``regions`` or ``expected_min_object_size`` are given.
+
+    Examples
+    --------
+    >>> detector = load_dlib_frontal_face_detector()
+    >>> timings = {}
+    >>> bounding_boxes = detect_coarse_to_fine(detector, image,
+    ...                                        proposal_scale=0.2,
+    ...                                        timings=timings)
+    >>> timings
+    {'n_proposals': 1, 'proposal': 0.05, 'verification': 0.04, 'total': 0.09}
+    """
+    _check_attach(attach)
+    if not 0 < proposal_scale <= 1:
+        raise ValueError(
+            "proposal_scale must be in (0, 1], got {}".format(proposal_scale)
+        )
+    for argument in ("image_diagonal", "regions", "expected_min_object_size"):
+        if kwargs.get(argument) is not None:
+            raise ValueError(
+                "{} is not supported for coarse to fine detection".format(argument)
+            )
+    original = image.image if isinstance(image, PreprocessedImage) else image
+
+    start = time.perf_counter()
+    proposals = detector(
+        image,
+        image_diagonal=original.diagonal() * proposal_scale,
+        attach=None,
+        **kwargs
+    )
+    proposed = time.perf_counter()
+    if not isinstance(proposals, Detections):
+        proposals = Detections.from_pointgraphs(proposals)
+    if len(proposals) > 0:
+        detections = detector(
+            image, regions=_enlarge(proposals.boxes, crop_margin), attach=None, **kwargs
+        )
+    else:
+        detections = Detections(np.zeros((0, 4)))
+    verified = time.perf_counter()
+
+    if timings is not None:
+        timings["n_proposals"] = len(proposals)
+        timings["proposal"] = proposed - start
+        timings["verification"] = verified - proposed
+        timings["total"] = verified - start
+    _attach_landmarks(original, detections, group_prefix, attach=attach)
+    return detections
@@ -1,6 +1,64 @@
 from __future__ import division
+from contextlib import contextmanager
+from functools import partial
+import inspect
+import threading
+
 import numpy as np
-from menpo.transform import UniformScale
+
+from menpodetect.detections import Detections
+from menpodetect.nms import pointgraphs_to_boxes
+from menpodetect.profiling import _start_profile
+
+
+class _per_thread_model(object):
+    r"""
+    A utility that hands out a private copy of a native detector model to
+    each thread that uses it.
+
+    Neither the dlib nor the opencv detectors are safe to call concurrently
+    (both store per-image state inside the model), but both release the GIL
+    whilst detecting. Therefore, each concurrent call is given its own copy
+    of the model. Copies are returned to a free list once the call is
+    complete, so that they outlive the threads that created them: copies are
+    only made when more calls are running at once than ever before, rather
+    than for every new thread (such as those of each new pool). If the model
+    cannot be copied, calls are serialised instead.
+
+    Parameters
+    ----------
+    model : `object`
+        The native model, which is the first to be handed out.
+    clone : `callable`, optional
+        A callable that takes no arguments and returns a fresh copy of the
+        model. If ``None``, concurrent calls are serialised with a lock.
+    """
+
+    def __init__(self, model, clone=None):
+        self.model = model
+        self._clone = clone
+        self._free = [model]
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self):
+        r"""
+        Context manager that yields a model that is not in use by any other
+        thread.
+        """
+        if self._clone is None:
+            with self._lock:
+                yield self.model
+            return
+        with self._lock:
+            model = self._free.pop() if self._free else None
+        if model is None:
+            model = self._clone()
+        try:
+            yield model
+        finally:
+            with self._lock:
+                self._free.append(model)
 
 
 def _greyscale(image):
@@ -30,9 +88,145 @@ def _greyscale(image):
     return image
 
 
-def menpo_image_to_uint8(image, channels_at_back=True):
+# The CCIR 601 luminosity coefficients, exactly as used by menpo's
+# Image.as_greyscale(mode="luminosity")
+_luminosity_coefficients = np.linalg.inv(
+    np.array([[1.0, 0.956, 0.621], [1.0, -0.272, -0.647], [1.0, -1.106, 1.703]])
+)[0, :]
+
+
+def _area_resize_matrix(n_in, n_out, scale_factor):
+    r"""
+    A sparse ``(n_out, n_in)`` matrix that resamples a signal of length ``n_in``
+    to length ``n_out`` using area interpolation. Output sample ``i`` covers
+    the input interval ``[i / scale_factor, (i + 1) / scale_factor)`` and is
+    the average of the input samples weighted by how much of them it covers.
+    """
+    from scipy.sparse import csr_matrix
+
+    starts = np.arange(n_out) / scale_factor
+    ends = np.minimum(starts + 1.0 / scale_factor, n_in)
+    max_support = int(np.ceil(1.0 / scale_factor)) + 1
+    rows = np.repeat(np.arange(n_out)[:, None], max_support, axis=1)
+    cols = np.floor(starts).astype(np.int64)[:, None] + np.arange(max_support)
+    weights = np.minimum(ends[:, None], cols + 1) - np.maximum(starts[:, None], cols)
+    valid = (cols < n_in) & (weights > 0)
+    weights = np.where(valid, weights, 0)
+    weights /= weights.sum(axis=1, keepdims=True)
+    return csr_matrix((weights[valid], (rows[valid], cols[valid])), shape=(n_out, n_in))
+
+
+def fused_image_to_uint8(
+    image, greyscale=True, scale_factor=None, channels_at_back=True
+):
+    r"""
+    Convert an image to greyscale, rescale it and convert it to a uint8 array
+    in a single pass.
+
+    This is equivalent to calling :func:`menpo.image.Image.as_greyscale`,
+    :func:`menpo.image.Image.rescale` and then :func:`menpo_image_to_uint8`,
+    but the colour conversion is folded into the rescaling and no full
+    resolution intermediate images are allocated. Rescaling uses area
+    interpolation, which is the most accurate choice for downscaling.
+
+    Parameters
+    ----------
+    image : `menpo.image.Image`
+        The image to convert. May be floating point or uint8.
+    greyscale : `bool`, optional
+        Convert the image to greyscale or not. RGB images use the luminosity
+        of the image and other multi-channel images use the average of the
+        channels.
+    scale_factor : `float`, optional
+        The amount to rescale the image by. If ``None``, the image is not
+        rescaled.
+    channels_at_back : `bool`, optional
+        If ``True``, the image channels are placed onto the last axis (the back)
+        as is common in many imaging packages. This is contrary to the Menpo
+        default where channels are the first axis (at the front).
+
+    Returns
+    -------
+    uint8_image : `ndarray`
+        C-contiguous `uint8` Numpy array, channels as the back (last) axis if
+        ``channels_at_back == True``. Greyscale images have no channel axis.
+        If the image is already uint8 and nothing needs to be computed, this
+        is a view of the image pixels where possible.
+    """
+    pixels = image.pixels
+    if pixels.ndim != 3:
+        raise ValueError("Only 2D images are supported")
+    n_channels, height, width = pixels.shape
+    if (
+        scale_factor is None
+        and pixels.dtype == np.uint8
+        and (n_channels == 1 or not greyscale)
+    ):
+        # Nothing to compute, so avoid copying the pixels at all
+        return menpo_image_to_uint8(
+            image, channels_at_back=channels_at_back, contiguous=True
+        )
+
+    # Each output channel is a linear combination of the input channels
+    if greyscale and n_channels == 3:
+        channel_weights = _luminosity_coefficients[None, :]
+    elif greyscale and n_channels != 1:
+        channel_weights = np.full((1, n_channels), 1.0 / n_channels)
+    else:
+        channel_weights = np.eye(n_channels)
+    n_out_channels = channel_weights.shape[0]
+
+    if scale_factor is None:
+        out_height, out_width = height, width
+    else:
+        out_height = int(np.ceil(height * scale_factor))
+        out_width = int(np.ceil(width * scale_factor))
+        resize_rows = _area_resize_matrix(height, out_height, scale_factor)
+        resize_cols = _area_resize_matrix(width, out_width, scale_factor)
+
+    max_range = 1.0 if pixels.dtype == np.uint8 else 255.0
+    if n_out_channels == 1:
+        uint8_im = np.empty((out_height, out_width), dtype=np.uint8)
+    elif channels_at_back:
+        uint8_im = np.empty((out_height, out_width, n_out_channels), dtype=np.uint8)
+    else:
+        uint8_im = np.empty((n_out_channels, out_height, out_width), dtype=np.uint8)
+
+    for k in range(n_out_channels):
+        # Resize the rows first (which is linear, so commutes with the channel
+        # combination) so that the only intermediate is (out_height, width)
+        plane = None
+        for c in np.flatnonzero(channel_weights[k]):
+            if scale_factor is None:
+                contribution = pixels[c] * channel_weights[k, c]
+            else:
+                contribution = resize_rows.dot(pixels[c])
+                contribution *= channel_weights[k, c]
+            if plane is None:
+                plane = contribution
+            else:
+                plane += contribution
+        if scale_factor is not None:
+            plane = resize_cols.dot(plane.T).T
+        plane *= max_range
+        np.clip(plane, 0, 255, out=plane)
+        if n_out_channels == 1:
+            uint8_im[...] = plane
+        elif channels_at_back:
+            uint8_im[..., k] = plane
+        else:
+            uint8_im[k] = plane
+    return uint8_im
+
+
+def menpo_image_to_uint8(image, channels_at_back=True, contiguous=False):
     r"""
-    Return the given image as a uint8 array. This is a copy of the image.
+    Return the given image as a uint8 array.
+
+    If the image is already uint8 (for example, it was imported with
+    ``normalize=False``) then no copy is made and a view of the image pixels
+    is returned whenever possible. Otherwise, the result is a copy of the
+    image.
 
     Parameters
     ----------
@@ -43,14 +237,27 @@ def menpo_image_to_uint8(image, channels_at_back=True):
         If ``True``, the image channels are placed onto the last axis (the back)
         as is common in many imaging packages. This is contrary to the Menpo
         default where channels are the first axis (at the front).
+    contiguous : `bool`, optional
+        If ``True``, the returned array is guaranteed to be C-contiguous. This
+        forces a copy for multi-channel uint8 images with the channels at
+        the back, so should only be requested if the consumer requires it.
 
     Returns
     -------
     uint8_image : `ndarray`
         `uint8` Numpy array, channels as the back (last) axis if
-        ``channels_at_back == True``.
+        ``channels_at_back == True``. May be a view of the image pixels.
     """
-    if channels_at_back:
+    pixels = image.pixels
+    if pixels.dtype == np.uint8:
+        # Zero copy path - greyscale images are simply the first channel
+        if pixels.shape[0] == 1:
+            uint8_im = pixels[0]
+        elif channels_at_back:
+            uint8_im = np.moveaxis(pixels, 0, -1)
+        else:
+            uint8_im = pixels
+    elif channels_at_back:
         uint8_im = image.pixels_with_channels_at_back(out_dtype=np.uint8)
         # Handle the dead axis on greyscale images
         if uint8_im.ndim == 3 and uint8_im.shape[-1] == 1:
@@ -58,13 +265,316 @@ def menpo_image_to_uint8(image, channels_at_back=True):
     else:
         from menpo.image.base import denormalize_pixels_range
 
-        uint8_im = denormalize_pixels_range(image.pixels, np.uint8)
+        uint8_im = denormalize_pixels_range(pixels, np.uint8)
         # Handle the dead axis on greyscale images
         if uint8_im.ndim == 3 and uint8_im.shape[0] == 1:
             uint8_im = uint8_im[0]
+    if contiguous:
+        uint8_im = np.ascontiguousarray(uint8_im)
     return uint8_im
 
 
+def _scale_factor(image, image_diagonal):
+    r"""
+    The factor that rescales the image to the given diagonal, or ``None`` if
+    no diagonal is given.
+    """
+    if image_diagonal is None:
+        return None
+    return image_diagonal / image.diagonal()
+
+
+def _object_size_image_diagonal(
+    image, image_diagonal, expected_min_object_size, window_shape
+):
+    r"""
+    The image diagonal that downscales the image as far as possible whilst
+    keeping objects of ``expected_min_object_size`` at least as large as the
+    ``(height, width)`` detection window. If ``expected_min_object_size`` is
+    ``None``, the given ``image_diagonal`` is returned. Objects smaller than
+    the window are not upscaled, so ``None`` is returned in that case.
+    """
+    if expected_min_object_size is None:
+        return image_diagonal
+    if image_diagonal is not None:
+        raise ValueError(
+            "Only one of image_diagonal and expected_min_object_size may be given"
+        )
+    if window_shape is None:
+        raise ValueError(
+            "The detection window of this detector is unknown, so "
+            "expected_min_object_size cannot be used"
+        )
+    object_shape = np.broadcast_to(expected_min_object_size, (2,))
+    scale_factor = np.max(np.asarray(window_shape, dtype=float) / object_shape)
+    if scale_factor >= 1:
+        return None
+    if isinstance(image, PreprocessedImage):
+        image = image.image
+    return image.diagonal() * scale_factor
+
+
+def _preprocess(
+    image, greyscale, scale_factor, channels_at_back, preprocessing, profile=None
+):
+    r"""
+    Prepare the image for detection, as described by :func:`detect`. If a
+    profile is given, the time taken by each stage is recorded.
+    """
+    if preprocessing == "fused":
+        uint8_image = fused_image_to_uint8(
+            image,
+            greyscale=greyscale,
+            scale_factor=scale_factor,
+            channels_at_back=channels_at_back,
+        )
+        if profile is not None:
+            profile.mark("preprocess")
+        return uint8_image
+    elif preprocessing == "reference":
+        if greyscale:
+            image = _greyscale(image)
+            if profile is not None:
+                profile.mark("greyscale")
+        if scale_factor is not None:
+            image = image.rescale(scale_factor)
+            if profile is not None:
+                profile.mark("rescale")
+        uint8_image = menpo_image_to_uint8(image, channels_at_back=channels_at_back)
+        if profile is not None:
+            profile.mark("to_uint8")
+        return uint8_image
+    else:
+        raise ValueError(
+            "preprocessing must be one of {{reference, fused}}, "
+            "got {}".format(preprocessing)
+        )
+
+
+class PreprocessedImage(object):
+    r"""
+    A Menpo image that caches the buffers prepared for detection, so that
+    several detectors can be run on the same image without repeating the
+    greyscale conversion, rescaling and uint8 conversion.
+
+    A preprocessed image can be passed to :func:`detect` (and therefore any
+    detector) in place of a Menpo image. Each distinct combination of
+    preprocessing parameters is computed once, on first use, and then reused
+    by every detector. The detections are attached to the wrapped image.
+
+    The buffers are held until :meth:`clear` is called, or the ``with`` block
+    exits when used as a context manager.
+
+    Parameters
+    ----------
+    image : `menpo.image.Image`
+        The image to detect.
+
+    Examples
+    --------
+    >>> with PreprocessedImage(image) as preprocessed:
+    ...     frontal = load_opencv_frontal_face_detector()(preprocessed)
+    ...     profile = load_opencv_profile_face_detector()(preprocessed)
+    """
+
+    def __init__(self, image):
+        self.image = image
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    @property
+    def landmarks(self):
+        r"""
+        The landmarks of the wrapped image.
+
+        :type: `menpo.landmark.LandmarkManager`
+        """
+        return self.image.landmarks
+
+    @property
+    def n_cached(self):
+        r"""
+        The number of buffers currently cached.
+
+        :type: `int`
+        """
+        return len(self._buffers)
+
+    def uint8_pixels(
+        self,
+        greyscale=True,
+        image_diagonal=None,
+        channels_at_back=True,
+        preprocessing="reference",
+    ):
+        r"""
+        The image prepared for detection, computed on first request.
+
+        Parameters
+        ----------
+        greyscale : `bool`, optional
+            Convert the image to greyscale or not.
+        image_diagonal : `int`, optional
+            The total size of the diagonal of the image that should be used
+            for detection.
+        channels_at_back : `bool`, optional
+            If ``True``, the image channels are placed onto the last axis.
+        preprocessing : ``{reference, fused}``, optional
+            How the image is prepared for the detector.
+
+        Returns
+        -------
+        uint8_image : `ndarray`
+            The `uint8` buffer. Shared with all other callers, so must not be
+            modified.
+        scale_factor : `float` or ``None``
+            The factor the image was rescaled by, if any.
+        """
+        # Greyscale conversion is a no-op for single channel images
+        greyscale = greyscale and self.image.n_channels != 1
+        key = (greyscale, image_diagonal, channels_at_back, preprocessing)
+        with self._lock:
+            if key not in self._buffers:
+                scale_factor = _scale_factor(self.image, image_diagonal)
+                uint8_image = _preprocess(
+                    self.image,
+                    greyscale=greyscale,
+                    scale_factor=scale_factor,
+                    channels_at_back=channels_at_back,
+                    preprocessing=preprocessing,
+                )
+                self._buffers[key] = (uint8_image, scale_factor)
+            return self._buffers[key]
+
+    def _share(self, image):
+        r"""
+        A preprocessed version of another image with identical pixels (such as
+        a view of this image) that shares this cache.
+        """
+        shared = PreprocessedImage(image)
+        shared._buffers = self._buffers
+        shared._lock = self._lock
+        return shared
+
+    def clear(self):
+        r"""
+        Evict all of the cached buffers.
+        """
+        with self._lock:
+            self._buffers.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.clear()
+
+
+def _check_attach(attach):
+    if attach not in ("per_box", "combined", None):
+        raise ValueError(
+            "attach must be one of {{per_box, combined, None}}, "
+            "got {}".format(attach)
+        )
+
+
+def _accepts_attach(detector):
+    r"""
+    Whether the detector takes an ``attach`` argument (as :map:`DlibDetector`
+    and :map:`OpenCVDetector` do), so that it can be told not to attach its
+    detections to the image.
+    """
+    try:
+        return "attach" in inspect.signature(detector).parameters
+    except (TypeError, ValueError):
+        # The signature of some builtins cannot be inspected
+        return False
+
+
+def _attach_landmarks(image, detections, group_prefix, attach="per_box"):
+    r"""
+    Attach the detections to the image as landmarks, as described by
+    :func:`detect`.
+    """
+    _check_attach(attach)
+    if attach == "per_box":
+        padding_magnitude = len(str(len(detections)))
+        for i, pc in enumerate(detections):
+            key = "{prefix}_{num:0{mag}d}".format(
+                mag=padding_magnitude, prefix=group_prefix, num=i
+            )
+            image.landmarks[key] = pc
+    elif attach == "combined":
+        if len(detections) > 0:
+            image.landmarks[group_prefix] = detections.combined_pointgraph()
+
+
+def _region_boxes(regions):
+    r"""
+    The regions as a ``(n_regions, 4)`` array of
+    ``[min_y, min_x, max_y, max_x]``.
+    """
+    if isinstance(regions, Detections):
+        return regions.boxes.copy()
+    if len(regions) > 0 and hasattr(regions[0], "bounds"):
+        return pointgraphs_to_boxes(regions)
+    return np.array(regions, dtype=float).reshape(-1, 4)
+
+
+def _merge_regions(regions, shape):
+    r"""
+    Snap the regions to integer pixels within an image of the given shape,
+    and replace any regions that overlap with their bounding region, so that
+    no pixel is covered twice. Empty regions are removed.
+    """
+    regions = np.concatenate(
+        [np.floor(regions[:, :2]), np.ceil(regions[:, 2:])], axis=1
+    ).astype(int)
+    regions = np.clip(regions, 0, np.tile(shape, 2))
+    regions = regions[np.all(regions[:, 2:] > regions[:, :2], axis=1)]
+    merged = True
+    while merged:
+        merged = False
+        min_corner = np.maximum(regions[:, None, :2], regions[None, :, :2])
+        max_corner = np.minimum(regions[:, None, 2:], regions[None, :, 2:])
+        overlaps = np.all(max_corner > min_corner, axis=-1)
+        np.fill_diagonal(overlaps, False)
+        if overlaps.any():
+            i, j = np.argwhere(overlaps)[0]
+            union = np.concatenate(
+                [
+                    np.minimum(regions[i, :2], regions[j, :2]),
+                    np.maximum(regions[i, 2:], regions[j, 2:]),
+                ]
+            )
+            regions = np.vstack([np.delete(regions, [i, j], axis=0), union])
+            merged = True
+    return regions
+
+
+def _detect_regions(detector_callable, uint8_image, regions, channels_at_back):
+    r"""
+    Run the detector on views of the uint8 buffer for each region, returning
+    the detections in the coordinates of the whole buffer.
+    """
+    spatial = 1 if uint8_image.ndim == 3 and not channels_at_back else 0
+    shape = np.array(uint8_image.shape[spatial : spatial + 2])
+    detections = []
+    for min_y, min_x, max_y, max_x in _merge_regions(regions, shape):
+        index = (slice(None),) * spatial + (slice(min_y, max_y), slice(min_x, max_x))
+        d = detector_callable(uint8_image[index])
+        if not isinstance(d, Detections):
+            d = Detections.from_pointgraphs(d)
+        detections.append(
+            Detections(
+                d.boxes + [min_y, min_x, min_y, min_x],
+                scores=d.scores,
+                detector_ids=d.detector_ids,
+            )
+        )
+    return Detections.concatenate(detections)
+
+
 def detect(
     detector_callable,
     image,
@@ -72,6 +582,9 @@ def detect(
     image_diagonal=None,
     group_prefix="object",
     channels_at_back=True,
+    preprocessing="reference",
+    attach="per_box",
+    regions=None,
 ):
     r"""
     Apply the general detection framework.
@@ -83,15 +596,21 @@ def detect(
     uint8 images cannot be converted to greyscale by this framework, so must
     already be greyscale or ``greyscale=False``.
 
+    The time taken by each stage of every call can be recorded with the hooks
+    of :mod:`menpodetect.profiling`, such as :map:`DetectionStats`.
+
     Parameters
     ----------
     detector_callable : `callable` or `function`
         A callable object that will perform detection given a single parameter,
         a `uint8` numpy array with either no channels, or channels as the
-        *last* axis.
-    image : `menpo.image.Image`
+        *last* axis. It should return a :map:`Detections` or a `list` of
+        `menpo.shape.PointDirectedGraph` (in which case their bounds are used).
+    image : `menpo.image.Image` or :map:`PreprocessedImage`
         A Menpo image to detect. The bounding boxes of the detected objects
-        will be attached to this image.
+        will be attached to this image. If a :map:`PreprocessedImage` is given,
+        its cached buffers are used and the detections are attached to the
+        image it wraps.
     greyscale : `bool`, optional
         Convert the image to greyscale or not.
     image_diagonal : `int`, optional
@@ -105,33 +624,296 @@ def detect(
         If ``True``, the image channels are placed onto the last axis (the back)
         as is common in many imaging packages. This is contrary to the Menpo
         default where channels are the first axis (at the front).
+    preprocessing : ``{reference, fused}``, optional
+        How the image is prepared for the detector. ``reference`` converts
+        to greyscale, rescales and converts to uint8 as three separate
+        Menpo operations. ``fused`` performs all three in a single pass with
+        :func:`fused_image_to_uint8`, which is much faster for large images.
+    attach : ``{per_box, combined}`` or ``None``, optional
+        How the detections are attached to the image as landmarks.
+        ``per_box`` stores each detection as its own group_prefix_# group.
+        ``combined`` stores all of the detections in a single pointgraph under
+        group_prefix, which is far cheaper for many detections. ``None`` does
+        not modify the image at all.
+    regions : ``(n_regions, 4)`` `ndarray` or `list` of `menpo.shape.PointCloud`, optional
+        If given, only these regions of the image are searched. Each region is
+        either ``[min_y, min_x, max_y, max_x]`` or a shape whose bounds are
+        used, in the coordinates of the original image. Overlapping regions
+        are merged so that no pixel is searched twice, and the detector is
+        given views of the preprocessed buffer rather than copies. Only
+        objects entirely inside a region can be found.
 
     Returns
     -------
-    bounding_boxes : `list` of `menpo.shape.PointDirectedGraph`
-        A list of bounding boxes representing the detections found.
+    bounding_boxes : :map:`Detections`
+        The detections found. Behaves as a `list` of
+        `menpo.shape.PointDirectedGraph`.
+
+    Raises
+    ------
+    ValueError
+        If ``preprocessing`` is not one of ``{reference, fused}``.
+    ValueError
+        If ``attach`` is not one of ``{per_box, combined, None}``.
     """
-    d_image = image
+    _check_attach(attach)
+    profile = _start_profile(group_prefix)
+    if isinstance(image, PreprocessedImage):
+        uint8_image, scale_factor = image.uint8_pixels(
+            greyscale=greyscale,
+            image_diagonal=image_diagonal,
+            channels_at_back=channels_at_back,
+            preprocessing=preprocessing,
+        )
+        image = image.image
+        if profile is not None:
+            profile.mark("preprocess")
+    else:
+        scale_factor = _scale_factor(image, image_diagonal)
+        uint8_image = _preprocess(
+            image,
+            greyscale=greyscale,
+            scale_factor=scale_factor,
+            channels_at_back=channels_at_back,
+            preprocessing=preprocessing,
+            profile=profile,
+        )
 
-    if greyscale:
-        d_image = _greyscale(d_image)
+    if regions is not None:
+        regions = _region_boxes(regions)
+        if scale_factor is not None:
+            regions = regions * scale_factor
+        detections = _detect_regions(
+            detector_callable, uint8_image, regions, channels_at_back
+        )
+    else:
+        detections = detector_callable(uint8_image)
+        if not isinstance(detections, Detections):
+            detections = Detections.from_pointgraphs(detections)
 
-    if image_diagonal is not None:
-        scale_factor = image_diagonal / image.diagonal()
-        d_image = d_image.rescale(scale_factor)
+    if scale_factor is not None:
+        detections = detections.rescale(1 / scale_factor)
+    if profile is not None:
+        profile.mark("detect")
 
-    pcs = detector_callable(
-        menpo_image_to_uint8(d_image, channels_at_back=channels_at_back)
-    )
+    _attach_landmarks(image, detections, group_prefix, attach=attach)
+    if profile is not None:
+        profile.mark("attach")
+        profile.n_pixels = image.shape[0] * image.shape[1]
+        detector_shape = (
+            uint8_image.shape[:2] if channels_at_back else uint8_image.shape[-2:]
+        )
+        profile.n_detector_pixels = detector_shape[0] * detector_shape[1]
+        profile.n_detections = len(detections)
+        profile.finish()
+    return detections
 
-    if image_diagonal is not None:
-        s = UniformScale(1 / scale_factor, n_dims=2)
-        pcs = [s.apply(pc) for pc in pcs]
 
-    padding_magnitude = len(str(len(pcs)))
-    for i, pc in enumerate(pcs):
-        key = "{prefix}_{num:0{mag}d}".format(
-            mag=padding_magnitude, prefix=group_prefix, num=i
+class _detector_methods(object):
+    r"""
+    The methods shared by :map:`DlibDetector` and :map:`OpenCVDetector`,
+    which apply the detector (its ``__call__``) in different ways.
+
+    Subclasses set ``_group_prefix`` to their default group prefix.
+    """
+
+    _group_prefix = "object"
+
+    async def adetect(
+        self, image, group_prefix=None, attach="per_box", executor=None, **kwargs
+    ):
+        r"""
+        Perform a detection without blocking the event loop.
+
+        The preprocessing and detection run on a managed pool of threads
+        (see :func:`menpodetect.aio.set_max_workers`), so at most that many
+        detections run at once. The detections are attached to the image as
+        landmarks once they are complete.
+
+        The returned coroutine may be cancelled (for example, by
+        ``asyncio.wait_for``). A detection that has not yet started never
+        runs. A detection that is already running finishes in the
+        background, but its result is discarded and the image is not
+        modified.
+
+        Parameters
+        ----------
+        image : `menpo.image.Image` or :map:`PreprocessedImage`
+            A Menpo image to detect. The bounding boxes of the detected objects
+            will be attached to this image.
+        group_prefix : `str`, optional
+            The prefix string to be appended to each each landmark group that
+            is stored on the image. Each detection will be stored as
+            group_prefix_# where # is a count starting from 0. If ``None``,
+            the default of the detector (e.g. ``dlib``) is used.
+        attach : ``{per_box, combined}`` or ``None``, optional
+            How the detections are attached to the image as landmarks.
+            See :func:`menpodetect.detect.detect`.
+        executor : `concurrent.futures.Executor`, optional
+            The executor to run the detection on, instead of the managed pool
+            of threads.
+        kwargs : `dict`, optional
+            Passed through to :meth:`__call__`.
+
+        Returns
+        ------
+        bounding_boxes : :map:`Detections`
+            The detected objects.
+        """
+        # These modules import this one, so are imported on first use
+        from menpodetect.aio import _adetect
+
+        if group_prefix is None:
+            group_prefix = self._group_prefix
+        return await _adetect(
+            partial(self, group_prefix=group_prefix, **kwargs),
+            image,
+            group_prefix,
+            attach,
+            executor,
+        )
+
+    def detect_batch(self, images, n_workers=None, **kwargs):
+        r"""
+        Perform detection on a batch of images using a pool of threads.
+
+        The detections will also be attached to each image as landmarks.
+
+        Parameters
+        ----------
+        images : `iterable` of `menpo.image.Image`
+            The Menpo images to detect.
+        n_workers : `int` > 0, optional
+            The number of threads to use. If ``None``, one thread per core is
+            used.
+        kwargs : `dict`, optional
+            Passed through to :meth:`__call__` for every image.
+
+        Returns
+        ------
+        bounding_boxes : `list` of :map:`Detections`
+            The detected objects for each image, in the order of ``images``.
+        """
+        from menpodetect.batch import detect_batch
+
+        return detect_batch(self, images, n_workers=n_workers, **kwargs)
+
+    def detect_tiled(
+        self,
+        image,
+        tile_shape=(1024, 1024),
+        overlap=128,
+        n_workers=1,
+        group_prefix=None,
+        attach="per_box",
+        **kwargs
+    ):
+        r"""
+        Perform detection on a very large image one overlapping tile at a
+        time, so that memory use is proportional to the tile size.
+
+        The detections will also be attached to the image as landmarks.
+
+        Parameters
+        ----------
+        image : `menpo.image.Image` or ``(n_channels, height, width)`` `ndarray`
+            The image to detect, or its pixels (e.g. a `numpy.memmap`).
+        tile_shape : `tuple` of 2 `int`, optional
+            The ``(height, width)`` of each tile.
+        overlap : `int`, optional
+            The number of pixels shared by neighbouring tiles. This should be
+            at least the size of the largest object to be detected.
+        n_workers : `int` > 0, optional
+            The number of threads used to detect tiles concurrently. If
+            ``None``, one thread per core is used.
+        group_prefix : `str`, optional
+            The prefix string to be appended to each each landmark group that
+            is stored on the image. Each detection will be stored as
+            group_prefix_# where # is a count starting from 0. If ``None``,
+            the default of the detector (e.g. ``dlib``) is used.
+        attach : ``{per_box, combined}`` or ``None``, optional
+            How the detections are attached to the image as landmarks.
+            See :func:`menpodetect.detect.detect`.
+        kwargs : `dict`, optional
+            Passed through to :meth:`__call__` for every tile.
+
+        Returns
+        ------
+        bounding_boxes : :map:`Detections`
+            The detected objects, in the coordinates of the whole image.
+        """
+        from menpodetect.tiled import detect_tiled
+
+        if group_prefix is None:
+            group_prefix = self._group_prefix
+        return detect_tiled(
+            self,
+            image,
+            tile_shape=tile_shape,
+            overlap=overlap,
+            n_workers=n_workers,
+            group_prefix=group_prefix,
+            attach=attach,
+            **kwargs
+        )
+
+    def detect_coarse_to_fine(
+        self,
+        image,
+        proposal_scale=0.25,
+        crop_margin=0.5,
+        group_prefix=None,
+        attach="per_box",
+        timings=None,
+        **kwargs
+    ):
+        r"""
+        Perform a detection on a heavily downscaled image to propose
+        candidates, and then verify them within full resolution crops.
+
+        The detections will also be attached to the image as landmarks.
+
+        Parameters
+        ----------
+        image : `menpo.image.Image` or :map:`PreprocessedImage`
+            A Menpo image to detect. The bounding boxes of the detected objects
+            will be attached to this image.
+        proposal_scale : `float`, optional
+            The scale (in ``(0, 1]``) of the image that the proposal pass is
+            run on.
+        crop_margin : `float`, optional
+            Each proposal is verified within a full resolution crop, enlarged
+            by this fraction of the proposal size on every side.
+        group_prefix : `str`, optional
+            The prefix string to be appended to each each landmark group that
+            is stored on the image. Each detection will be stored as
+            group_prefix_# where # is a count starting from 0. If ``None``,
+            the default of the detector (e.g. ``dlib``) is used.
+        attach : ``{per_box, combined}`` or ``None``, optional
+            How the detections are attached to the image as landmarks.
+            See :func:`menpodetect.detect.detect`.
+        timings : `dict`, optional
+            If given, it is filled with the time in seconds spent in each
+            stage. See :func:`menpodetect.coarse_to_fine.detect_coarse_to_fine`.
+        kwargs : `dict`, optional
+            Passed through to :meth:`__call__` for both stages.
+
+        Returns
+        ------
+        bounding_boxes : :map:`Detections`
+            The verified detections.
+        """
+        from menpodetect.coarse_to_fine import detect_coarse_to_fine
+
+        if group_prefix is None:
+            group_prefix = self._group_prefix
+        return detect_coarse_to_fine(
+            self,
+            image,
+            proposal_scale=proposal_scale,
+            crop_margin=crop_margin,
+            group_prefix=group_prefix,
+            attach=attach,
+            timings=timings,
+            **kwargs
         )
-        image.landmarks[key] = pc
-    return pcs
@@ -0,0 +1,210 @@
+from collections.abc import Sequence
+
+import numpy as np
+from menpo.shape import PointDirectedGraph, bounding_box
+
+from menpodetect.nms import pointgraphs_to_boxes
+
+
+class Detections(Sequence):
+    r"""
+    A compact, array backed, set of detected bounding boxes.
+
+    Rather than storing one `menpo.shape.PointDirectedGraph` per detection,
+    all the boxes are stored in a single array. Transforming the detections
+    is therefore a single vectorised operation, and the bounding box
+    pointgraphs are only built when they are accessed.
+
+    Detections behave as a sequence of `menpo.shape.PointDirectedGraph`, so
+    they can be indexed, iterated over and measured with ``len`` exactly like
+    the lists of bounding boxes returned previously. Slicing or indexing with
+    an array returns a new :map:`Detections`.
+
+    Parameters
+    ----------
+    boxes : ``(n_detections, 4)`` `ndarray`
+        The boxes as ``[min_y, min_x, max_y, max_x]`` (the Menpo axis order).
+    scores : ``(n_detections,)`` `ndarray`, optional
+        The confidence of each detection.
+    detector_ids : ``(n_detections,)`` `ndarray`, optional
+        An integer identifying the detector that found each detection.
+
+    Raises
+    ------
+    ValueError
+        If the scores or detector ids do not have one entry per box.
+    """
+
+    def __init__(self, boxes, scores=None, detector_ids=None):
+        self.boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        n_detections = self.boxes.shape[0]
+        if scores is not None:
+            scores = np.asarray(scores, dtype=float).reshape(-1)
+            if scores.shape[0] != n_detections:
+                raise ValueError(
+                    "{} scores given for {} boxes".format(scores.shape[0], n_detections)
+                )
+        if detector_ids is not None:
+            detector_ids = np.asarray(detector_ids, dtype=int).reshape(-1)
+            if detector_ids.shape[0] != n_detections:
+                raise ValueError(
+                    "{} detector ids given for {} boxes".format(
+                        detector_ids.shape[0], n_detections
+                    )
+                )
+        self.scores = scores
+        self.detector_ids = detector_ids
+
+    @classmethod
+    def from_pointgraphs(cls, pcs, scores=None, detector_ids=None):
+        r"""
+        Build detections from the bounds of a list of shapes.
+
+        Parameters
+        ----------
+        pcs : `list` of `menpo.shape.PointCloud`
+            The bounding boxes (or any 2D shapes, in which case their bounds
+            are used).
+        scores : ``(n_detections,)`` `ndarray`, optional
+            The confidence of each detection.
+        detector_ids : ``(n_detections,)`` `ndarray`, optional
+            An integer identifying the detector that found each detection.
+
+        Returns
+        -------
+        detections : :map:`Detections`
+            The detections.
+        """
+        return cls(pointgraphs_to_boxes(pcs), scores=scores, detector_ids=detector_ids)
+
+    @classmethod
+    def concatenate(cls, detections):
+        r"""
+        Concatenate several sets of detections into one.
+
+        Scores and detector ids are only kept if every set has them.
+
+        Parameters
+        ----------
+        detections : `list` of :map:`Detections`
+            The detections to concatenate.
+
+        Returns
+        -------
+        detections : :map:`Detections`
+            All the detections, in order.
+        """
+        detections = list(detections)
+        if len(detections) == 0:
+            return cls(np.zeros((0, 4)))
+        boxes = np.concatenate([d.boxes for d in detections])
+        scores = None
+        if all(d.scores is not None for d in detections):
+            scores = np.concatenate([d.scores for d in detections])
+        detector_ids = None
+        if all(d.detector_ids is not None for d in detections):
+            detector_ids = np.concatenate([d.detector_ids for d in detections])
+        return cls(boxes, scores=scores, detector_ids=detector_ids)
+
+    def __len__(self):
+        return self.boxes.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            min_y, min_x, max_y, max_x = self.boxes[index]
+            return bounding_box((min_y, min_x), (max_y, max_x))
+        return Detections(
+            self.boxes[index],
+            scores=None if self.scores is None else self.scores[index],
+            detector_ids=None
+            if self.detector_ids is None
+            else self.detector_ids[index],
+        )
+
+    def __repr__(self):
+        return "{} detections{}{}".format(
+            len(self),
+            "" if self.scores is None else " with scores",
+            "" if self.detector_ids is None else " with detector ids",
+        )
+
+    def rescale(self, scale):
+        r"""
+        Scale every box about the origin, as a single vectorised operation.
+
+        Parameters
+        ----------
+        scale : `float`
+            The amount to scale the boxes by.
+
+        Returns
+        -------
+        detections : :map:`Detections`
+            The scaled detections.
+        """
+        return Detections(
+            self.boxes * scale, scores=self.scores, detector_ids=self.detector_ids
+        )
+
+    def threshold(self, min_score):
+        r"""
+        The detections with a score of at least ``min_score``.
+
+        This allows a single detection with a permissive threshold to be
+        filtered to any operating point afterwards.
+
+        Parameters
+        ----------
+        min_score : `float`
+            The minimum score of the kept detections.
+
+        Returns
+        -------
+        detections : :map:`Detections`
+            The confident detections.
+
+        Raises
+        ------
+        ValueError
+            If the detections do not have scores.
+        """
+        if self.scores is None:
+            raise ValueError("These detections do not have scores")
+        return self[self.scores >= min_score]
+
+    def to_pointgraphs(self):
+        r"""
+        Build the bounding box of every detection.
+
+        Returns
+        -------
+        bounding_boxes : `list` of `menpo.shape.PointDirectedGraph`
+            The bounding boxes.
+        """
+        return [self[i] for i in range(len(self))]
+
+    def combined_pointgraph(self):
+        r"""
+        A single pointgraph holding the bounding box of every detection.
+
+        The boxes are stored one after another, with four points per box in
+        the same order as :func:`menpo.shape.bounding_box`.
+
+        Returns
+        -------
+        bounding_boxes : `menpo.shape.PointDirectedGraph`
+            The ``4 * n_detections`` points and edges of all the boxes.
+        """
+        min_y, min_x, max_y, max_x = self.boxes.T
+        points = np.stack(
+            [
+                np.stack([min_y, min_x], axis=1),
+                np.stack([max_y, min_x], axis=1),
+                np.stack([max_y, max_x], axis=1),
+                np.stack([min_y, max_x], axis=1),
+            ],
+            axis=1,
+        ).reshape(-1, 2)
+        edges = np.array([[0, 1], [1, 2], [2, 3], [3, 0]])
+        edges = (edges[None] + 4 * np.arange(len(self))[:, None, None]).reshape(-1, 2)
+        return PointDirectedGraph.init_from_edges(points, edges, copy=False)
@@ -4,6 +4,7 @@ from menpo.base import MenpoMissingDependencyError
 try:
     from .detect import load_dlib_frontal_face_detector, DlibDetector
     from .train import train_dlib_detector
+    from .model import save_dlib_detector, dlib_model_metadata
 except MenpoMissingDependencyError:
     pass
 
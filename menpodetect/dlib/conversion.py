@@ -1,4 +1,5 @@
 import dlib
+import numpy as np
 from menpo.shape import bounding_box
 
 
@@ -20,6 +21,26 @@ def rect_to_pointgraph(rect):
     return bounding_box((rect.top(), rect.left()), (rect.bottom(), rect.right()))
 
 
+def rects_to_boxes(rects):
+    r"""
+    Convert a list of dlib.rect to an array of boxes.
+
+    Parameters
+    ----------
+    rects : `list` of `dlib.rect`
+        The bounding boxes to convert.
+
+    Returns
+    -------
+    boxes : ``(n_boxes, 4)`` `ndarray`
+        The boxes as ``[min_y, min_x, max_y, max_x]``, the same corners as
+        :func:`rect_to_pointgraph`.
+    """
+    return np.array(
+        [(r.top(), r.left(), r.bottom(), r.right()) for r in rects], dtype=float
+    ).reshape(-1, 4)
+
+
 def pointgraph_to_rect(pg):
     r"""
     Convert a `menpo.shape.PointCloud` to a `dlib.rect`.
@@ -1,7 +1,11 @@
 from __future__ import division
+from copy import deepcopy
 from functools import partial
 from pathlib import Path
+import hashlib
+import pickle
 
+import numpy as np
 from menpo.base import MenpoMissingDependencyError
 
 try:
@@ -9,8 +13,16 @@ try:
 except ImportError:
     raise MenpoMissingDependencyError("dlib")
 
-from menpodetect.detect import detect
-from .conversion import rect_to_pointgraph
+from menpodetect.detect import (
+    detect,
+    _detector_methods,
+    _object_size_image_diagonal,
+    _per_thread_model,
+)
+from menpodetect.detections import Detections
+from menpodetect.registry import model_registry
+from .model import _load_dlib_model
+from .conversion import rects_to_boxes
 
 
 class _dlib_detect(object):
@@ -19,7 +31,7 @@ class _dlib_detect(object):
 
     This callable is important for presenting the correct parameters to the
     user. It also marshalls the return type of the detector back to
-    `menpo.shape.PointDirectedGraph`.
+    :map:`Detections`.
 
     Parameters
     ----------
@@ -39,17 +51,44 @@ class _dlib_detect(object):
             if not Path(m_path).exists():
                 raise ValueError("Model {} does not exist.".format(m_path))
             # There are two different kinds of object detector, the
-            # simple_object_detector and the fhog_object_detector, but we
-            # can't tell which is which from the file name. Therefore, try one
-            # and then the other. Unfortunately, it throws a runtime error,
-            # which we have to catch.
-            try:
-                model = dlib.simple_object_detector(str(m_path))
-            except RuntimeError:
-                model = dlib.fhog_object_detector(str(m_path))
+            # simple_object_detector and the fhog_object_detector, which can't
+            # be told apart from the file name. The model is deserialised once,
+            # using the kind recorded by save_dlib_detector if available.
+            model = _load_dlib_model(m_path)
         self._dlib_model = model
+        # The (height, width) of the sliding window, if this dlib exposes it
+        self.window_shape = None
+        if hasattr(model, "detection_window_height"):
+            self.window_shape = (
+                model.detection_window_height,
+                model.detection_window_width,
+            )
+        # Dlib detectors are not thread safe, so each thread is handed its own
+        # copy when the detector supports pickling (and thus copying)
+        clone = None
+        if hasattr(type(model), "__setstate__"):
+            clone = partial(deepcopy, model)
+        self._models = _per_thread_model(model, clone=clone)
+        self._serialised = None
 
-    def __call__(self, uint8_image, n_upscales=0):
+    def serialise(self):
+        r"""
+        The model serialised as bytes, and the hash of those bytes, which are
+        computed the first time they are needed.
+
+        Returns
+        -------
+        data : `bytes`
+            The pickled dlib model.
+        digest : `str`
+            The SHA-256 hash of ``data``.
+        """
+        if self._serialised is None:
+            data = pickle.dumps(self._dlib_model, protocol=pickle.HIGHEST_PROTOCOL)
+            self._serialised = data, hashlib.sha256(data).hexdigest()
+        return self._serialised
+
+    def __call__(self, uint8_image, n_upscales=0, adjust_threshold=0.0):
         r"""
         Perform a detection using the cached dlib detector.
 
@@ -60,29 +99,76 @@ class _dlib_detect(object):
         n_upscales : `int`, optional
             Number of times to upscale the image when performing the detection,
             may increase the chances of detecting smaller objects.
+        adjust_threshold : `float`, optional
+            Added to the detection threshold of the detector. Negative values
+            return more (less confident) detections.
 
         Returns
         ------
-        bounding_boxes : `list` of `menpo.shape.PointDirectedGraph`
-            The detected objects.
+        bounding_boxes : :map:`Detections`
+            The detected objects. The ``scores`` are the detection confidences
+            and the ``detector_ids`` are the index of the filter (for models
+            with several filters) that found each object.
         """
         # Dlib doesn't handle the dead last axis
         if uint8_image.shape[-1] == 1:
             uint8_image = uint8_image[..., 0]
-        rects = self._dlib_model(uint8_image, n_upscales)
-        return [rect_to_pointgraph(r) for r in rects]
+        # Dlib requires C-contiguous memory (a no-op if it already is)
+        uint8_image = np.ascontiguousarray(uint8_image)
+        with self._models.acquire() as model:
+            if hasattr(model, "run"):
+                rects, scores, filter_ids = model.run(
+                    uint8_image, n_upscales, adjust_threshold
+                )
+            else:
+                # simple_object_detector does not expose the scores directly
+                rects, scores, filter_ids = dlib.fhog_object_detector.run_multiple(
+                    [model], uint8_image, n_upscales, adjust_threshold
+                )
+        return Detections(rects_to_boxes(rects), scores=scores, detector_ids=filter_ids)
 
 
-class DlibDetector(object):
+def _deserialise_dlib_detect(data):
+    r"""
+    Rebuild a cached dlib detector from the bytes returned by
+    :meth:`_dlib_detect.serialise`.
+    """
+    return _dlib_detect(pickle.loads(data))
+
+
+class DlibDetector(_detector_methods):
     r"""
     A generic dlib detector.
 
     Wraps a dlib object detector inside the menpodetect framework and provides
     a clean interface to expose the dlib arguments.
+
+    Models given as a path are loaded through
+    :data:`menpodetect.registry.model_registry`, so constructing a detector
+    from the same model file again does not reload the model.
+
+    Detectors can be pickled (for example, to send them to worker
+    processes). The model is serialised once, and a process that unpickles
+    the same model several times only deserialises it the first time.
     """
 
+    _group_prefix = "dlib"
+
     def __init__(self, model):
-        self._detector = _dlib_detect(model)
+        if isinstance(model, (str, Path)) and Path(model).exists():
+            # Models loaded from disk are cached and shared between detectors
+            self._detector = model_registry.get(model, _dlib_detect)
+        else:
+            self._detector = _dlib_detect(model)
+
+    def __getstate__(self):
+        data, digest = self._detector.serialise()
+        return {"model": data, "sha256": digest}
+
+    def __setstate__(self, state):
+        self._detector = model_registry.get_serialised(
+            state["sha256"], state["model"], _deserialise_dlib_detect
+        )
 
     def __call__(
         self,
@@ -91,6 +177,11 @@ class DlibDetector(object):
         image_diagonal=None,
         group_prefix="dlib",
         n_upscales=0,
+        adjust_threshold=0.0,
+        preprocessing="reference",
+        attach="per_box",
+        regions=None,
+        expected_min_object_size=None,
     ):
         r"""
         Perform a detection using the cached dlib detector.
@@ -99,9 +190,10 @@ class DlibDetector(object):
 
         Parameters
         ----------
-        image : `menpo.image.Image`
+        image : `menpo.image.Image` or :map:`PreprocessedImage`
             A Menpo image to detect. The bounding boxes of the detected objects
-            will be attached to this image.
+            will be attached to this image. A :map:`PreprocessedImage` allows
+            several detectors to share the same preprocessing.
         greyscale : `bool`, optional
             Convert the image to greyscale or not.
         image_diagonal : `int`, optional
@@ -115,20 +207,89 @@ class DlibDetector(object):
         n_upscales : `int`, optional
             Number of times to upscale the image when performing the detection,
             may increase the chances of detecting smaller objects.
+        adjust_threshold : `float`, optional
+            Added to the detection threshold of the detector. Negative values
+            return more (less confident) detections, which can then be
+            filtered by their ``scores`` with :meth:`Detections.threshold`.
+        preprocessing : ``{reference, fused}``, optional
+            How the image is prepared for the detector. ``fused`` performs the
+            greyscale conversion, rescaling and uint8 conversion in a single
+            pass, which is much faster for large images. See
+            :func:`menpodetect.detect.detect`.
+        attach : ``{per_box, combined}`` or ``None``, optional
+            How the detections are attached to the image as landmarks.
+            ``per_box`` stores each detection as its own group_prefix_# group,
+            ``combined`` stores them all in a single group_prefix group and
+            ``None`` leaves the image untouched.
+        regions : ``(n_regions, 4)`` `ndarray` or `list` of `menpo.shape.PointCloud`, optional
+            If given, only these regions of the image are searched, as
+            ``[min_y, min_x, max_y, max_x]`` boxes or shapes in the
+            coordinates of the original image. Overlapping regions are merged.
+            See :func:`menpodetect.detect.detect`.
+        expected_min_object_size : `int` or `tuple` of 2 `int`, optional
+            The size (or ``(height, width)``) in pixels of the smallest object
+            that should be found in the original image. If given, the image is
+            downscaled as far as possible whilst objects of this size remain at
+            least as large as the detection window (after ``n_upscales``
+            upscales), which can be much faster for large images. Cannot be
+            combined with ``image_diagonal``.
 
         Returns
         ------
-        bounding_boxes : `list` of `menpo.shape.PointDirectedGraph`
+        bounding_boxes : :map:`Detections`
             The detected objects.
+
+        Raises
+        ------
+        ValueError
+            If both ``image_diagonal`` and ``expected_min_object_size`` are
+            given, or the detection window of the model is unknown.
         """
-        detect_partial = partial(self._detector, n_upscales=n_upscales)
+        detect_partial = partial(
+            self._detector, n_upscales=n_upscales, adjust_threshold=adjust_threshold
+        )
         return detect(
             detect_partial,
             image,
-            greyscale=greyscale,
-            image_diagonal=image_diagonal,
             group_prefix=group_prefix,
+            attach=attach,
+            regions=regions,
+            **self._preprocess_args(
+                image,
+                greyscale=greyscale,
+                image_diagonal=image_diagonal,
+                n_upscales=n_upscales,
+                preprocessing=preprocessing,
+                expected_min_object_size=expected_min_object_size,
+            )
+        )
+
+    def _preprocess_args(
+        self,
+        image,
+        greyscale=False,
+        image_diagonal=None,
+        n_upscales=0,
+        preprocessing="reference",
+        expected_min_object_size=None,
+        **kwargs
+    ):
+        r"""
+        The arguments with which :func:`menpodetect.detect.detect` prepares
+        the image for this detector, given the arguments of :meth:`__call__`
+        (any others are ignored).
+        """
+        window_shape = self._detector.window_shape
+        if window_shape is not None:
+            window_shape = np.asarray(window_shape) / 2**n_upscales
+        image_diagonal = _object_size_image_diagonal(
+            image, image_diagonal, expected_min_object_size, window_shape
         )
+        return {
+            "greyscale": greyscale,
+            "image_diagonal": image_diagonal,
+            "preprocessing": preprocessing,
+        }
 
 
 def load_dlib_frontal_face_detector():
@@ -0,0 +1,165 @@
+import json
+from pathlib import Path
+
+from menpo.base import MenpoMissingDependencyError
+
+try:
+    import dlib
+except ImportError:
+    raise MenpoMissingDependencyError("dlib")
+
+
+# The number of bytes that is certainly enough to hold the header of a
+# serialised dlib object detector
+_HEADER_SIZE = 256
+_KINDS = ("simple_object_detector", "fhog_object_detector")
+
+
+def _sidecar_path(path):
+    return Path(str(path) + ".json")
+
+
+def _read_dlib_ints(data, n_ints):
+    r"""
+    Decode the first ``n_ints`` integers serialised by dlib. Each integer is
+    stored as a control byte (the number of bytes, with the high bit set if
+    the integer is negative) followed by the little endian magnitude.
+    """
+    ints = []
+    i = 0
+    for _ in range(n_ints):
+        control = data[i]
+        n_bytes = control & 0x0F
+        value = int.from_bytes(data[i + 1 : i + 1 + n_bytes], "little")
+        ints.append(-value if control & 0x80 else value)
+        i += 1 + n_bytes
+    return ints
+
+
+def _sniff_header(path):
+    r"""
+    Read the window size and number of filters from the header of a
+    serialised dlib fhog object detector, without loading the model.
+    """
+    with open(str(path), "rb") as f:
+        header = f.read(_HEADER_SIZE)
+    try:
+        ints = _read_dlib_ints(header, 19)
+    except IndexError:
+        ints = []
+    # The object detector and scan_fhog_pyramid serialisation versions
+    if ints[:2] != [2, 1]:
+        raise ValueError("{} is not a recognised dlib object detector".format(path))
+    # The scanner stores its window width and height after the feature
+    # extractor, cell size and padding. The number of filters follows the
+    # rest of the scanner configuration and the box overlap tester.
+    return {
+        "detection_window_width": ints[6],
+        "detection_window_height": ints[7],
+        "num_detectors": ints[18],
+    }
+
+
+def _read_sidecar(path):
+    r"""
+    The metadata written alongside the model by :func:`save_dlib_detector`,
+    or ``None`` if there is none or it describes a different file.
+    """
+    sidecar = _sidecar_path(path)
+    if not sidecar.exists():
+        return None
+    with open(str(sidecar), "r") as f:
+        metadata = json.load(f)
+    if metadata.get("file_size") != Path(path).stat().st_size:
+        # The model has been replaced since the sidecar was written
+        return None
+    return metadata
+
+
+def dlib_model_metadata(path):
+    r"""
+    Describe a saved dlib object detector without loading it.
+
+    If the model was saved with :func:`save_dlib_detector`, the metadata is
+    read from the small sidecar file written alongside it. Otherwise, the
+    window size and number of filters are read from the header of the model
+    file, but the kind of model cannot be determined.
+
+    Parameters
+    ----------
+    path : `Path` or `str`
+        The path of the saved model.
+
+    Returns
+    -------
+    metadata : `dict`
+        The ``detection_window_width``, ``detection_window_height`` and
+        ``num_detectors`` (the number of filters) of the model, and its
+        ``kind`` (``simple_object_detector``, ``fhog_object_detector`` or
+        ``None`` if unknown). Simple object detectors also record their
+        ``upsampling_amount``.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a dlib object detector.
+    """
+    metadata = _read_sidecar(path)
+    if metadata is None:
+        metadata = dict(_sniff_header(path), kind=None)
+    return metadata
+
+
+def save_dlib_detector(detector, path):
+    r"""
+    Save a dlib object detector, along with a small sidecar file of metadata
+    (``path + '.json'``).
+
+    The sidecar allows the model to be loaded as the correct kind of
+    detector in a single pass, and :func:`dlib_model_metadata` to describe
+    the model without loading it.
+
+    Parameters
+    ----------
+    detector : `dlib.simple_object_detector` or `dlib.fhog_object_detector` or :map:`DlibDetector`
+        The detector to save, for example as returned by
+        :map:`train_dlib_detector`.
+    path : `Path` or `str`
+        The path to save the model to.
+
+    Raises
+    ------
+    ValueError
+        If the detector is not a dlib object detector.
+    """
+    model = getattr(getattr(detector, "_detector", None), "_dlib_model", detector)
+    kind = type(model).__name__
+    if kind not in _KINDS:
+        raise ValueError("Cannot save a {}".format(kind))
+    model.save(str(path))
+    metadata = {
+        "kind": kind,
+        "detection_window_width": model.detection_window_width,
+        "detection_window_height": model.detection_window_height,
+        "num_detectors": model.num_detectors,
+        "file_size": Path(path).stat().st_size,
+    }
+    if hasattr(model, "upsampling_amount"):
+        metadata["upsampling_amount"] = model.upsampling_amount
+    with open(str(_sidecar_path(path)), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+
+def _load_dlib_model(path):
+    r"""
+    Load a saved dlib object detector, deserialising the file exactly once.
+
+    A simple object detector is saved as an fhog object detector followed by
+    its upsampling amount, so any model can be loaded as an fhog object
+    detector. The original kind is restored if it is known from the sidecar.
+    """
+    metadata = _read_sidecar(path)
+    kind = "fhog_object_detector"
+    if metadata is not None and metadata.get("kind") in _KINDS:
+        kind = metadata["kind"]
+    return getattr(dlib, kind)(str(path))
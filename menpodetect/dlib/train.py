@@ -1,3 +1,6 @@
+import os
+
+import numpy as np
 from menpo.base import MenpoMissingDependencyError
 
 try:
@@ -9,6 +12,40 @@ from menpodetect.detect import menpo_image_to_uint8
 from .conversion import pointgraph_to_rect
 
 
+def _image_rectangles(image):
+    return [
+        pointgraph_to_rect(lgroup.bounding_box()) for lgroup in image.landmarks.values()
+    ]
+
+
+def _cache_training_images(images, cache_path):
+    r"""
+    Convert each image to uint8 and append it to the cache file, extracting
+    its rectangles in the same pass, so that only one image is held in memory
+    at a time. Returns read-only memory mapped views of the cached images and
+    the rectangles.
+    """
+    rectangles = []
+    # The (offset, shape) of each image within the cache
+    index = []
+    offset = 0
+    with open(str(cache_path), "wb") as f:
+        for im in images:
+            rectangles.append(_image_rectangles(im))
+            pixels = menpo_image_to_uint8(im, contiguous=True)
+            pixels.tofile(f)
+            index.append((offset, pixels.shape))
+            offset += pixels.nbytes
+    if offset == 0:
+        return [], rectangles
+    cache = np.memmap(str(cache_path), dtype=np.uint8, mode="r")
+    image_pixels = [
+        cache[start : start + int(np.prod(shape))].reshape(shape)
+        for start, shape in index
+    ]
+    return image_pixels, rectangles
+
+
 def train_dlib_detector(
     images,
     epsilon=0.01,
@@ -17,6 +54,7 @@ def train_dlib_detector(
     C=5,
     detection_window_size=6400,
     num_threads=None,
+    cache_path=None,
 ):
     r"""
     Train a dlib detector with the given list of images.
@@ -26,12 +64,20 @@ def train_dlib_detector(
     will have a tight bounding box extracted from it and then dlib will
     train given these images.
 
+    The images are converted to uint8 for dlib. By default, the converted
+    images are held in memory. If a ``cache_path`` is given, each image is
+    instead converted and written to a memory mapped file on disk as it is
+    iterated over, so ``images`` may be a lazy iterable (such as
+    ``mio.import_images``) and only one Menpo image is held in memory at a
+    time. Note that dlib still builds its own copy of the (uint8) images
+    whilst training.
+
     Parameters
     ----------
-    images : `list` of `menpo.image.Image`
+    images : `iterable` of `menpo.image.Image`
         The set of images to learn the detector from. Must have landmarks
         attached to **every** image, a bounding box will be extracted for each
-        landmark group.
+        landmark group. Each image is only iterated over once.
     epsilon : `float`, optional
         The stopping epsilon.  Smaller values make the trainer's solver more
         accurate but might take longer to train.
@@ -53,12 +99,16 @@ def train_dlib_detector(
     num_threads : `int` > 0 or ``None``
         How many threads to use for training. If ``None``, will query
         multiprocessing for the number of cores.
+    cache_path : `Path` or `str`, optional
+        If given, the uint8 images are cached in this file (which is
+        overwritten) rather than in memory. The file is removed once
+        training is complete.
 
     Returns
     -------
     detector : `dlib.simple_object_detector`
-        The trained detector. To save this detector, call save on the returned
-        object and pass a string path.
+        The trained detector. To save this detector, use
+        :map:`save_dlib_detector`.
 
     Examples
     --------
@@ -67,14 +117,13 @@ def train_dlib_detector(
 
     >>> images = list(mio.import_images('./images/path'))
     >>> in_memory_detector = train_dlib_detector(images, verbose_stdout=True)
-    >>> in_memory_detector.save('in_memory_detector.svm')
-    """
-    rectangles = [
-        [pointgraph_to_rect(lgroup.bounding_box()) for lgroup in im.landmarks.values()]
-        for im in images
-    ]
-    image_pixels = [menpo_image_to_uint8(im) for im in images]
+    >>> save_dlib_detector(in_memory_detector, 'in_memory_detector.svm')
 
+    Training from a large dataset, importing one image at a time:
+
+    >>> images = mio.import_images('./images/path')
+    >>> detector = train_dlib_detector(images, cache_path='/scratch/cache.bin')
+    """
     if num_threads is None:
         import multiprocessing
 
@@ -88,4 +137,20 @@ def train_dlib_detector(
     options.detection_window_size = detection_window_size
     options.num_threads = num_threads
 
-    return dlib.train_simple_object_detector(image_pixels, rectangles, options)
+    if cache_path is None:
+        rectangles = []
+        image_pixels = []
+        for im in images:
+            rectangles.append(_image_rectangles(im))
+            image_pixels.append(menpo_image_to_uint8(im, contiguous=True))
+        return dlib.train_simple_object_detector(image_pixels, rectangles, options)
+
+    try:
+        image_pixels, rectangles = _cache_training_images(images, cache_path)
+        return dlib.train_simple_object_detector(image_pixels, rectangles, options)
+    finally:
+        # The memory map must be closed (by dropping the views of it) before
+        # the file can be removed on Windows
+        image_pixels = None
+        if os.path.exists(str(cache_path)):
+            os.remove(str(cache_path))
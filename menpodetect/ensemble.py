@@ -0,0 +1,138 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from menpo.image import Image
+
+from menpodetect.detect import (
+    PreprocessedImage,
+    _accepts_attach,
+    _attach_landmarks,
+    _check_attach,
+)
+from menpodetect.detections import Detections
+from menpodetect.nms import non_maximum_suppression
+
+
+class EnsembleDetector(object):
+    r"""
+    Combines several detectors into a single detector.
+
+    The detectors are run concurrently on a single shared
+    :map:`PreprocessedImage`, so each distinct preprocessing (e.g. greyscale
+    at a given diagonal) is only computed once. Their detections are then
+    merged using non-maximum suppression and a single, deduplicated, set of
+    detections is attached to the image.
+
+    Parameters
+    ----------
+    detectors : `list` of `callable`
+        The detectors to combine, such as :map:`OpenCVDetector` and
+        :map:`DlibDetector`. Earlier detectors take priority when overlapping
+        detections are merged.
+    detector_kwargs : `list` of `dict`, optional
+        The keyword arguments passed to each detector, e.g.
+        ``[{'min_neighbours': 3}, {'n_upscales': 1}]``.
+    iou_threshold : `float`, optional
+        Detections that overlap a detection of higher priority by more than
+        this intersection over union are discarded.
+    n_workers : `int` > 0, optional
+        The number of threads used to run the detectors. If ``None``, one
+        thread per detector is used.
+
+    Raises
+    ------
+    ValueError
+        If ``detector_kwargs`` is not the same length as ``detectors``.
+
+    Examples
+    --------
+    >>> ensemble = EnsembleDetector([load_opencv_frontal_face_detector(),
+    ...                              load_opencv_profile_face_detector()])
+    >>> bounding_boxes = ensemble(image)
+    """
+
+    def __init__(
+        self, detectors, detector_kwargs=None, iou_threshold=0.3, n_workers=None
+    ):
+        self.detectors = list(detectors)
+        if detector_kwargs is None:
+            detector_kwargs = [{} for _ in self.detectors]
+        if len(detector_kwargs) != len(self.detectors):
+            raise ValueError(
+                "{} detector_kwargs given for {} detectors".format(
+                    len(detector_kwargs), len(self.detectors)
+                )
+            )
+        self.detector_kwargs = [dict(kwargs) for kwargs in detector_kwargs]
+        self.iou_threshold = iou_threshold
+        self._accepts_attach = [_accepts_attach(d) for d in self.detectors]
+        if n_workers is None:
+            n_workers = len(self.detectors)
+        self.n_workers = n_workers
+
+    def _map(self, function, items):
+        if self.n_workers <= 1 or len(items) <= 1:
+            return [function(item) for item in items]
+        # The copies of the native models outlive the threads (see
+        # detect._per_thread_model), so a pool per call is cheap
+        with ThreadPoolExecutor(max_workers=self.n_workers) as executor:
+            return list(executor.map(function, items))
+
+    def __call__(self, image, group_prefix="ensemble", attach="per_box"):
+        r"""
+        Perform a detection using every detector and merge the results.
+
+        The merged detections will also be attached to the image as landmarks.
+
+        Parameters
+        ----------
+        image : `menpo.image.Image` or :map:`PreprocessedImage`
+            A Menpo image to detect. The bounding boxes of the detected objects
+            will be attached to this image.
+        group_prefix : `str`, optional
+            The prefix string to be appended to each each landmark group that is
+            stored on the image. Each detection will be stored as group_prefix_#
+            where # is a count starting from 0.
+        attach : ``{per_box, combined}`` or ``None``, optional
+            How the merged detections are attached to the image as landmarks.
+            See :func:`menpodetect.detect.detect`.
+
+        Returns
+        ------
+        bounding_boxes : :map:`Detections`
+            The merged detected objects. The ``detector_ids`` give the index
+            of the detector that found each detection.
+        """
+        _check_attach(attach)
+        if isinstance(image, PreprocessedImage):
+            preprocessed = image
+            image = image.image
+        else:
+            preprocessed = PreprocessedImage(image)
+        # Detectors that cannot be told not to attach their detections attach
+        # them to a landmark-free view of the image instead, which shares the
+        # same preprocessing cache
+        scratch = None
+        if not all(self._accepts_attach):
+            scratch = preprocessed._share(Image(image.pixels, copy=False))
+
+        def run(i):
+            if self._accepts_attach[i]:
+                kwargs = dict(self.detector_kwargs[i], attach=None)
+                return self.detectors[i](preprocessed, **kwargs)
+            return self.detectors[i](scratch, **self.detector_kwargs[i])
+
+        detections = []
+        for i, d in enumerate(self._map(run, range(len(self.detectors)))):
+            if not isinstance(d, Detections):
+                d = Detections.from_pointgraphs(d)
+            detections.append(
+                Detections(d.boxes, scores=d.scores, detector_ids=np.full(len(d), i))
+            )
+        detections = Detections.concatenate(detections)
+        keep = non_maximum_suppression(
+            detections.boxes, iou_threshold=self.iou_threshold
+        )
+        detections = detections[keep]
+        _attach_landmarks(image, detections, group_prefix, attach=attach)
+        return detections
@@ -0,0 +1,92 @@
+import numpy as np
+
+
+def pointgraphs_to_boxes(pcs):
+    r"""
+    Convert a list of bounding boxes to a single array of box corners.
+
+    Parameters
+    ----------
+    pcs : `list` of `menpo.shape.PointCloud`
+        The bounding boxes (or any 2D shapes, in which case their bounds are
+        used).
+
+    Returns
+    -------
+    boxes : ``(n_boxes, 4)`` `ndarray`
+        The boxes as ``[min_y, min_x, max_y, max_x]`` (the Menpo axis order).
+    """
+    if len(pcs) == 0:
+        return np.zeros((0, 4))
+    return np.array([pc.bounds() for pc in pcs], dtype=float).reshape(-1, 4)
+
+
+def iou_matrix(boxes_a, boxes_b):
+    r"""
+    The intersection over union of every pair of boxes.
+
+    Parameters
+    ----------
+    boxes_a : ``(n_a, 4)`` `ndarray`
+        Boxes as ``[min_y, min_x, max_y, max_x]``.
+    boxes_b : ``(n_b, 4)`` `ndarray`
+        Boxes as ``[min_y, min_x, max_y, max_x]``.
+
+    Returns
+    -------
+    iou : ``(n_a, n_b)`` `ndarray`
+        The intersection over union of each box in ``boxes_a`` with each box
+        in ``boxes_b``. Degenerate (zero area) pairs have an IoU of 0.
+    """
+    boxes_a = np.asarray(boxes_a, dtype=float).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=float).reshape(-1, 4)
+    min_corner = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    max_corner = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod(np.clip(max_corner - min_corner, 0, None), axis=-1)
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=-1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=-1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.divide(
+        intersection, union, out=np.zeros_like(intersection), where=union > 0
+    )
+
+
+def non_maximum_suppression(boxes, scores=None, iou_threshold=0.3):
+    r"""
+    Greedy non-maximum suppression of overlapping boxes.
+
+    Boxes are visited from the highest score to the lowest, and every
+    remaining box that overlaps a kept box by more than ``iou_threshold`` is
+    discarded. The overlaps are computed in a vectorised fashion, so only one
+    Python iteration is performed per *kept* box.
+
+    Parameters
+    ----------
+    boxes : ``(n_boxes, 4)`` `ndarray`
+        Boxes as ``[min_y, min_x, max_y, max_x]``.
+    scores : ``(n_boxes,)`` `ndarray`, optional
+        The confidence of each box. If ``None``, earlier boxes take priority
+        over later boxes.
+    iou_threshold : `float`, optional
+        Boxes that overlap a kept box by more than this are suppressed.
+
+    Returns
+    -------
+    keep : ``(n_kept,)`` `ndarray`
+        The indices of the kept boxes, in the order they were kept (highest
+        priority first).
+    """
+    boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+    if scores is None:
+        order = np.arange(boxes.shape[0])
+    else:
+        order = np.argsort(-np.asarray(scores, dtype=float), kind="stable")
+
+    keep = []
+    while order.size > 0:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        overlap = iou_matrix(boxes[best], boxes[rest])[0]
+        order = rest[overlap <= iou_threshold]
+    return np.array(keep, dtype=int)
@@ -1,5 +1,7 @@
 from pathlib import Path
 
+import numpy as np
+
 from menpodetect.paths import models_dir_path
 from menpo.shape import bounding_box
 
@@ -28,3 +30,24 @@ def pointgraph_from_rect(rect):
     """
     x, y, w, h = rect
     return bounding_box((y, x), (y + h, x + w))
+
+
+def boxes_from_rects(rects):
+    r"""
+    Convert opencv detections to an array of boxes.
+
+    Parameters
+    ----------
+    rects : ``(n_boxes, 4)`` `ndarray` or `tuple`
+        The bounding boxes to convert as ``[x, y, width, height]``. Result of
+        calling an opencv detection.
+
+    Returns
+    -------
+    boxes : ``(n_boxes, 4)`` `ndarray`
+        The boxes as ``[min_y, min_x, max_y, max_x]``, the same corners as
+        :func:`pointgraph_from_rect`.
+    """
+    rects = np.asarray(rects, dtype=float).reshape(-1, 4)
+    x, y, w, h = rects.T
+    return np.stack([y, x, y + h, x + w], axis=1)
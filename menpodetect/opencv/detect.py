@@ -1,7 +1,9 @@
 from __future__ import division
 from functools import partial
 from pathlib import Path
+import hashlib
 
+import numpy as np
 from menpo.base import MenpoMissingDependencyError
 
 try:
@@ -9,9 +11,16 @@ try:
 except ImportError:
     raise MenpoMissingDependencyError("opencv")
 
-from menpodetect.detect import detect
+from menpodetect.detect import (
+    detect,
+    _detector_methods,
+    _object_size_image_diagonal,
+    _per_thread_model,
+)
+from menpodetect.detections import Detections
+from menpodetect.registry import model_registry
 from .conversion import (
-    pointgraph_from_rect,
+    boxes_from_rects,
     opencv_frontal_face_path,
     opencv_profile_face_path,
     opencv_eye_path,
@@ -28,18 +37,32 @@ def _get_default_flags():
         raise ValueError("Unsupported OpenCV version: {}".format(version))
 
 
+def _read_cascade(data):
+    r"""
+    Read a cascade from the contents of its XML file, without touching disk.
+    """
+    storage = cv2.FileStorage(
+        data.decode("utf-8"), cv2.FILE_STORAGE_READ | cv2.FILE_STORAGE_MEMORY
+    )
+    model = cv2.CascadeClassifier()
+    if not model.read(storage.getFirstTopLevelNode()):
+        raise ValueError("The data is not an opencv cascade.")
+    return model
+
+
 class _opencv_detect(object):
     r"""
     A utility callable that allows the caching of an opencv detector.
 
     This callable is important for presenting the correct parameters to the
     user. It also marshalls the return type of the detector back to
-    menpo.shape.PointDirectedGraph.
+    :map:`Detections`.
 
     Parameters
     ----------
-    model : `Path` or `str` or `opencv.CascadeClassifier`
-        Either a path to an `opencv.CascadeClassifier` or the detector itself.
+    model : `Path` or `str` or `bytes` or `opencv.CascadeClassifier`
+        Either a path to an `opencv.CascadeClassifier`, the contents of the
+        file, or the detector itself.
 
     Raises
     ------
@@ -48,12 +71,62 @@ class _opencv_detect(object):
     """
 
     def __init__(self, model):
+        clone = None
+        self._path = None
+        self._data = None
         if isinstance(model, (str, Path)):
             m_path = Path(model)
             if not Path(m_path).exists():
                 raise ValueError("Model {} does not exist.".format(m_path))
+            self._path = m_path
+            self._mtime_ns = m_path.stat().st_mtime_ns
             model = cv2.CascadeClassifier(str(m_path))
+            # Cascades are not thread safe, so each thread re-reads its own
+            clone = partial(cv2.CascadeClassifier, str(m_path))
+        elif isinstance(model, bytes):
+            self._data = model
+            model = _read_cascade(model)
+            clone = partial(_read_cascade, self._data)
         self._opencv_model = model
+        self._serialised = None
+        self._models = _per_thread_model(model, clone=clone)
+        # The (height, width) of the window the cascade was trained with
+        width, height = model.getOriginalWindowSize()
+        self.window_shape = (height, width)
+
+    def serialise(self):
+        r"""
+        The contents of the model file, and the hash of those contents, which
+        are read the first time they are needed.
+
+        Returns
+        -------
+        data : `bytes`
+            The contents of the cascade XML file.
+        digest : `str`
+            The SHA-256 hash of ``data``.
+
+        Raises
+        ------
+        TypeError
+            If the detector was not loaded from a file.
+        ValueError
+            If the model file has changed since it was loaded.
+        """
+        if self._serialised is None:
+            data = self._data
+            if data is None:
+                if self._path is None:
+                    raise TypeError(
+                        "Only opencv detectors loaded from a file can be serialised."
+                    )
+                if self._path.stat().st_mtime_ns != self._mtime_ns:
+                    raise ValueError(
+                        "Model {} has changed since it was loaded.".format(self._path)
+                    )
+                data = self._path.read_bytes()
+            self._serialised = data, hashlib.sha256(data).hexdigest()
+        return self._serialised
 
     def __call__(
         self,
@@ -84,31 +157,70 @@ class _opencv_detect(object):
 
         Returns
         ------
-        bounding_boxes : `list` of `menpo.shape.PointDirectedGraph`
-            The detected objects.
+        bounding_boxes : :map:`Detections`
+            The detected objects. The ``scores`` are the level weights of the
+            final cascade stage (``None`` for OpenCV 2).
         """
         if flags is None:
             flags = _get_default_flags()
-        rects = self._opencv_model.detectMultiScale(
-            uint8_image,
-            scaleFactor=scale_factor,
-            minNeighbors=min_neighbours,
-            minSize=min_size,
-            flags=flags,
-        )
-        return [pointgraph_from_rect(r) for r in rects]
+        scores = None
+        with self._models.acquire() as model:
+            if hasattr(model, "detectMultiScale3"):
+                rects, _, scores = model.detectMultiScale3(
+                    uint8_image,
+                    scaleFactor=scale_factor,
+                    minNeighbors=min_neighbours,
+                    minSize=min_size,
+                    flags=flags,
+                    outputRejectLevels=True,
+                )
+                scores = np.ravel(scores)
+            else:
+                # OpenCV 2 cannot report the level weights
+                rects = model.detectMultiScale(
+                    uint8_image,
+                    scaleFactor=scale_factor,
+                    minNeighbors=min_neighbours,
+                    minSize=min_size,
+                    flags=flags,
+                )
+        return Detections(boxes_from_rects(rects), scores=scores)
 
 
-class OpenCVDetector(object):
+class OpenCVDetector(_detector_methods):
     r"""
     A generic opencv detector.
 
     Wraps an opencv object detector inside the menpodetect framework and
     provides a clean interface to expose the opencv arguments.
+
+    Models given as a path are loaded through
+    :data:`menpodetect.registry.model_registry`, so constructing a detector
+    from the same model file again does not reload the model.
+
+    Detectors loaded from a file can be pickled (for example, to send them to
+    worker processes). The contents of the file are sent, so the workers do
+    not need access to it, and a process that unpickles the same model
+    several times only parses it the first time.
     """
 
+    _group_prefix = "opencv"
+
     def __init__(self, model):
-        self._detector = _opencv_detect(model)
+        if isinstance(model, (str, Path)) and Path(model).exists():
+            # Models loaded from disk are cached and shared between detectors
+            self._detector = model_registry.get(model, _opencv_detect)
+        else:
+            self._detector = _opencv_detect(model)
+
+    def __getstate__(self):
+        data, digest = self._detector.serialise()
+        return {"model": data, "sha256": digest}
+
+    def __setstate__(self, state):
+        self._detector = model_registry.get_serialised(
+            state["sha256"], state["model"], _opencv_detect
+        )
 
     def __call__(
         self,
@@ -119,6 +231,10 @@ class OpenCVDetector(object):
         min_neighbours=5,
         min_size=(30, 30),
         flags=None,
+        preprocessing="reference",
+        attach="per_box",
+        regions=None,
+        expected_min_object_size=None,
     ):
         r"""
         Perform a detection using the cached opencv detector.
@@ -127,9 +243,10 @@ class OpenCVDetector(object):
 
         Parameters
         ----------
-        image : `menpo.image.Image`
+        image : `menpo.image.Image` or :map:`PreprocessedImage`
             A Menpo image to detect. The bounding boxes of the detected objects
-            will be attached to this image.
+            will be attached to this image. A :map:`PreprocessedImage` allows
+            several detectors to share the same preprocessing.
         image_diagonal : `int`, optional
             The total size of the diagonal of the image that should be used for
             detection. This is useful for scaling images up and down for
@@ -144,16 +261,45 @@ class OpenCVDetector(object):
         min_neighbours : `int`, optional
             The minimum number of neighbours (close detections) before
             Non-Maximum suppression to be considered a detection. Use 0
-            to return all detections.
+            to return all detections, which can then be filtered by their
+            ``scores`` with :meth:`Detections.threshold`.
         min_size : `tuple` of 2 ints
             The minimum object size in pixels that the detector will consider.
         flags : `int`, optional
             The flags to be passed through to the detector.
+        preprocessing : ``{reference, fused}``, optional
+            How the image is prepared for the detector. ``fused`` performs the
+            greyscale conversion, rescaling and uint8 conversion in a single
+            pass, which is much faster for large images. See
+            :func:`menpodetect.detect.detect`.
+        attach : ``{per_box, combined}`` or ``None``, optional
+            How the detections are attached to the image as landmarks.
+            ``per_box`` stores each detection as its own group_prefix_# group,
+            ``combined`` stores them all in a single group_prefix group and
+            ``None`` leaves the image untouched.
+        regions : ``(n_regions, 4)`` `ndarray` or `list` of `menpo.shape.PointCloud`, optional
+            If given, only these regions of the image are searched, as
+            ``[min_y, min_x, max_y, max_x]`` boxes or shapes in the
+            coordinates of the original image. Overlapping regions are merged.
+            See :func:`menpodetect.detect.detect`.
+        expected_min_object_size : `int` or `tuple` of 2 `int`, optional
+            The size (or ``(height, width)``) in pixels of the smallest object
+            that should be found in the original image. If given, the image is
+            downscaled as far as possible whilst objects of this size remain at
+            least as large as the detection window (the larger of the cascade
+            window and ``min_size``), which can be much faster for large
+            images. Cannot be combined with ``image_diagonal``.
 
         Returns
         ------
-        bounding_boxes : `list` of `menpo.shape.PointDirectedGraph`
+        bounding_boxes : :map:`Detections`
             The detected objects.
+
+        Raises
+        ------
+        ValueError
+            If both ``image_diagonal`` and ``expected_min_object_size`` are
+            given.
         """
         if flags is None:
             flags = _get_default_flags()
@@ -167,10 +313,42 @@ class OpenCVDetector(object):
         return detect(
             detect_partial,
             image,
-            greyscale=True,
-            image_diagonal=image_diagonal,
             group_prefix=group_prefix,
+            attach=attach,
+            regions=regions,
+            **self._preprocess_args(
+                image,
+                image_diagonal=image_diagonal,
+                min_size=min_size,
+                preprocessing=preprocessing,
+                expected_min_object_size=expected_min_object_size,
+            )
+        )
+
+    def _preprocess_args(
+        self,
+        image,
+        image_diagonal=None,
+        min_size=(30, 30),
+        preprocessing="reference",
+        expected_min_object_size=None,
+        **kwargs
+    ):
+        r"""
+        The arguments with which :func:`menpodetect.detect.detect` prepares
+        the image for this detector, given the arguments of :meth:`__call__`
+        (any others are ignored).
+        """
+        # min_size is given as (width, height), as in opencv
+        window_shape = np.maximum(self._detector.window_shape, min_size[::-1])
+        image_diagonal = _object_size_image_diagonal(
+            image, image_diagonal, expected_min_object_size, window_shape
         )
+        return {
+            "greyscale": True,
+            "image_diagonal": image_diagonal,
+            "preprocessing": preprocessing,
+        }
 
 
 def load_opencv_frontal_face_detector():
@@ -0,0 +1,300 @@
+import threading
+import time
+
+import numpy as np
+
+# The callbacks that are called with the profile of every call of detect().
+# This list is mutated in place (never rebound), so that detect() can check
+# whether profiling is enabled with a single truth test.
+_hooks = []
+_hooks_lock = threading.Lock()
+
+
+class DetectionProfile(object):
+    r"""
+    The profile of a single call of :func:`menpodetect.detect.detect`, as
+    passed to the hooks registered with :func:`add_hook`.
+
+    Attributes
+    ----------
+    stages : `dict` of `str` to `float`
+        The wall time in seconds of each stage of detection, in the order
+        that they ran. The stages are ``greyscale``, ``rescale`` and
+        ``to_uint8`` (or a single ``preprocess`` stage, if the image was
+        prepared by ``fused`` preprocessing or a :map:`PreprocessedImage`),
+        ``detect`` (the detector itself, including marshalling its output to
+        :map:`Detections`) and ``attach`` (attaching the landmarks).
+    total : `float`
+        The wall time in seconds of the whole call.
+    group_prefix : `str`
+        The group prefix the detector was called with, which identifies the
+        detector.
+    n_pixels : `int`
+        The number of pixels in the image.
+    n_detector_pixels : `int`
+        The number of pixels in the (possibly rescaled) image that the
+        detector searched.
+    n_detections : `int`
+        The number of objects detected.
+    """
+
+    def __init__(self, group_prefix):
+        self.stages = {}
+        self.total = 0.0
+        self.group_prefix = group_prefix
+        self.n_pixels = 0
+        self.n_detector_pixels = 0
+        self.n_detections = 0
+        self._start = self._last = time.perf_counter()
+
+    def mark(self, stage):
+        r"""
+        Record that the given stage finished now (and started when the
+        previous stage finished).
+        """
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def finish(self):
+        r"""
+        Record the total time and pass the profile to every hook.
+        """
+        self.total = time.perf_counter() - self._start
+        for hook in list(_hooks):
+            hook(self)
+
+    def __repr__(self):
+        stages = ", ".join(
+            "{}={:.3f}ms".format(stage, 1000 * t) for stage, t in self.stages.items()
+        )
+        return "{}({}, total={:.3f}ms, n_detections={})".format(
+            type(self).__name__, stages, 1000 * self.total, self.n_detections
+        )
+
+
+def _start_profile(group_prefix):
+    r"""
+    A new profile of a call of detect(), or ``None`` if profiling is not
+    enabled (which is the only cost of profiling when it is not used).
+    """
+    if not _hooks:
+        return None
+    return DetectionProfile(group_prefix)
+
+
+def add_hook(hook):
+    r"""
+    Register a callable that is called with a :map:`DetectionProfile` after
+    every call of :func:`menpodetect.detect.detect` (and therefore every
+    detector), in any thread.
+
+    Hooks are called in the thread that performed the detection, so they
+    should be fast and thread safe.
+
+    Parameters
+    ----------
+    hook : `callable`
+        Called with a single :map:`DetectionProfile`.
+    """
+    with _hooks_lock:
+        _hooks.append(hook)
+
+
+def remove_hook(hook):
+    r"""
+    Unregister a hook registered with :func:`add_hook`.
+
+    Parameters
+    ----------
+    hook : `callable`
+        The hook to remove.
+
+    Raises
+    ------
+    ValueError
+        If the hook is not registered.
+    """
+    with _hooks_lock:
+        _hooks.remove(hook)
+
+
+def _default_bin_edges():
+    # Roughly 4 bins per decade, from 10 microseconds to 100 seconds
+    return 10.0 ** np.arange(-5, 2.01, 0.25)
+
+
+class _histogram(object):
+    r"""
+    A histogram of values, with the count, sum, minimum and maximum.
+    """
+
+    def __init__(self, bin_edges):
+        self.bin_edges = bin_edges
+        # The final bin counts the values greater than the last edge
+        self.counts = np.zeros(len(bin_edges) + 1, dtype=np.int64)
+        self.count = 0
+        self.sum = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def add(self, value):
+        self.counts[np.searchsorted(self.bin_edges, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        r"""
+        Estimate the quantile as the upper edge of the bin it falls in
+        (clipped to the observed range).
+        """
+        if self.count == 0:
+            return None
+        index = np.searchsorted(np.cumsum(self.counts), q * self.count)
+        if index >= len(self.bin_edges):
+            return self.max
+        return float(np.clip(self.bin_edges[index], self.min, self.max))
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else None,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "bin_edges": self.bin_edges.tolist(),
+            "counts": self.counts.tolist(),
+        }
+
+
+class DetectionStats(object):
+    r"""
+    Collects aggregate statistics of every detection whilst it is active.
+
+    Used as a context manager, the collector registers itself as a hook
+    (see :func:`add_hook`) and records the profile of every detection made,
+    in any thread, until the ``with`` block exits. A histogram of the wall
+    time of each stage (and of the whole call) is kept, along with the
+    number of pixels searched and objects detected. The histograms can be
+    exported with :meth:`to_dict`, for example to a metrics system.
+
+    Parameters
+    ----------
+    bin_edges : `ndarray`, optional
+        The increasing edges, in seconds, of the timing histograms. The final
+        bin counts the times greater than the last edge. If ``None``, the
+        edges are spaced logarithmically from 10 microseconds to 100 seconds.
+
+    Examples
+    --------
+    >>> with DetectionStats() as stats:
+    ...     detector.detect_batch(images)
+    >>> stats.summary()['detect']['p90']
+    """
+
+    def __init__(self, bin_edges=None):
+        if bin_edges is None:
+            bin_edges = _default_bin_edges()
+        self.bin_edges = np.asarray(bin_edges, dtype=float)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        r"""
+        Discard all of the recorded statistics.
+        """
+        with self._lock:
+            self._stages = {}
+            self.n_calls = 0
+            self.n_pixels = 0
+            self.n_detector_pixels = 0
+            self.n_detections = 0
+
+    def __call__(self, profile):
+        r"""
+        Record the profile of a single detection.
+
+        Parameters
+        ----------
+        profile : :map:`DetectionProfile`
+            The profile to record.
+        """
+        with self._lock:
+            self.n_calls += 1
+            self.n_pixels += profile.n_pixels
+            self.n_detector_pixels += profile.n_detector_pixels
+            self.n_detections += profile.n_detections
+            times = list(profile.stages.items()) + [("total", profile.total)]
+            for stage, seconds in times:
+                if stage not in self._stages:
+                    self._stages[stage] = _histogram(self.bin_edges)
+                self._stages[stage].add(seconds)
+
+    @property
+    def stages(self):
+        r"""
+        The names of the stages that have been recorded.
+
+        :type: `list` of `str`
+        """
+        return list(self._stages)
+
+    def summary(self):
+        r"""
+        Summarise the timings of each stage.
+
+        Returns
+        -------
+        summary : `dict` of `str` to `dict`
+            For each stage (and ``total``), the ``count``, ``mean``, ``min``
+            and ``max`` time in seconds, and the ``p50``, ``p90`` and ``p99``
+            estimated from the histogram.
+        """
+        with self._lock:
+            return {stage: h.summary() for stage, h in self._stages.items()}
+
+    def to_dict(self):
+        r"""
+        Export all of the statistics as plain (JSON serialisable) types.
+
+        Returns
+        -------
+        stats : `dict`
+            The ``n_calls``, ``n_pixels``, ``n_detector_pixels`` and
+            ``n_detections`` counters, and the ``stages`` histograms. Each
+            histogram has the ``count``, ``sum``, ``min`` and ``max`` times,
+            the ``bin_edges`` and the ``counts`` in each bin (with one more
+            count than edges, for the times beyond the last edge).
+        """
+        with self._lock:
+            return {
+                "n_calls": self.n_calls,
+                "n_pixels": self.n_pixels,
+                "n_detector_pixels": self.n_detector_pixels,
+                "n_detections": self.n_detections,
+                "stages": {stage: h.to_dict() for stage, h in self._stages.items()},
+            }
+
+    def __enter__(self):
+        add_hook(self)
+        return self
+
+    def __exit__(self, *args):
+        remove_hook(self)
+
+    def __repr__(self):
+        return "{}(n_calls={}, n_detections={})".format(
+            type(self).__name__, self.n_calls, self.n_detections
+        )
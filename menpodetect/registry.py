@@ -0,0 +1,169 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import partial
+from pathlib import Path
+import threading
+
+
+class ModelRegistry(object):
+    r"""
+    A thread safe, least recently used, cache of models loaded from disk.
+
+    Models are cached by the loader used, the resolved path of the model
+    file and the modification time of the file. Therefore, a model is only
+    loaded once however it is referred to, and is reloaded if the file
+    changes. When more than ``max_size`` models are cached, the least
+    recently used model is evicted. Models received from other processes
+    (for example, by unpickling a detector) are cached by the hash of their
+    contents instead.
+
+    If several threads request the same model at once, it is loaded by the
+    first thread and the other threads wait for it, whilst different models
+    may be loaded concurrently.
+
+    The :map:`DlibDetector` and :map:`OpenCVDetector` constructors (and
+    therefore the ``load_*`` functions) load their models through
+    :data:`model_registry`, so constructing a detector from a path is cheap
+    after the first time. The cached models are shared by all of these
+    detectors, which remains thread safe.
+
+    Parameters
+    ----------
+    max_size : `int` > 0 or ``None``, optional
+        The maximum number of cached models. If ``None``, the size of the
+        cache is unbounded.
+
+    Raises
+    ------
+    ValueError
+        If ``max_size`` is less than 1.
+    """
+
+    def __init__(self, max_size=16):
+        if max_size is not None and max_size < 1:
+            raise ValueError("max_size must be > 0, got {}".format(max_size))
+        self.max_size = max_size
+        self._models = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path, loader):
+        path = Path(path).resolve()
+        return loader, str(path), path.stat().st_mtime_ns
+
+    def get(self, path, loader):
+        r"""
+        The model at the given path, loading it if it is not already cached.
+
+        Parameters
+        ----------
+        path : `Path` or `str`
+            The path of the model file.
+        loader : `callable`
+            Called with the path of the model to load it. The same model
+            loaded by different loaders is cached separately.
+
+        Returns
+        -------
+        model : `object`
+            The value returned by the loader.
+
+        Raises
+        ------
+        OSError
+            If the path does not exist.
+        """
+        key = self._key(path, loader)
+        return self._get(key, partial(loader, key[1]))
+
+    def get_serialised(self, digest, data, loader):
+        r"""
+        The model serialised as ``data``, deserialising it if a model with
+        the same content hash is not already cached.
+
+        This is used when detectors are unpickled, so that a worker process
+        that receives the same model with every task only deserialises it
+        once.
+
+        Parameters
+        ----------
+        digest : `str`
+            The content hash of ``data``, which identifies the model.
+        data : `bytes`
+            The serialised model.
+        loader : `callable`
+            Called with ``data`` to deserialise the model. The same model
+            deserialised by different loaders is cached separately.
+
+        Returns
+        -------
+        model : `object`
+            The value returned by the loader.
+        """
+        return self._get((loader, "sha256:" + digest, None), partial(loader, data))
+
+    def _get(self, key, load):
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+            future = self._loading.get(key)
+            is_loader = future is None
+            if is_loader:
+                future = Future()
+                self._loading[key] = future
+
+        if not is_loader:
+            return future.result()
+        try:
+            model = load()
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._loading[key]
+            # Models loaded from an older version of the file are stale
+            for stale in [k for k in self._models if k[:2] == key[:2]]:
+                del self._models[stale]
+            self._models[key] = model
+            while self.max_size is not None and len(self._models) > self.max_size:
+                self._models.popitem(last=False)
+        future.set_result(model)
+        return model
+
+    def preload(self, paths, loader):
+        r"""
+        Load several models into the cache ahead of time, for example when a
+        long running service starts.
+
+        Parameters
+        ----------
+        paths : `iterable` of `Path` or `str`
+            The paths of the model files.
+        loader : `callable`
+            Called with the path of each model to load it.
+        """
+        for path in paths:
+            self.get(path, loader)
+
+    def clear(self):
+        r"""
+        Evict all of the cached models. Detectors that were already
+        constructed keep their models.
+        """
+        with self._lock:
+            self._models.clear()
+
+    def __len__(self):
+        return len(self._models)
+
+    def __repr__(self):
+        return "{}(max_size={}) with {} cached models".format(
+            type(self).__name__, self.max_size, len(self)
+        )
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,283 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+
+import numpy as np
+
+from menpodetect.batch import _n_workers
+from menpodetect.profiling import _default_bin_edges, _histogram
+
+
+def _batch_key(detector, kwargs):
+    r"""
+    The key shared by requests that can be batched together: those with the
+    same detector and parameters.
+    """
+    key = (detector, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        # Requests with unhashable parameters (such as an array of regions)
+        # are never batched with other requests
+        key = object()
+    return key
+
+
+class _batch(object):
+    r"""
+    The queued requests that will be run together.
+    """
+
+    def __init__(self, detector, kwargs, deadline):
+        self.detector = detector
+        self.kwargs = kwargs
+        self.deadline = deadline
+        # (image, future, submission time) for each request
+        self.requests = []
+
+
+class MicroBatchScheduler(object):
+    r"""
+    Queues detection requests and runs them in micro-batches on a pool of
+    threads.
+
+    Requests for the same detector with the same parameters are grouped into
+    a batch. A batch is started as soon as it holds ``max_batch_size``
+    requests, or ``max_wait`` seconds after its first request arrived,
+    whichever is sooner, and its requests are then run in parallel across
+    the pool of threads. Therefore, no request waits more than ``max_wait``
+    seconds before it is handed to the pool, and requests that arrive
+    together are released together.
+
+    The dlib and opencv detectors detect a single image per native call, so
+    a batch does not reduce the cost of each detection. What the scheduler
+    provides is bounded queueing: the delay added to each request is capped
+    by ``max_wait``, and the depth of the queue and the time spent waiting
+    are reported. It does not increase throughput over submitting each
+    request to a pool of threads directly, and at light load it adds up to
+    ``max_wait`` of latency.
+
+    Each request is resolved through its own future. A request whose future
+    is cancelled before its batch runs is skipped. :meth:`metrics` reports
+    the depth of the queue, the size of the batches and the time requests
+    spent waiting to be run.
+
+    The scheduler should be closed (or used as a context manager), which
+    runs any queued requests and stops the threads.
+
+    Parameters
+    ----------
+    max_batch_size : `int` > 0, optional
+        The maximum number of requests in a batch.
+    max_wait : `float` >= 0, optional
+        The maximum time in seconds that a batch is held open for more
+        requests.
+    n_workers : `int` > 0, optional
+        The number of threads that run the requests. If ``None``, one thread
+        per core is used.
+
+    Raises
+    ------
+    ValueError
+        If ``max_batch_size``, ``max_wait`` or ``n_workers`` are invalid.
+
+    Examples
+    --------
+    >>> detector = load_opencv_frontal_face_detector()
+    >>> with MicroBatchScheduler(max_batch_size=16, max_wait=0.005) as scheduler:
+    ...     futures = [scheduler.submit(detector, image) for image in images]
+    ...     bounding_boxes = [f.result() for f in futures]
+    """
+
+    def __init__(self, max_batch_size=8, max_wait=0.005, n_workers=None):
+        if max_batch_size < 1:
+            raise ValueError(
+                "max_batch_size must be > 0, got {}".format(max_batch_size)
+            )
+        if max_wait < 0:
+            raise ValueError("max_wait must be >= 0, got {}".format(max_wait))
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._executor = ThreadPoolExecutor(
+            max_workers=_n_workers(n_workers), thread_name_prefix="menpodetect"
+        )
+        self._condition = threading.Condition()
+        # The open batches, in the order that their first requests arrived
+        self._batches = OrderedDict()
+        self._closed = False
+
+        self._metrics_lock = threading.Lock()
+        self._queue_depth = 0
+        self._max_queue_depth = 0
+        self._n_requests = 0
+        self._batch_sizes = _histogram(np.arange(1, max_batch_size + 1))
+        self._wait_times = _histogram(_default_bin_edges())
+
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, name="menpodetect-dispatcher"
+        )
+        self._dispatcher.daemon = True
+        self._dispatcher.start()
+
+    def submit(self, detector, image, **kwargs):
+        r"""
+        Queue a detection.
+
+        Parameters
+        ----------
+        detector : `callable`
+            A detector such as :map:`DlibDetector` or :map:`OpenCVDetector`.
+            It is called with the image and the given ``kwargs``.
+        image : `menpo.image.Image`
+            The Menpo image to detect.
+        kwargs : `dict`, optional
+            Passed through to the detector. Only requests with equal
+            parameters are batched together.
+
+        Returns
+        -------
+        future : `concurrent.futures.Future`
+            Resolves to the value returned by the detector (or the exception
+            it raised). It can be awaited in ``asyncio`` by wrapping it with
+            ``asyncio.wrap_future``.
+
+        Raises
+        ------
+        RuntimeError
+            If the scheduler has been closed.
+        """
+        future = Future()
+        now = time.perf_counter()
+        key = _batch_key(detector, kwargs)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Cannot submit to a closed scheduler")
+            batch = self._batches.get(key)
+            if batch is None:
+                batch = _batch(detector, kwargs, now + self.max_wait)
+                self._batches[key] = batch
+                # The dispatcher may need to wake up sooner for this batch
+                self._condition.notify()
+            batch.requests.append((image, future, now))
+            with self._metrics_lock:
+                self._n_requests += 1
+                self._queue_depth += 1
+                self._max_queue_depth = max(self._max_queue_depth, self._queue_depth)
+            if len(batch.requests) >= self.max_batch_size:
+                self._start(key)
+        return future
+
+    def _start(self, key):
+        r"""
+        Hand every request of the batch to the pool of threads, so that they
+        run in parallel. Must be called whilst holding the condition.
+        """
+        batch = self._batches.pop(key)
+        with self._metrics_lock:
+            self._queue_depth -= len(batch.requests)
+            self._batch_sizes.add(len(batch.requests))
+        for request in batch.requests:
+            self._executor.submit(self._run, batch, request)
+
+    def _dispatch(self):
+        r"""
+        Start each batch once its deadline has passed.
+        """
+        with self._condition:
+            while True:
+                now = time.perf_counter()
+                for key in [
+                    k
+                    for k, b in self._batches.items()
+                    if b.deadline <= now or self._closed
+                ]:
+                    self._start(key)
+                if self._closed:
+                    return
+                timeout = None
+                if self._batches:
+                    # Batches are ordered by deadline
+                    timeout = next(iter(self._batches.values())).deadline - now
+                self._condition.wait(timeout)
+
+    def _run(self, batch, request):
+        image, future, submitted = request
+        with self._metrics_lock:
+            self._wait_times.add(time.perf_counter() - submitted)
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(batch.detector(image, **batch.kwargs))
+        except Exception as e:
+            future.set_exception(e)
+
+    @property
+    def queue_depth(self):
+        r"""
+        The number of requests waiting for their batch to be started.
+
+        :type: `int`
+        """
+        return self._queue_depth
+
+    def metrics(self):
+        r"""
+        A snapshot of the metrics of the scheduler, as plain (JSON
+        serialisable) types.
+
+        Returns
+        -------
+        metrics : `dict`
+            The current ``queue_depth``, the ``max_queue_depth`` so far, the
+            total ``n_requests`` and ``n_batches``, and summaries of the
+            ``batch_size`` and ``wait_time`` (in seconds, from submission
+            until the detection started running). Each summary has the
+            ``count``, ``mean``, ``min``, ``max``, ``p50``, ``p90`` and
+            ``p99``, and the histogram ``bin_edges`` and ``counts``.
+        """
+        with self._metrics_lock:
+            histograms = {
+                "batch_size": self._batch_sizes,
+                "wait_time": self._wait_times,
+            }
+            metrics = {
+                "queue_depth": self._queue_depth,
+                "max_queue_depth": self._max_queue_depth,
+                "n_requests": self._n_requests,
+                "n_batches": self._batch_sizes.count,
+            }
+            for name, h in histograms.items():
+                exported = h.to_dict()
+                metrics[name] = dict(
+                    h.summary(),
+                    bin_edges=exported["bin_edges"],
+                    counts=exported["counts"],
+                )
+        return metrics
+
+    def close(self, wait=True):
+        r"""
+        Start any queued batches immediately and stop accepting requests.
+
+        Parameters
+        ----------
+        wait : `bool`, optional
+            If ``True``, wait for all of the queued requests to complete.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return "{}(max_batch_size={}, max_wait={}, queue_depth={})".format(
+            type(self).__name__, self.max_batch_size, self.max_wait, self.queue_depth
+        )
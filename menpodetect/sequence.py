@@ -0,0 +1,224 @@
+import numpy as np
+from menpo.image import Image
+
+from menpodetect.detect import _accepts_attach, _attach_landmarks, _check_attach
+from menpodetect.detections import Detections
+from menpodetect.nms import iou_matrix, non_maximum_suppression
+
+
+def _search_region(box, margin, shape):
+    r"""
+    The integer ``[min_y, min_x, max_y, max_x]`` window around a box,
+    enlarged by ``margin`` times the box size on every side and clipped to
+    the image.
+    """
+    size = box[2:] - box[:2]
+    min_corner = np.floor(box[:2] - margin * size).astype(int)
+    max_corner = np.ceil(box[2:] + margin * size).astype(int)
+    min_corner = np.clip(min_corner, 0, shape)
+    max_corner = np.clip(max_corner, 0, shape)
+    return np.concatenate([min_corner, max_corner])
+
+
+def _thumbnail(image, size=64):
+    r"""
+    A small greyscale version of the image in the range ``[0, 1]``, used to
+    detect scene cuts.
+    """
+    step = max(1, max(image.shape) // size)
+    pixels = image.pixels[:, ::step, ::step].mean(axis=0)
+    if image.pixels.dtype == np.uint8:
+        pixels = pixels / 255.0
+    return pixels
+
+
+class SequenceDetector(object):
+    r"""
+    Detects objects in a sequence of frames (such as a video), only running
+    the full detector on some of the frames.
+
+    The full detector is run on a keyframe every ``keyframe_interval``
+    frames. On the frames in between, the detector is only run inside a
+    window around each object that was found in the previous frame (a
+    *track*), which is far cheaper than searching the whole frame. A full
+    detection is also performed whenever a track is lost (nothing is found
+    inside its window) or a scene cut is detected (the frame is very
+    different from the previous frame).
+
+    The detector is stateful and expects to be called with consecutive
+    frames. Call :meth:`reset` before processing a new sequence.
+
+    Parameters
+    ----------
+    detector : `callable`
+        A detector such as :map:`DlibDetector` or :map:`OpenCVDetector`. It is
+        called with a Menpo image (a whole frame or a window of it) and the
+        given ``detector_kwargs``. Note that an ``image_diagonal`` would
+        rescale each window differently, so should not be used.
+    keyframe_interval : `int` > 0, optional
+        The full detector is run at least once every this many frames, so
+        that new objects are found.
+    search_margin : `float`, optional
+        Each track is searched for in its previous bounding box, enlarged by
+        this fraction of the box size on every side.
+    scene_cut_threshold : `float`, optional
+        The mean absolute difference between (small, greyscale, ``[0, 1]``
+        versions of) consecutive frames above which a scene cut is assumed.
+        If ``None``, scene cuts are not detected.
+    iou_threshold : `float`, optional
+        Tracks that converge on the same object (overlap by more than this
+        intersection over union) are merged.
+    detector_kwargs : `dict`, optional
+        The keyword arguments passed to the detector.
+
+    Raises
+    ------
+    ValueError
+        If ``keyframe_interval`` is less than 1.
+
+    Examples
+    --------
+    >>> sequence_detector = SequenceDetector(load_dlib_frontal_face_detector(),
+    ...                                      keyframe_interval=15)
+    >>> for frame in mio.import_video('./video.mp4'):
+    ...     bounding_boxes = sequence_detector(frame)
+    """
+
+    def __init__(
+        self,
+        detector,
+        keyframe_interval=10,
+        search_margin=0.5,
+        scene_cut_threshold=0.15,
+        iou_threshold=0.3,
+        detector_kwargs=None,
+    ):
+        if keyframe_interval < 1:
+            raise ValueError(
+                "keyframe_interval must be > 0, got {}".format(keyframe_interval)
+            )
+        self.detector = detector
+        self.keyframe_interval = keyframe_interval
+        self.search_margin = search_margin
+        self.scene_cut_threshold = scene_cut_threshold
+        self.iou_threshold = iou_threshold
+        self.detector_kwargs = dict(detector_kwargs or {})
+        self._accepts_attach = _accepts_attach(detector)
+        self.reset()
+
+    def reset(self):
+        r"""
+        Forget all of the tracks, so that the next frame is a keyframe.
+        """
+        self.tracks = Detections(np.zeros((0, 4)))
+        self.n_frames = 0
+        self.n_keyframes = 0
+        self._frames_since_keyframe = None
+        self._previous_thumbnail = None
+
+    def _detect(self, image):
+        if self._accepts_attach:
+            kwargs = dict(self.detector_kwargs, attach=None)
+            detections = self.detector(image, **kwargs)
+        else:
+            # Detections are attached to a landmark-free view, as the detector
+            # does not support opting out of attaching landmarks
+            detections = self.detector(
+                Image(np.ascontiguousarray(image.pixels), copy=False),
+                **self.detector_kwargs
+            )
+        if not isinstance(detections, Detections):
+            detections = Detections.from_pointgraphs(detections)
+        return detections
+
+    def _is_scene_cut(self, thumbnail):
+        if self.scene_cut_threshold is None or self._previous_thumbnail is None:
+            return False
+        if thumbnail.shape != self._previous_thumbnail.shape:
+            return True
+        difference = np.abs(thumbnail - self._previous_thumbnail).mean()
+        return difference > self.scene_cut_threshold
+
+    def _track(self, image):
+        r"""
+        Search for every track inside its window. Returns ``None`` if any track
+        is lost.
+        """
+        tracked = []
+        for i in range(len(self.tracks)):
+            previous = self.tracks.boxes[i]
+            min_y, min_x, max_y, max_x = _search_region(
+                previous, self.search_margin, np.array(image.shape)
+            )
+            if max_y <= min_y or max_x <= min_x:
+                return None
+            window = Image(
+                np.ascontiguousarray(image.pixels[:, min_y:max_y, min_x:max_x]),
+                copy=False,
+            )
+            candidates = self._detect(window)
+            if len(candidates) == 0:
+                return None
+            # Follow the candidate that best overlaps the previous position
+            candidates = Detections(
+                candidates.boxes + [min_y, min_x, min_y, min_x],
+                scores=candidates.scores,
+            )
+            best = np.argmax(iou_matrix(previous, candidates.boxes)[0])
+            tracked.append(candidates[best : best + 1])
+        tracked = Detections.concatenate(tracked)
+        keep = non_maximum_suppression(
+            tracked.boxes, scores=tracked.scores, iou_threshold=self.iou_threshold
+        )
+        return tracked[np.sort(keep)]
+
+    def __call__(self, image, group_prefix="sequence", attach="per_box"):
+        r"""
+        Perform a detection on the next frame of the sequence.
+
+        The detections will also be attached to the frame as landmarks.
+
+        Parameters
+        ----------
+        image : `menpo.image.Image`
+            The next frame of the sequence. The bounding boxes of the detected
+            objects will be attached to this image.
+        group_prefix : `str`, optional
+            The prefix string to be appended to each each landmark group that is
+            stored on the image. Each detection will be stored as group_prefix_#
+            where # is a count starting from 0.
+        attach : ``{per_box, combined}`` or ``None``, optional
+            How the detections are attached to the image as landmarks.
+            See :func:`menpodetect.detect.detect`.
+
+        Returns
+        ------
+        bounding_boxes : :map:`Detections`
+            The detected objects.
+        """
+        _check_attach(attach)
+        thumbnail = _thumbnail(image)
+        detections = None
+        is_keyframe = (
+            self._frames_since_keyframe is None
+            or self._frames_since_keyframe >= self.keyframe_interval
+            or self._is_scene_cut(thumbnail)
+        )
+        if not is_keyframe:
+            if len(self.tracks) > 0:
+                detections = self._track(image)
+            else:
+                # Nothing is being tracked, so wait for the next keyframe
+                detections = self.tracks
+        if detections is None:
+            # A keyframe, or a track was lost
+            detections = self._detect(image)
+            self.n_keyframes += 1
+            self._frames_since_keyframe = 0
+
+        self._frames_since_keyframe += 1
+        self.n_frames += 1
+        self.tracks = detections
+        self._previous_thumbnail = thumbnail
+        _attach_landmarks(image, detections, group_prefix, attach=attach)
+        return detections
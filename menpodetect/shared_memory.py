@@ -0,0 +1,223 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from queue import Queue
+
+import numpy as np
+
+from menpodetect.batch import _n_workers, detect_batch
+
+# The native detector and the shared memory used by each worker process of
+# a SharedMemoryExecutor
+_worker_detector = None
+_worker_memory = None
+
+
+def _init_worker(detector, memory_name):
+    global _worker_detector, _worker_memory
+    _worker_detector = detector._detector
+    if memory_name is not None:
+        _worker_memory = shared_memory.SharedMemory(name=memory_name)
+
+
+def _detect_slot(offset, shape, dtype, kwargs):
+    r"""
+    Detect the frame stored in a slot of the shared memory, without copying
+    it. Only the (small) detections are sent back to the parent process.
+    """
+    frame = np.ndarray(shape, dtype=dtype, buffer=_worker_memory.buf, offset=offset)
+    return _worker_detector(frame, **kwargs)
+
+
+def _detect_frame(frame, kwargs):
+    return _worker_detector(frame, **kwargs)
+
+
+class _remote_detect(object):
+    r"""
+    Stands in for the native detector (e.g. ``_dlib_detect``) of a detector,
+    sending each preprocessed frame to the worker processes of the executor.
+    """
+
+    def __init__(self, executor, window_shape):
+        self._executor = executor
+        self.window_shape = window_shape
+
+    def __call__(self, uint8_image, **kwargs):
+        return self._executor._detect_frame(uint8_image, kwargs)
+
+
+class SharedMemoryExecutor(object):
+    r"""
+    Run a detector across a pool of processes, sending the preprocessed
+    frames to the workers through shared memory rather than pickling them.
+
+    Images are preprocessed (converted to uint8, greyscaled and rescaled) in
+    this process, exactly as they would be by the detector itself. Each frame
+    is then copied into a free slot of a ring of shared memory slots and a
+    worker detects directly on a view of that slot, so the pixels are never
+    pickled. Only the compact box arrays of the :map:`Detections` are sent
+    back. This avoids the inter-process copies that dominate when large (e.g.
+    4K) frames are detected by :func:`menpodetect.batch.detect_batch_processes`.
+
+    At most ``n_slots`` frames are in flight at once. A frame larger than
+    ``slot_size`` bytes is pickled to the worker instead.
+
+    The executor should be closed (or used as a context manager) to stop the
+    workers and free the shared memory.
+
+    Parameters
+    ----------
+    detector : :map:`DlibDetector` or :map:`OpenCVDetector`
+        The detector to run. It is pickled to each worker process once.
+    n_workers : `int` > 0, optional
+        The number of processes to use. If ``None``, one process per core is
+        used.
+    n_slots : `int` > 0, optional
+        The number of frames that can be in flight at once. If ``None``, two
+        per worker.
+    slot_size : `int` > 0, optional
+        The size of each slot in bytes. The default holds a 4K RGB frame.
+    transport : ``{shared_memory, pickle}``, optional
+        How frames are sent to the workers. ``pickle`` sends every frame with
+        the task (which is slower for large frames), for comparison.
+
+    Raises
+    ------
+    ValueError
+        If ``n_slots``, ``slot_size`` or ``transport`` are invalid.
+
+    Examples
+    --------
+    >>> detector = load_dlib_frontal_face_detector()
+    >>> with SharedMemoryExecutor(detector, n_workers=8) as executor:
+    ...     bounding_boxes = executor.detect_batch(images, n_upscales=0)
+    """
+
+    def __init__(
+        self,
+        detector,
+        n_workers=None,
+        n_slots=None,
+        slot_size=2160 * 3840 * 3,
+        transport="shared_memory",
+    ):
+        if transport not in ("shared_memory", "pickle"):
+            raise ValueError(
+                "transport must be one of shared_memory or pickle, "
+                "got {}".format(transport)
+            )
+        n_workers = _n_workers(n_workers)
+        if n_slots is None:
+            n_slots = 2 * n_workers
+        if n_slots < 1:
+            raise ValueError("n_slots must be > 0, got {}".format(n_slots))
+        if slot_size < 1:
+            raise ValueError("slot_size must be > 0, got {}".format(slot_size))
+        self.n_workers = n_workers
+        self.n_slots = n_slots
+        self.slot_size = slot_size
+        self.transport = transport
+
+        self._memory = None
+        memory_name = None
+        if transport == "shared_memory":
+            self._memory = shared_memory.SharedMemory(
+                create=True, size=n_slots * slot_size
+            )
+            memory_name = self._memory.name
+        self._free_slots = Queue()
+        for slot in range(n_slots):
+            self._free_slots.put(slot)
+        self._executor = ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_init_worker,
+            initargs=(detector, memory_name),
+        )
+        # A copy of the detector that preprocesses in this process, but
+        # detects in the workers
+        self._detector = object.__new__(type(detector))
+        self._detector.__dict__.update(detector.__dict__)
+        self._detector._detector = _remote_detect(self, detector._detector.window_shape)
+
+    def _detect_frame(self, frame, kwargs):
+        if self._memory is None or frame.nbytes > self.slot_size:
+            return self._executor.submit(_detect_frame, frame, kwargs).result()
+        # Wait for a free slot, so that at most n_slots frames are in flight
+        slot = self._free_slots.get()
+        try:
+            offset = slot * self.slot_size
+            view = np.ndarray(
+                frame.shape, dtype=frame.dtype, buffer=self._memory.buf, offset=offset
+            )
+            view[...] = frame
+            # The shared memory cannot be closed whilst views of it exist
+            del view
+            future = self._executor.submit(
+                _detect_slot, offset, frame.shape, frame.dtype.str, kwargs
+            )
+            return future.result()
+        finally:
+            self._free_slots.put(slot)
+
+    def __call__(self, image, **kwargs):
+        r"""
+        Perform a detection, using one of the worker processes.
+
+        The detections will also be attached to the image as landmarks.
+
+        Parameters
+        ----------
+        image : `menpo.image.Image` or :map:`PreprocessedImage`
+            A Menpo image to detect.
+        kwargs : `dict`, optional
+            Passed through to the detector, exactly as if it were called
+            directly.
+
+        Returns
+        -------
+        bounding_boxes : :map:`Detections`
+            The detected objects.
+        """
+        return self._detector(image, **kwargs)
+
+    def detect_batch(self, images, **kwargs):
+        r"""
+        Perform detection on a batch of images, keeping every slot (and
+        therefore every worker process) busy.
+
+        The detections will also be attached to each image as landmarks.
+
+        Parameters
+        ----------
+        images : `iterable` of `menpo.image.Image`
+            The Menpo images to detect.
+        kwargs : `dict`, optional
+            Passed through to the detector for every image.
+
+        Returns
+        -------
+        bounding_boxes : `list` of :map:`Detections`
+            The detected objects for each image, in the order of ``images``.
+        """
+        return detect_batch(self._detector, images, n_workers=self.n_slots, **kwargs)
+
+    def close(self):
+        r"""
+        Stop the worker processes and free the shared memory.
+        """
+        self._executor.shutdown(wait=True)
+        if self._memory is not None:
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return "{}(n_workers={}, n_slots={}, transport={})".format(
+            type(self).__name__, self.n_workers, self.n_slots, self.transport
+        )
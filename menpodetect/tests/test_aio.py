@@ -0,0 +1,126 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import menpo.io as mio
+import pytest
+from numpy.testing import assert_allclose
+from menpodetect.aio import adetect, set_max_workers
+from menpodetect.detections import Detections
+from menpodetect.dlib import load_dlib_frontal_face_detector
+from menpodetect.opencv import load_opencv_frontal_face_detector
+
+takeo = mio.import_builtin_asset.takeo_ppm()
+
+
+class SlowDetector(object):
+    def __init__(self, delay):
+        self.delay = delay
+        self.n_calls = 0
+        self.started = threading.Event()
+
+    def __call__(self, uint8_image):
+        self.n_calls += 1
+        self.started.set()
+        time.sleep(self.delay)
+        return Detections([[1, 1, 5, 5]])
+
+
+def test_adetect_matches_detector():
+    dlib_detector = load_dlib_frontal_face_detector()
+    opencv_detector = load_opencv_frontal_face_detector()
+
+    async def main():
+        image = takeo.copy()
+        return image, await asyncio.gather(
+            dlib_detector.adetect(image),
+            opencv_detector.adetect(image, attach="combined"),
+        )
+
+    image, (dlib_detections, opencv_detections) = asyncio.run(main())
+    assert_allclose(dlib_detections.boxes, dlib_detector(takeo.copy()).boxes)
+    assert_allclose(opencv_detections.boxes, opencv_detector(takeo.copy()).boxes)
+    assert "dlib_0" in image.landmarks
+    assert "opencv" in image.landmarks
+
+
+def test_event_loop_stays_responsive():
+    detector = load_dlib_frontal_face_detector()
+    large = takeo.rescale(4)
+    start = time.perf_counter()
+    detector(large.copy())
+    detection_time = time.perf_counter() - start
+
+    async def main():
+        gaps = []
+
+        async def ticker(stop):
+            last = time.perf_counter()
+            while not stop.is_set():
+                await asyncio.sleep(0.001)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        stop = asyncio.Event()
+        tick = asyncio.ensure_future(ticker(stop))
+        await asyncio.gather(*[detector.adetect(large.copy()) for _ in range(4)])
+        stop.set()
+        await tick
+        return gaps
+
+    gaps = asyncio.run(main())
+    # A blocking call would stall the loop for at least a whole detection
+    assert len(gaps) > 10
+    assert max(gaps) < detection_time / 2
+
+
+def test_cancelled_queued_detection_never_runs():
+    set_max_workers(1)
+    try:
+        detector = SlowDetector(0.2)
+
+        async def main():
+            first = asyncio.ensure_future(adetect(detector, takeo.copy()))
+            queued_image = takeo.copy()
+            queued = asyncio.ensure_future(adetect(detector, queued_image))
+            await asyncio.sleep(0.05)
+            queued.cancel()
+            await first
+            with pytest.raises(asyncio.CancelledError):
+                await queued
+            return queued_image
+
+        queued_image = asyncio.run(main())
+        assert detector.n_calls == 1
+        assert "object_0" not in queued_image.landmarks
+    finally:
+        set_max_workers(None)
+
+
+def test_cancelled_running_detection_does_not_modify_image():
+    detector = SlowDetector(0.2)
+    executor = ThreadPoolExecutor(max_workers=1)
+    image = takeo.copy()
+
+    async def main():
+        try:
+            await asyncio.wait_for(adetect(detector, image, executor=executor), 0.05)
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(main())
+    executor.shutdown(wait=True)
+    assert detector.n_calls == 1
+    assert "object_0" not in image.landmarks
+
+
+def test_adetect_invalid_attach():
+    with pytest.raises(ValueError):
+        asyncio.run(adetect(SlowDetector(0), takeo.copy(), attach="boxes"))
+
+
+def test_set_max_workers_invalid():
+    with pytest.raises(ValueError):
+        set_max_workers(0)
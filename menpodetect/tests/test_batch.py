@@ -0,0 +1,200 @@
+import shutil
+import threading
+import time
+
+import menpo.io as mio
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+from menpo.shape import bounding_box
+from menpodetect.batch import (
+    detect_batch,
+    detect_batch_processes,
+    detect_stream,
+    DetectorSpec,
+)
+from menpodetect.opencv import load_opencv_frontal_face_detector
+
+takeo = mio.import_builtin_asset.takeo_ppm()
+
+
+def fake_detector(image, offset=0):
+    # Sleep a variable amount so that threads finish out of order
+    time.sleep(0.01 * (image.shape[0] % 3))
+    return [bounding_box((offset, offset), image.shape)]
+
+
+def test_detect_batch_preserves_order():
+    images = [takeo.resize((10 + i, 10)) for i in range(8)]
+    results = detect_batch(fake_detector, images, n_workers=4)
+    assert len(results) == 8
+    for i, pcs in enumerate(results):
+        assert len(pcs) == 1
+        assert pcs[0].bounds()[1][0] == 10 + i
+
+
+def test_detect_batch_passes_kwargs():
+    images = [takeo.resize((10, 10)) for _ in range(3)]
+    results = detect_batch(fake_detector, images, n_workers=2, offset=2)
+    for pcs in results:
+        assert pcs[0].bounds()[0][0] == 2
+
+
+def test_detect_batch_single_worker_runs_in_calling_thread():
+    calling_thread = threading.get_ident()
+    threads = []
+
+    def recording_detector(image):
+        threads.append(threading.get_ident())
+        return []
+
+    detect_batch(recording_detector, [takeo, takeo], n_workers=1)
+    assert threads == [calling_thread, calling_thread]
+
+
+def test_detect_batch_invalid_n_workers():
+    with pytest.raises(ValueError):
+        detect_batch(fake_detector, [takeo], n_workers=0)
+
+
+def test_opencv_detect_batch():
+    images = [takeo.copy() for _ in range(4)]
+    opencv_detector = load_opencv_frontal_face_detector()
+    results = opencv_detector.detect_batch(images, n_workers=4)
+    expected = opencv_detector(takeo.copy())
+    assert len(results) == 4
+    for image, pcs in zip(images, results):
+        assert len(pcs) == 1
+        np.testing.assert_allclose(pcs[0].points, expected[0].points)
+        assert image.landmarks["opencv_0"].n_points == 4
+
+
+def test_per_thread_models_outlive_pools():
+    from menpodetect.detect import _per_thread_model
+
+    clones = []
+
+    def clone():
+        clones.append(object())
+        return clones[-1]
+
+    models = _per_thread_model(object(), clone=clone)
+    barrier = threading.Barrier(3)
+
+    def use_model(_):
+        with models.acquire():
+            # Hold the model until all three calls are running at once
+            barrier.wait(timeout=5)
+
+    # Each call of detect_batch creates a new pool of threads, but the copies
+    # made for the first pool are reused by the second
+    for _ in range(2):
+        detect_batch(use_model, range(3), n_workers=3)
+    assert len(clones) == 2
+
+
+def test_detector_spec_build():
+    spec = DetectorSpec(dict, a=1)
+    assert spec.build() == {"a": 1}
+    assert repr(spec) == "dict(a=1)"
+
+
+def test_detect_batch_processes_attaches_landmarks():
+    images = [takeo.copy() for _ in range(3)]
+    spec = DetectorSpec(load_opencv_frontal_face_detector)
+    results = detect_batch_processes(spec, images, n_workers=2, shard_size=2)
+    expected = load_opencv_frontal_face_detector()(takeo.copy())
+    assert len(results) == 3
+    for image, pcs in zip(images, results):
+        assert len(pcs) == 1
+        np.testing.assert_allclose(pcs[0].points, expected[0].points)
+        np.testing.assert_allclose(
+            image.landmarks["opencv_0"].points, expected[0].points
+        )
+
+
+def test_detect_batch_processes_paths():
+    paths = [mio.data_path_to("takeo.ppm")] * 3
+    spec = DetectorSpec(load_opencv_frontal_face_detector)
+    results = detect_batch_processes(spec, iter(paths), n_workers=2, shard_size=1)
+    assert len(results) == 3
+    assert all(len(pcs) == 1 for pcs in results)
+
+
+def test_detect_in_worker_paths_return_no_landmarks():
+    from menpodetect import batch
+
+    attached = []
+
+    def recording_detector(image, attach="per_box"):
+        attached.append(attach)
+        return fake_detector(image)
+
+    batch._init_worker(recording_detector)
+    try:
+        pcs, new_groups = batch._detect_in_worker(mio.data_path_to("takeo.ppm"), {})
+    finally:
+        batch._worker_detector = None
+    assert len(pcs) == 1
+    assert new_groups == ()
+    assert attached == [None]
+
+
+def test_detect_batch_processes_pickled_detector():
+    opencv_detector = load_opencv_frontal_face_detector()
+    results = detect_batch_processes(
+        opencv_detector, [takeo.copy() for _ in range(2)], n_workers=2
+    )
+    expected = opencv_detector(takeo.copy())
+    for pcs in results:
+        np.testing.assert_allclose(pcs[0].points, expected[0].points)
+
+
+def test_detect_stream_paths_in_order(tmp_path):
+    for i in range(3):
+        shutil.copy(mio.data_path_to("takeo.ppm"), tmp_path / "{}.ppm".format(i))
+    results = list(detect_stream(fake_detector, str(tmp_path), n_workers=2))
+    assert [p.name for p, _ in results] == ["0.ppm", "1.ppm", "2.ppm"]
+    for _, pcs in results:
+        assert_allclose(pcs[0].bounds()[1], takeo.shape)
+
+
+def test_detect_stream_bounds_in_flight_images():
+    pulled = []
+
+    def source():
+        for i in range(10):
+            pulled.append(i)
+            yield takeo.resize((10 + i, 10))
+
+    stream = detect_stream(fake_detector, source(), max_in_flight=3)
+    for i, _ in enumerate(stream):
+        # The image being detected plus at most two prefetched images
+        assert len(pulled) <= i + 3
+
+
+def test_detect_stream_preprocess():
+    images = [takeo.copy(), takeo.copy()]
+    stream = detect_stream(
+        fake_detector, images, preprocess=lambda im: im.resize((15, 15))
+    )
+    for _, pcs in stream:
+        assert pcs[0].bounds()[1][0] == 15
+
+
+def test_detect_stream_prepares_images_in_background():
+    from menpodetect.profiling import DetectionStats
+
+    opencv_detector = load_opencv_frontal_face_detector()
+    images = [takeo.copy() for _ in range(3)]
+    expected = opencv_detector(takeo.copy(), min_neighbours=3)
+    with DetectionStats() as stats:
+        results = list(
+            detect_stream(opencv_detector, images, n_workers=2, min_neighbours=3)
+        )
+    # The consuming thread only fetches the prepared buffer
+    assert "preprocess" in stats.stages
+    assert "greyscale" not in stats.stages
+    for image, (_, pcs) in zip(images, results):
+        np.testing.assert_allclose(pcs.boxes, expected.boxes)
+        assert image.landmarks["opencv_0"].n_points == 4
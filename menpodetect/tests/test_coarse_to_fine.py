@@ -0,0 +1,61 @@
+import menpo.io as mio
+import pytest
+from menpodetect.coarse_to_fine import detect_coarse_to_fine
+from menpodetect.detect import PreprocessedImage
+from menpodetect.opencv import load_opencv_frontal_face_detector
+from numpy.testing import assert_allclose
+
+takeo = mio.import_builtin_asset.takeo_ppm()
+
+
+def test_opencv_coarse_to_fine_matches_full_resolution():
+    opencv_detector = load_opencv_frontal_face_detector()
+    large = takeo.rescale(4)
+    full = opencv_detector(large.copy())
+    timings = {}
+    large_copy = large.copy()
+    detections = opencv_detector.detect_coarse_to_fine(
+        large_copy, proposal_scale=0.25, timings=timings
+    )
+    assert len(detections) == 1
+    # The sliding windows are aligned differently within the crops
+    size = full.boxes[0, 2] - full.boxes[0, 0]
+    assert_allclose(detections.boxes, full.boxes, atol=0.05 * size)
+    assert "opencv_0" in large_copy.landmarks
+    assert timings["n_proposals"] == 1
+    assert set(timings) == {"n_proposals", "proposal", "verification", "total"}
+    assert_allclose(
+        timings["total"], timings["proposal"] + timings["verification"], rtol=1e-6
+    )
+
+
+def test_coarse_to_fine_preprocessed_image():
+    opencv_detector = load_opencv_frontal_face_detector()
+    takeo_copy = takeo.rescale(2)
+    with PreprocessedImage(takeo_copy) as preprocessed:
+        detections = detect_coarse_to_fine(
+            opencv_detector, preprocessed, proposal_scale=0.5
+        )
+        # The proposal and verification passes are cached separately
+        assert preprocessed.n_cached == 2
+    assert len(detections) == 1
+    assert "object_0" in takeo_copy.landmarks
+
+
+def test_coarse_to_fine_no_proposals():
+    opencv_detector = load_opencv_frontal_face_detector()
+    timings = {}
+    # The face is too small to be found at this scale
+    detections = opencv_detector.detect_coarse_to_fine(
+        takeo.copy(), proposal_scale=0.1, timings=timings
+    )
+    assert len(detections) == 0
+    assert timings["n_proposals"] == 0
+
+
+def test_coarse_to_fine_invalid_arguments():
+    opencv_detector = load_opencv_frontal_face_detector()
+    with pytest.raises(ValueError):
+        opencv_detector.detect_coarse_to_fine(takeo.copy(), proposal_scale=0)
+    with pytest.raises(ValueError):
+        opencv_detector.detect_coarse_to_fine(takeo.copy(), image_diagonal=100)
@@ -0,0 +1,94 @@
+import pickle
+
+import numpy as np
+import pytest
+from menpo.shape import PointDirectedGraph, bounding_box
+from menpodetect.detections import Detections
+from numpy.testing import assert_allclose, assert_equal
+
+boxes = np.array([[0, 1, 10, 12], [5, 5, 7, 9], [20, 30, 40, 50]], dtype=float)
+
+
+def test_detections_sequence_access():
+    detections = Detections(boxes)
+    assert len(detections) == 3
+    pc = detections[1]
+    assert isinstance(pc, PointDirectedGraph)
+    assert_allclose(pc.points, bounding_box((5, 5), (7, 9)).points)
+    assert_allclose(detections[-1].bounds(), [[20, 30], [40, 50]])
+    assert [p.n_points for p in detections] == [4, 4, 4]
+
+
+def test_detections_slicing_keeps_metadata():
+    detections = Detections(boxes, scores=[0.5, 0.1, 0.9], detector_ids=[0, 1, 0])
+    subset = detections[np.array([2, 0])]
+    assert isinstance(subset, Detections)
+    assert_allclose(subset.boxes, boxes[[2, 0]])
+    assert_allclose(subset.scores, [0.9, 0.5])
+    assert_equal(subset.detector_ids, [0, 0])
+    assert len(detections[1:]) == 2
+
+
+def test_detections_rescale():
+    detections = Detections(boxes, scores=[0.5, 0.1, 0.9]).rescale(2)
+    assert_allclose(detections.boxes, boxes * 2)
+    assert_allclose(detections.scores, [0.5, 0.1, 0.9])
+
+
+def test_detections_round_trip_pointgraphs():
+    pcs = [bounding_box(b[:2], b[2:]) for b in boxes]
+    detections = Detections.from_pointgraphs(pcs)
+    assert_allclose(detections.boxes, boxes)
+    for pc, expected in zip(detections.to_pointgraphs(), pcs):
+        assert_allclose(pc.points, expected.points)
+
+
+def test_detections_concatenate():
+    first = Detections(boxes[:1], scores=[1.0])
+    second = Detections(boxes[1:], scores=[2.0, 3.0])
+    detections = Detections.concatenate([first, second])
+    assert_allclose(detections.boxes, boxes)
+    assert_allclose(detections.scores, [1.0, 2.0, 3.0])
+    assert detections.detector_ids is None
+    assert len(Detections.concatenate([])) == 0
+
+
+def test_detections_empty():
+    detections = Detections(np.zeros((0, 4)))
+    assert len(detections) == 0
+    assert list(detections) == []
+
+
+def test_detections_mismatched_scores():
+    with pytest.raises(ValueError):
+        Detections(boxes, scores=[1.0])
+    with pytest.raises(ValueError):
+        Detections(boxes, detector_ids=[1, 2])
+
+
+def test_detections_pickle():
+    detections = Detections(boxes, scores=[0.5, 0.1, 0.9])
+    unpickled = pickle.loads(pickle.dumps(detections))
+    assert_allclose(unpickled.boxes, boxes)
+    assert_allclose(unpickled.scores, detections.scores)
+
+
+def test_detections_threshold():
+    detections = Detections(boxes, scores=[0.5, 0.1, 0.9])
+    confident = detections.threshold(0.5)
+    assert_allclose(confident.boxes, boxes[[0, 2]])
+    assert_allclose(confident.scores, [0.5, 0.9])
+
+
+def test_detections_threshold_no_scores():
+    with pytest.raises(ValueError):
+        Detections(boxes).threshold(0.5)
+
+
+def test_detections_combined_pointgraph():
+    combined = Detections(boxes).combined_pointgraph()
+    assert isinstance(combined, PointDirectedGraph)
+    assert combined.n_points == 4 * len(boxes)
+    for i, box in enumerate(Detections(boxes)):
+        assert_allclose(combined.points[4 * i : 4 * i + 4], box.points)
+    assert_equal(combined.edges[4:8], [[4, 5], [5, 6], [6, 7], [7, 4]])
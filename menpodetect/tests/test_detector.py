@@ -1,9 +1,20 @@
+import tracemalloc
 from unittest.mock import MagicMock
 
 import menpo.io as mio
 import numpy as np
+from menpo.image import Image
 from menpo.shape import PointDirectedGraph
-from menpodetect.detect import detect, menpo_image_to_uint8
+from menpodetect.detections import Detections
+from menpodetect.detect import (
+    detect,
+    menpo_image_to_uint8,
+    fused_image_to_uint8,
+    PreprocessedImage,
+    _greyscale,
+    _object_size_image_diagonal,
+)
+import pytest
 from numpy.testing import assert_allclose
 
 takeo = mio.import_builtin_asset.takeo_ppm()
@@ -30,6 +41,12 @@ def test_rescaling_image():
     )
 
 
+def test_detect_returns_detections():
+    pcs = detect(fake_detector, takeo.copy())
+    assert isinstance(pcs, Detections)
+    assert_allclose(pcs.boxes, [[0, 0, 1, 1]])
+
+
 def test_passing_uint8_image():
     takeo_copy = takeo_uint8.copy()
     pcs = detect(fake_detector, takeo_copy, greyscale=False)
@@ -96,3 +113,213 @@ def test_image_to_uint8_greyscale_channels_at_front():
     assert np_im.ndim == 2
     assert np_im.dtype == np.uint8
     assert shi[1] == shnp[0] and shi[2] == shnp[1]
+
+
+def test_fused_image_to_uint8_matches_reference():
+    scale_factor = 0.6
+    reference = menpo_image_to_uint8(_greyscale(takeo).rescale(scale_factor))
+    fused = fused_image_to_uint8(takeo, scale_factor=scale_factor)
+    assert fused.dtype == np.uint8
+    assert fused.shape == reference.shape
+    assert fused.flags.c_contiguous
+    assert np.abs(fused.astype(float) - reference).mean() < 2
+
+
+def test_fused_image_to_uint8_uint8_input():
+    reference = fused_image_to_uint8(takeo, greyscale=False)
+    fused = fused_image_to_uint8(takeo_uint8, greyscale=False)
+    assert fused.shape == takeo.shape + (3,)
+    assert np.abs(fused.astype(float) - reference).max() <= 1
+
+
+def test_fused_image_to_uint8_channels_at_front():
+    np_im = fused_image_to_uint8(
+        takeo, greyscale=False, scale_factor=0.5, channels_at_back=False
+    )
+    assert np_im.shape == (3, 113, 75)
+
+
+def test_detect_fused_preprocessing():
+    takeo_copy = takeo.copy()
+    pcs = detect(fake_detector, takeo_copy, image_diagonal=200, preprocessing="fused")
+    ratio = 200.0 / takeo_copy.diagonal()
+    assert len(pcs) == 1
+    assert_allclose(
+        takeo_copy.landmarks["object_0"].points, fake_box * (1.0 / ratio), atol=10e-2
+    )
+
+
+def test_detect_unknown_preprocessing():
+    with pytest.raises(ValueError):
+        detect(fake_detector, takeo.copy(), preprocessing="unknown")
+
+
+def test_image_to_uint8_uint8_greyscale_is_view():
+    takeo_grey = Image(takeo_uint8.pixels[:1])
+    tracemalloc.start()
+    np_im = menpo_image_to_uint8(takeo_grey)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert np_im.shape == takeo_grey.shape
+    assert np_im.flags.c_contiguous
+    assert np.shares_memory(np_im, takeo_grey.pixels)
+    # No pixel buffer may be allocated
+    assert peak < takeo_grey.pixels.nbytes
+
+
+def test_image_to_uint8_uint8_rgb_is_view():
+    np_im = menpo_image_to_uint8(takeo_uint8)
+    assert np_im.shape == takeo_uint8.shape + (3,)
+    assert np.shares_memory(np_im, takeo_uint8.pixels)
+    np_im_front = menpo_image_to_uint8(takeo_uint8, channels_at_back=False)
+    assert np_im_front.shape == (3,) + takeo_uint8.shape
+    assert np.shares_memory(np_im_front, takeo_uint8.pixels)
+
+
+def test_image_to_uint8_uint8_rgb_contiguous():
+    np_im = menpo_image_to_uint8(takeo_uint8, contiguous=True)
+    assert np_im.flags.c_contiguous
+    assert_allclose(np_im, takeo_uint8.pixels_with_channels_at_back())
+
+
+def test_fused_image_to_uint8_uint8_greyscale_is_view():
+    takeo_grey = Image(takeo_uint8.pixels[:1])
+    np_im = fused_image_to_uint8(takeo_grey)
+    assert np.shares_memory(np_im, takeo_grey.pixels)
+
+
+def test_preprocessed_image_reuses_buffers():
+    seen = []
+
+    def recording_detector(uint8_image):
+        seen.append(uint8_image)
+        return fake_detector(uint8_image)
+
+    takeo_copy = takeo.copy()
+    preprocessed = PreprocessedImage(takeo_copy)
+    detect(recording_detector, preprocessed, image_diagonal=200)
+    detect(recording_detector, preprocessed, image_diagonal=200, group_prefix="a")
+    assert seen[0] is seen[1]
+    assert preprocessed.n_cached == 1
+    assert "object_0" in takeo_copy.landmarks
+    assert "a_0" in preprocessed.landmarks
+
+    detect(recording_detector, preprocessed)
+    assert seen[2] is not seen[0]
+    assert preprocessed.n_cached == 2
+
+    preprocessed.clear()
+    assert preprocessed.n_cached == 0
+
+
+def test_preprocessed_image_matches_image():
+    takeo_copy = takeo.copy()
+    ratio = 200.0 / takeo_copy.diagonal()
+    with PreprocessedImage(takeo_copy) as preprocessed:
+        pcs = detect(fake_detector, preprocessed, image_diagonal=200)
+        assert preprocessed.n_cached == 1
+    assert preprocessed.n_cached == 0
+    assert len(pcs) == 1
+    assert_allclose(
+        takeo_copy.landmarks["object_0"].points, fake_box * (1.0 / ratio), atol=10e-2
+    )
+
+
+def test_preprocessed_image_greyscale_single_channel():
+    preprocessed = PreprocessedImage(takeo.as_greyscale())
+    detect(fake_detector, preprocessed, greyscale=True)
+    detect(fake_detector, preprocessed, greyscale=False)
+    assert preprocessed.n_cached == 1
+
+
+def test_detect_attach_none():
+    takeo_copy = takeo.copy()
+    pcs = detect(fake_detector, takeo_copy, attach=None)
+    assert len(pcs) == 1
+    assert takeo_copy.landmarks.keys() == takeo.landmarks.keys()
+
+
+def test_detect_attach_combined():
+    takeo_copy = takeo.copy()
+    pcs = detect(fake_detector, takeo_copy, attach="combined")
+    assert "object_0" not in takeo_copy.landmarks
+    assert_allclose(takeo_copy.landmarks["object"].points, pcs[0].points)
+
+
+def test_detect_attach_invalid():
+    with pytest.raises(ValueError):
+        detect(fake_detector, takeo.copy(), attach="per_image")
+
+
+def test_detect_regions_are_views_mapped_to_image():
+    seen = []
+
+    def recording_detector(uint8_image):
+        seen.append(uint8_image)
+        return fake_detector(uint8_image)
+
+    takeo_copy = takeo_uint8.copy()
+    pcs = detect(
+        recording_detector,
+        takeo_copy,
+        greyscale=False,
+        regions=[[10, 20, 50, 60], [30, 40, 80, 90], [100, 10, 120, 30]],
+    )
+    # The first two regions overlap so are merged into one
+    assert [s.shape for s in seen] == [(20, 20, 3), (70, 70, 3)]
+    assert all(not s.flags.owndata for s in seen)
+    assert_allclose(pcs.boxes, [[100, 10, 101, 11], [10, 20, 11, 21]])
+
+
+def test_detect_regions_rescaled():
+    takeo_copy = takeo.copy()
+    pcs = detect(
+        fake_detector, takeo_copy, image_diagonal=200, regions=[[100, 50, 150, 100]]
+    )
+    # Regions are snapped to whole pixels of the rescaled image
+    ratio = 200.0 / takeo_copy.diagonal()
+    assert_allclose(pcs.boxes[0, :2], [100, 50], atol=1 / ratio)
+
+
+def test_detect_regions_outside_image():
+    pcs = detect(fake_detector, takeo.copy(), regions=[[-50, -50, -10, -10]])
+    assert len(pcs) == 0
+
+
+def test_object_size_image_diagonal():
+    diagonal = _object_size_image_diagonal(takeo, None, 100, (20, 10))
+    assert_allclose(diagonal, takeo.diagonal() * 0.2)
+    diagonal = _object_size_image_diagonal(takeo, None, (100, 20), (20, 10))
+    assert_allclose(diagonal, takeo.diagonal() * 0.5)
+    # Objects smaller than the window are not upscaled
+    assert _object_size_image_diagonal(takeo, None, 10, (20, 20)) is None
+    assert _object_size_image_diagonal(takeo, 200, None, (20, 20)) == 200
+
+
+def test_object_size_image_diagonal_invalid():
+    with pytest.raises(ValueError):
+        _object_size_image_diagonal(takeo, 200, 100, (20, 20))
+    with pytest.raises(ValueError):
+        _object_size_image_diagonal(takeo, None, 100, None)
+
+
+def test_detector_methods_default_group_prefix():
+    from menpodetect.detect import _detector_methods
+
+    class FakeDetector(_detector_methods):
+        _group_prefix = "fake"
+
+        def __call__(self, image, group_prefix="fake", attach="per_box"):
+            return detect(
+                lambda _: Detections([[0, 0, 5, 5]]),
+                image,
+                group_prefix=group_prefix,
+                attach=attach,
+            )
+
+    image = takeo.copy()
+    FakeDetector().detect_tiled(image, tile_shape=(100, 100), overlap=10)
+    assert "fake_0" in image.landmarks
+    images = [takeo.copy(), takeo.copy()]
+    FakeDetector().detect_batch(images, n_workers=2)
+    assert all("fake_0" in i.landmarks for i in images)
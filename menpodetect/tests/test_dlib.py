@@ -1,5 +1,20 @@
-from menpodetect.dlib import load_dlib_frontal_face_detector
+import os
+import pickle
+from pathlib import Path
+
+import dlib
+from menpo.shape import bounding_box
+from menpodetect.dlib import (
+    DlibDetector,
+    dlib_model_metadata,
+    load_dlib_frontal_face_detector,
+    save_dlib_detector,
+    train_dlib_detector,
+)
+from menpodetect.dlib.conversion import rect_to_pointgraph, rects_to_boxes
 import menpo.io as mio
+import numpy as np
+from numpy.testing import assert_allclose
 
 takeo = mio.import_builtin_asset.takeo_ppm()
 
@@ -30,3 +45,196 @@ def test_frontal_face_detector_upscales():
     assert len(pcs) == 1
     assert takeo_copy.n_channels == 3
     assert takeo_copy.landmarks["dlib_0"].n_points == 4
+
+
+def test_frontal_face_detector_batch():
+    images = [takeo.copy() for _ in range(4)]
+    dlib_detector = load_dlib_frontal_face_detector()
+    results = dlib_detector.detect_batch(images, n_workers=2)
+    assert len(results) == 4
+    for image, pcs in zip(images, results):
+        assert len(pcs) == 1
+        assert image.landmarks["dlib_0"].n_points == 4
+
+
+def test_frontal_face_detector_fused_preprocessing():
+    dlib_detector = load_dlib_frontal_face_detector()
+    for image_diagonal in [None, 220]:
+        reference = dlib_detector(takeo.copy(), image_diagonal=image_diagonal)
+        fused = dlib_detector(
+            takeo.copy(), image_diagonal=image_diagonal, preprocessing="fused"
+        )
+        assert len(reference) == len(fused) == 1
+        assert_allclose(fused[0].points, reference[0].points, atol=6)
+
+
+def test_rects_to_boxes():
+    rects = [dlib.rectangle(left=1, top=2, right=30, bottom=40)]
+    boxes = rects_to_boxes(rects)
+    assert_allclose(boxes[0], np.ravel(rect_to_pointgraph(rects[0]).bounds()))
+    assert rects_to_boxes([]).shape == (0, 4)
+
+
+def test_frontal_face_detector_scores():
+    dlib_detector = load_dlib_frontal_face_detector()
+    pcs = dlib_detector(takeo.copy())
+    assert pcs.scores.shape == (1,)
+    assert pcs.scores[0] > 0
+    assert pcs.detector_ids.shape == (1,)
+
+
+def test_frontal_face_detector_adjust_threshold():
+    dlib_detector = load_dlib_frontal_face_detector()
+    default = dlib_detector(takeo.copy())
+    permissive = dlib_detector(takeo.copy(), adjust_threshold=-1.0)
+    assert len(permissive) >= len(default)
+    confident = permissive.threshold(0.0)
+    assert len(confident) == len(default)
+    assert_allclose(confident.boxes, default.boxes)
+
+
+def test_frontal_face_detector_regions():
+    takeo_copy = takeo.copy()
+    dlib_detector = load_dlib_frontal_face_detector()
+    full = dlib_detector(takeo_copy.copy())
+    face = dlib_detector(takeo_copy.copy(), regions=full.boxes + [-30, -30, 30, 30])
+    assert_allclose(face.boxes, full.boxes, atol=5)
+
+
+def test_frontal_face_detector_expected_min_object_size():
+    dlib_detector = load_dlib_frontal_face_detector()
+    assert dlib_detector._detector.window_shape == (80, 80)
+    large = takeo.rescale(3)
+    full = dlib_detector(large.copy())
+    fast = dlib_detector(large.copy(), expected_min_object_size=200)
+    assert len(fast) == 1
+    assert_allclose(fast.boxes, full.boxes, rtol=0.1)
+
+
+def test_frontal_face_detector_coarse_to_fine():
+    dlib_detector = load_dlib_frontal_face_detector()
+    large = takeo.rescale(3)
+    full = dlib_detector(large.copy())
+    detections = dlib_detector.detect_coarse_to_fine(large, proposal_scale=0.4)
+    assert len(detections) == 1
+    # The sliding windows are aligned differently within the crops
+    size = full.boxes[0, 2] - full.boxes[0, 0]
+    assert_allclose(detections.boxes, full.boxes, atol=0.05 * size)
+    assert "dlib_0" in large.landmarks
+
+
+def test_dlib_detectors_from_path_share_cached_model(tmpdir):
+    path = str(tmpdir.join("frontal.svm"))
+    dlib.get_frontal_face_detector().save(path)
+    first = DlibDetector(path)
+    second = DlibDetector(path)
+    assert first._detector is second._detector
+    assert len(first(takeo.copy())) == 1
+
+
+def test_frontal_face_detector_pickle():
+    dlib_detector = load_dlib_frontal_face_detector()
+    data = pickle.dumps(dlib_detector)
+    unpickled = pickle.loads(data)
+    assert_allclose(
+        unpickled(takeo.copy())[0].points, dlib_detector(takeo.copy())[0].points
+    )
+    # The model is deserialised once per process, however often it is
+    # unpickled
+    assert pickle.loads(data)._detector is unpickled._detector
+    # The model is only serialised once
+    assert pickle.dumps(dlib_detector) == data
+
+
+def training_images():
+    for scale in (0.9, 1.0, 1.2):
+        image = takeo.rescale(scale)
+        for group in list(image.landmarks.keys()):
+            del image.landmarks[group]
+        image.landmarks["face"] = bounding_box(
+            (56 * scale, 30 * scale), (162 * scale, 136 * scale)
+        )
+        yield image
+
+
+def train_small_detector(**kwargs):
+    return train_dlib_detector(list(training_images()), num_threads=1, **kwargs)
+
+
+def test_train_dlib_detector_from_cache(tmpdir):
+    cache_path = str(tmpdir.join("cache.bin"))
+    # The images are only iterated over once, so may be lazy
+    cached = train_dlib_detector(
+        training_images(), num_threads=1, cache_path=cache_path
+    )
+    in_memory = train_small_detector()
+    assert not os.path.exists(cache_path)
+    image = takeo.copy()
+    assert_allclose(
+        DlibDetector(cached)(image).boxes, DlibDetector(in_memory)(image).boxes
+    )
+
+
+def test_dlib_model_metadata_from_header(tmpdir):
+    path = str(tmpdir.join("frontal.svm"))
+    dlib.get_frontal_face_detector().save(path)
+    metadata = dlib_model_metadata(path)
+    assert metadata["kind"] is None
+    assert metadata["detection_window_width"] == 80
+    assert metadata["detection_window_height"] == 80
+    assert metadata["num_detectors"] == 5
+
+
+def test_save_dlib_detector_sidecar(tmpdir):
+    path = str(tmpdir.join("small.svm"))
+    model = train_small_detector()
+    save_dlib_detector(model, path)
+    metadata = dlib_model_metadata(path)
+    assert metadata["kind"] == "simple_object_detector"
+    assert metadata["num_detectors"] == model.num_detectors
+    assert metadata["upsampling_amount"] == model.upsampling_amount
+    # Without the sidecar, the header still gives the window and filters
+    os.remove(path + ".json")
+    sniffed = dlib_model_metadata(path)
+    assert sniffed["kind"] is None
+    assert sniffed["num_detectors"] == model.num_detectors
+    assert sniffed["detection_window_width"] == model.detection_window_width
+
+
+def test_dlib_model_loaded_once(tmpdir, monkeypatch):
+    path = str(tmpdir.join("small.svm"))
+    save_dlib_detector(train_small_detector(), path)
+    loads = []
+    simple_object_detector = dlib.simple_object_detector
+
+    def counting_simple_object_detector(*args):
+        loads.append(args)
+        return simple_object_detector(*args)
+
+    monkeypatch.setattr(dlib, "simple_object_detector", counting_simple_object_detector)
+    detector = DlibDetector(Path(path))
+    assert len(loads) == 1
+    assert isinstance(detector._detector._dlib_model, simple_object_detector)
+
+
+def test_dlib_model_without_sidecar(tmpdir):
+    path = str(tmpdir.join("small.svm"))
+    model = train_small_detector()
+    model.save(path)
+    detector = DlibDetector(path)
+    # Simple object detectors are loaded as the equivalent fhog detector
+    assert isinstance(detector._detector._dlib_model, dlib.fhog_object_detector)
+    assert detector._detector.window_shape == (
+        model.detection_window_height,
+        model.detection_window_width,
+    )
+
+
+def test_stale_sidecar_is_ignored(tmpdir):
+    path = str(tmpdir.join("model.svm"))
+    save_dlib_detector(train_small_detector(), path)
+    # Replace the model, leaving the old sidecar behind
+    dlib.get_frontal_face_detector().save(path)
+    metadata = dlib_model_metadata(path)
+    assert metadata["kind"] is None
+    assert metadata["num_detectors"] == 5
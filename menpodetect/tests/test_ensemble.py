@@ -0,0 +1,97 @@
+import menpo.io as mio
+import pytest
+from menpo.shape import bounding_box
+from menpodetect.detect import PreprocessedImage, detect
+from menpodetect.ensemble import EnsembleDetector
+from menpodetect.opencv import (
+    load_opencv_frontal_face_detector,
+    load_opencv_profile_face_detector,
+)
+
+takeo = mio.import_builtin_asset.takeo_ppm()
+
+
+def make_fake_detector(boxes, seen):
+    def fake_detector(image, group_prefix="fake"):
+        return detect(
+            lambda uint8_image: seen.append(uint8_image)
+            or [bounding_box(*b) for b in boxes],
+            image,
+            group_prefix=group_prefix,
+        )
+
+    return fake_detector
+
+
+def test_ensemble_merges_overlapping_detections():
+    seen = []
+    first = make_fake_detector([((0, 0), (10, 10)), ((50, 50), (60, 60))], seen)
+    second = make_fake_detector([((1, 1), (11, 11)), ((20, 20), (30, 30))], seen)
+    takeo_copy = takeo.copy()
+    pcs = EnsembleDetector([first, second])(takeo_copy)
+    assert [tuple(pc.bounds()[0]) for pc in pcs] == [(0, 0), (50, 50), (20, 20)]
+    # Only the merged detections are attached to the image
+    assert sorted(takeo_copy.landmarks.keys_matching("*_*")) == [
+        "ensemble_0",
+        "ensemble_1",
+        "ensemble_2",
+    ]
+    # Both detectors were given the same preprocessed buffer
+    assert len(seen) == 2 and seen[0] is seen[1]
+
+
+def test_ensemble_shares_given_preprocessed_image():
+    seen = []
+    first = make_fake_detector([((0, 0), (10, 10))], seen)
+    takeo_copy = takeo.copy()
+    with PreprocessedImage(takeo_copy) as preprocessed:
+        EnsembleDetector([first, first], n_workers=1)(preprocessed)
+        assert preprocessed.n_cached == 1
+    assert "ensemble_0" in takeo_copy.landmarks
+
+
+def test_ensemble_detector_kwargs_length():
+    with pytest.raises(ValueError):
+        EnsembleDetector([load_opencv_frontal_face_detector()], [{}, {}])
+
+
+def test_ensemble_opencv_frontal_profile():
+    frontal = load_opencv_frontal_face_detector()
+    profile = load_opencv_profile_face_detector()
+    ensemble = EnsembleDetector(
+        [frontal, profile], detector_kwargs=[{}, {"min_neighbours": 1}]
+    )
+    takeo_copy = takeo.copy()
+    pcs = ensemble(takeo_copy)
+    assert len(pcs) >= 1
+    assert takeo_copy.landmarks["ensemble_0"].n_points == 4
+
+
+def test_ensemble_members_do_not_attach_landmarks():
+    attached = []
+
+    def recording_detector(image, attach="per_box"):
+        attached.append(attach)
+        return detect(lambda _: [], image, attach=attach)
+
+    seen = []
+    plain = make_fake_detector([((0, 0), (10, 10))], seen)
+    takeo_copy = takeo.copy()
+    with PreprocessedImage(takeo_copy) as preprocessed:
+        EnsembleDetector([recording_detector, plain])(preprocessed)
+    # Detectors that take attach are told not to attach, and the others
+    # attach to a view that is discarded
+    assert attached == [None]
+    assert len(seen) == 1
+    assert sorted(takeo_copy.landmarks.keys_matching("*_*")) == ["ensemble_0"]
+
+
+def test_ensemble_does_not_keep_threads_alive():
+    import threading
+
+    seen = []
+    first = make_fake_detector([((0, 0), (10, 10))], seen)
+    n_threads = threading.active_count()
+    for _ in range(3):
+        EnsembleDetector([first, first])(takeo.copy())
+    assert threading.active_count() == n_threads
@@ -0,0 +1,111 @@
+import json
+import os
+import subprocess
+import sys
+
+import menpodetect
+
+heavy_modules = [
+    "cv2",
+    "dlib",
+    "menpo",
+    "menpo.shape",
+    "scipy",
+    "menpodetect.dlib",
+    "menpodetect.opencv",
+]
+
+
+def run_isolated(code):
+    r"""
+    Run the code in a fresh interpreter (so that nothing is already
+    imported) and return what it printed as JSON.
+    """
+    # Run from the directory containing this copy of menpodetect
+    root = os.path.dirname(os.path.dirname(os.path.abspath(menpodetect.__file__)))
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=root)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def loaded_after(statements):
+    return run_isolated(
+        "import json, sys\n{}\nprint(json.dumps([m for m in {!r} "
+        "if m in sys.modules]))".format(statements, heavy_modules)
+    )
+
+
+def test_import_does_not_load_backends():
+    assert loaded_after("import menpodetect") == []
+
+
+def test_opencv_access_does_not_load_dlib():
+    loaded = loaded_after("import menpodetect; menpodetect.OpenCVDetector")
+    assert "cv2" in loaded
+    assert "dlib" not in loaded
+    assert "menpodetect.dlib" not in loaded
+
+
+def test_dlib_access_does_not_load_opencv():
+    loaded = loaded_after("import menpodetect; menpodetect.DlibDetector")
+    assert "dlib" in loaded
+    # menpo itself may import cv2, but the opencv detectors are not loaded
+    assert "menpodetect.opencv" not in loaded
+
+
+def test_import_time():
+    # Importing menpodetect should be far cheaper than importing it and then
+    # resolving both of the backends
+    timings = run_isolated(
+        "import json, time\n"
+        "start = time.perf_counter()\n"
+        "import menpodetect\n"
+        "imported = time.perf_counter()\n"
+        "menpodetect.DlibDetector, menpodetect.OpenCVDetector\n"
+        "resolved = time.perf_counter()\n"
+        "print(json.dumps([imported - start, resolved - imported]))"
+    )
+    import_time, backend_time = timings
+    assert import_time < backend_time
+
+
+def test_lazy_attributes():
+    from menpodetect.opencv import OpenCVDetector
+
+    assert menpodetect.OpenCVDetector is OpenCVDetector
+    assert "DlibDetector" in dir(menpodetect)
+    assert menpodetect.nms.__name__ == "menpodetect.nms"
+    assert set(menpodetect.__all__) <= set(dir(menpodetect))
+
+
+def test_missing_attribute():
+    try:
+        menpodetect.not_a_detector
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("AttributeError not raised")
+
+
+def test_missing_backend():
+    # Simulate an install without dlib, which should still export (and
+    # import) the opencv detectors
+    result = run_isolated(
+        "import json, sys\n"
+        "sys.modules['dlib'] = None\n"
+        "from menpo.base import MenpoMissingDependencyError\n"
+        "import menpodetect\n"
+        "namespace = {}\n"
+        "exec('from menpodetect import *', namespace)\n"
+        "try:\n"
+        "    menpodetect.DlibDetector\n"
+        "    error = None\n"
+        "except MenpoMissingDependencyError:\n"
+        "    error = 'missing'\n"
+        "print(json.dumps([sorted(namespace), error]))"
+    )
+    names, error = result
+    assert "OpenCVDetector" in names
+    assert "load_opencv_frontal_face_detector" in names
+    assert "DlibDetector" not in names
+    assert "load_dlib_frontal_face_detector" not in names
+    assert error == "missing"
@@ -0,0 +1,59 @@
+import numpy as np
+from menpo.shape import bounding_box
+from menpodetect.nms import (
+    iou_matrix,
+    non_maximum_suppression,
+    pointgraphs_to_boxes,
+)
+from numpy.testing import assert_allclose, assert_equal
+
+
+boxes = np.array(
+    [
+        [0, 0, 10, 10],
+        [1, 1, 11, 11],
+        [20, 20, 30, 30],
+        [0, 0, 5, 10],
+    ],
+    dtype=float,
+)
+
+
+def test_pointgraphs_to_boxes():
+    pcs = [bounding_box((1, 2), (3, 4)), bounding_box((5, 6), (7, 9))]
+    assert_allclose(pointgraphs_to_boxes(pcs), [[1, 2, 3, 4], [5, 6, 7, 9]])
+
+
+def test_pointgraphs_to_boxes_empty():
+    assert pointgraphs_to_boxes([]).shape == (0, 4)
+
+
+def test_iou_matrix():
+    iou = iou_matrix(boxes, boxes)
+    assert iou.shape == (4, 4)
+    assert_allclose(np.diag(iou), 1)
+    assert_allclose(iou[0, 1], 81.0 / 119.0)
+    assert_allclose(iou[0, 2], 0)
+    assert_allclose(iou[0, 3], 0.5)
+    assert_allclose(iou, iou.T)
+
+
+def test_iou_matrix_degenerate():
+    iou = iou_matrix([[0, 0, 0, 0]], [[0, 0, 0, 0]])
+    assert_allclose(iou, 0)
+
+
+def test_nms_input_order_priority():
+    assert_equal(non_maximum_suppression(boxes, iou_threshold=0.3), [0, 2])
+
+
+def test_nms_scores():
+    scores = np.array([0.1, 0.9, 0.5, 0.2])
+    keep = non_maximum_suppression(boxes, scores=scores, iou_threshold=0.3)
+    assert_equal(keep, [1, 2])
+    keep = non_maximum_suppression(boxes, scores=scores, iou_threshold=0.4)
+    assert_equal(keep, [1, 2, 3])
+
+
+def test_nms_empty():
+    assert non_maximum_suppression(np.zeros((0, 4))).shape == (0,)
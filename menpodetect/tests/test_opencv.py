@@ -1,8 +1,18 @@
+import pickle
+
+import cv2
+import pytest
 from menpodetect.opencv import (
+    OpenCVDetector,
     load_opencv_frontal_face_detector,
     load_opencv_eye_detector,
+    load_opencv_profile_face_detector,
 )
+from menpodetect.detect import PreprocessedImage
+from menpodetect.opencv.conversion import boxes_from_rects, pointgraph_from_rect
 import menpo.io as mio
+import numpy as np
+from numpy.testing import assert_allclose
 
 takeo = mio.import_builtin_asset.takeo_ppm()
 
@@ -34,3 +44,100 @@ def test_eye_detector():
     # a different number of detections
     first_l = list(takeo_copy.landmarks.items_matching("opencv_*"))[0][1]
     assert first_l.n_points == 4
+
+
+def test_frontal_face_detector_fused_preprocessing():
+    opencv_detector = load_opencv_frontal_face_detector()
+    for image_diagonal in [None, 220]:
+        reference = opencv_detector(takeo.copy(), image_diagonal=image_diagonal)
+        fused = opencv_detector(
+            takeo.copy(), image_diagonal=image_diagonal, preprocessing="fused"
+        )
+        assert len(reference) == len(fused) == 1
+        assert_allclose(fused[0].points, reference[0].points, atol=6)
+
+
+def test_detectors_share_preprocessed_image():
+    takeo_copy = takeo.copy()
+    frontal = load_opencv_frontal_face_detector()
+    profile = load_opencv_profile_face_detector()
+    with PreprocessedImage(takeo_copy) as preprocessed:
+        frontal_pcs = frontal(preprocessed, group_prefix="frontal")
+        profile_pcs = profile(preprocessed, group_prefix="profile")
+        assert preprocessed.n_cached == 1
+    assert len(frontal_pcs) == len(frontal(takeo.copy()))
+    assert len(profile_pcs) == len(profile(takeo.copy()))
+    assert takeo_copy.landmarks["frontal_0"].n_points == 4
+
+
+def test_boxes_from_rects():
+    rects = np.array([[10, 20, 30, 40], [1, 2, 3, 4]])
+    boxes = boxes_from_rects(rects)
+    for rect, box in zip(rects, boxes):
+        assert_allclose(box, np.ravel(pointgraph_from_rect(rect).bounds()))
+    assert boxes_from_rects(()).shape == (0, 4)
+
+
+def test_frontal_face_detector_scores():
+    opencv_detector = load_opencv_frontal_face_detector()
+    pcs = opencv_detector(takeo.copy())
+    assert pcs.scores.shape == (1,)
+
+
+def test_eye_detector_threshold_scores():
+    opencv_detector = load_opencv_eye_detector()
+    pcs = opencv_detector(takeo.copy(), min_size=(5, 5), min_neighbours=0)
+    assert pcs.scores.shape == (len(pcs),)
+    assert len(pcs.threshold(pcs.scores.min())) == len(pcs)
+    assert len(pcs.threshold(pcs.scores.max() + 1)) == 0
+    confident = pcs.threshold(np.median(pcs.scores))
+    assert 0 < len(confident) < len(pcs)
+    assert np.all(confident.scores >= np.median(pcs.scores))
+
+
+def test_frontal_face_detector_regions():
+    takeo_copy = takeo.copy()
+    opencv_detector = load_opencv_frontal_face_detector()
+    full = opencv_detector(takeo_copy.copy())
+    face = opencv_detector(takeo_copy.copy(), regions=full.boxes + [-20, -20, 20, 20])
+    assert_allclose(face.boxes, full.boxes, atol=5)
+    empty = opencv_detector(takeo_copy, regions=[[0, 0, 40, 40]])
+    assert len(empty) == 0
+
+
+def test_frontal_face_detector_expected_min_object_size():
+    opencv_detector = load_opencv_frontal_face_detector()
+    assert opencv_detector._detector.window_shape == (20, 20)
+    large = takeo.rescale(4)
+    full = opencv_detector(large.copy())
+    fast = opencv_detector(large.copy(), expected_min_object_size=200)
+    assert len(fast) == 1
+    assert_allclose(fast.boxes, full.boxes, rtol=0.1)
+
+
+def test_frontal_face_detector_pickle():
+    opencv_detector = load_opencv_frontal_face_detector()
+    data = pickle.dumps(opencv_detector)
+    unpickled = pickle.loads(data)
+    assert_allclose(
+        unpickled(takeo.copy())[0].points, opencv_detector(takeo.copy())[0].points
+    )
+    # The model is parsed once per process, however often it is unpickled
+    assert pickle.loads(data)._detector is unpickled._detector
+
+
+def test_unpickled_detector_does_not_need_model_file(tmpdir):
+    path = tmpdir.join("frontal.xml")
+    with open(load_opencv_frontal_face_detector()._detector._path, "rb") as f:
+        path.write_binary(f.read())
+    data = pickle.dumps(OpenCVDetector(str(path)))
+    path.remove()
+    assert len(pickle.loads(data)(takeo.copy())) == 1
+
+
+def test_in_memory_cascade_cannot_be_pickled():
+    cascade = cv2.CascadeClassifier(
+        str(load_opencv_frontal_face_detector()._detector._path)
+    )
+    with pytest.raises(TypeError):
+        pickle.dumps(OpenCVDetector(cascade))
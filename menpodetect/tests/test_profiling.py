@@ -0,0 +1,106 @@
+import threading
+
+import numpy as np
+import pytest
+from menpo.image import Image
+from numpy.testing import assert_allclose
+from menpodetect.detect import detect, PreprocessedImage
+from menpodetect.detections import Detections
+from menpodetect.profiling import DetectionStats, add_hook, remove_hook, _hooks
+
+
+def fake_detector(uint8_image):
+    return Detections([[1, 1, 5, 5], [2, 2, 8, 8]])
+
+
+def rgb_image():
+    return Image(np.random.RandomState(0).rand(3, 40, 60))
+
+
+def test_hook_receives_stage_timings():
+    profiles = []
+    add_hook(profiles.append)
+    try:
+        detect(fake_detector, rgb_image(), image_diagonal=36)
+    finally:
+        remove_hook(profiles.append)
+    assert len(profiles) == 1
+    profile = profiles[0]
+    assert list(profile.stages) == [
+        "greyscale",
+        "rescale",
+        "to_uint8",
+        "detect",
+        "attach",
+    ]
+    assert all(t >= 0 for t in profile.stages.values())
+    assert profile.total >= sum(profile.stages.values()) - 1e-9
+    assert profile.group_prefix == "object"
+    assert profile.n_pixels == 40 * 60
+    assert profile.n_detector_pixels < profile.n_pixels
+    assert profile.n_detections == 2
+
+
+def test_fused_and_preprocessed_images_have_one_preprocess_stage():
+    profiles = []
+    add_hook(profiles.append)
+    try:
+        detect(fake_detector, rgb_image(), preprocessing="fused")
+        detect(fake_detector, PreprocessedImage(rgb_image()))
+    finally:
+        remove_hook(profiles.append)
+    for profile in profiles:
+        assert list(profile.stages) == ["preprocess", "detect", "attach"]
+        assert profile.n_pixels == profile.n_detector_pixels == 40 * 60
+
+
+def test_no_hooks_when_disabled():
+    detect(fake_detector, rgb_image())
+    assert _hooks == []
+
+
+def test_remove_unregistered_hook():
+    with pytest.raises(ValueError):
+        remove_hook(print)
+
+
+def test_detection_stats_aggregates_threads():
+    with DetectionStats() as stats:
+        threads = [
+            threading.Thread(target=detect, args=(fake_detector, rgb_image()))
+            for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    # Detections after the block are not recorded
+    detect(fake_detector, rgb_image())
+    assert stats.n_calls == 4
+    assert stats.n_detections == 8
+    assert stats.n_pixels == 4 * 40 * 60
+    assert stats.stages == ["greyscale", "to_uint8", "detect", "attach", "total"]
+    summary = stats.summary()
+    assert summary["total"]["count"] == 4
+    assert summary["total"]["min"] <= summary["total"]["p50"]
+    assert summary["total"]["p99"] <= summary["total"]["max"]
+
+
+def test_detection_stats_histograms():
+    stats = DetectionStats(bin_edges=[0.1, 1.0])
+    profile = type("Profile", (), {})()
+    profile.n_pixels = profile.n_detector_pixels = profile.n_detections = 0
+    for seconds in [0.05, 0.5, 0.6, 5.0]:
+        profile.stages = {"detect": seconds}
+        profile.total = seconds
+        stats(profile)
+    exported = stats.to_dict()
+    histogram = exported["stages"]["detect"]
+    assert histogram["counts"] == [1, 2, 1]
+    assert histogram["bin_edges"] == [0.1, 1.0]
+    assert_allclose(histogram["sum"], 6.15)
+    assert stats.summary()["detect"]["p50"] == 1.0
+    assert stats.summary()["detect"]["p99"] == 5.0
+    stats.reset()
+    assert stats.n_calls == 0
+    assert stats.stages == []
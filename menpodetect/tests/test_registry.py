@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+
+import pytest
+from menpodetect.opencv import load_opencv_frontal_face_detector
+from menpodetect.registry import ModelRegistry
+
+
+class CountingLoader(object):
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.paths = []
+
+    def __call__(self, path):
+        time.sleep(self.delay)
+        self.paths.append(path)
+        return object()
+
+
+@pytest.fixture
+def model_paths(tmpdir):
+    paths = []
+    for i in range(3):
+        path = tmpdir.join("model_{}.xml".format(i))
+        path.write("model")
+        paths.append(str(path))
+    return paths
+
+
+def test_registry_caches_by_resolved_path(model_paths, tmpdir):
+    registry = ModelRegistry()
+    loader = CountingLoader()
+    first = registry.get(model_paths[0], loader)
+    relative = os.path.relpath(model_paths[0])
+    assert registry.get(relative, loader) is first
+    assert len(loader.paths) == 1
+    # A different loader of the same file is cached separately
+    registry.get(model_paths[0], CountingLoader())
+    assert len(registry) == 2
+
+
+def test_registry_reloads_modified_files(model_paths):
+    registry = ModelRegistry()
+    loader = CountingLoader()
+    first = registry.get(model_paths[0], loader)
+    stat = os.stat(model_paths[0])
+    os.utime(model_paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert registry.get(model_paths[0], loader) is not first
+    assert len(loader.paths) == 2
+    # The stale model is replaced rather than kept
+    assert len(registry) == 1
+
+
+def test_registry_lru_eviction(model_paths):
+    registry = ModelRegistry(max_size=2)
+    loader = CountingLoader()
+    registry.preload(model_paths[:2], loader)
+    # Use the first model so that the second is the least recently used
+    registry.get(model_paths[0], loader)
+    registry.get(model_paths[2], loader)
+    assert len(registry) == 2
+    registry.get(model_paths[0], loader)
+    assert len(loader.paths) == 3
+    registry.get(model_paths[1], loader)
+    assert len(loader.paths) == 4
+
+
+def test_registry_concurrent_first_load(model_paths):
+    registry = ModelRegistry()
+    loader = CountingLoader(delay=0.1)
+    models = []
+
+    def get():
+        models.append(registry.get(model_paths[0], loader))
+
+    threads = [threading.Thread(target=get) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(loader.paths) == 1
+    assert all(m is models[0] for m in models)
+
+
+def test_registry_failed_load_is_not_cached(model_paths):
+    registry = ModelRegistry()
+
+    def failing_loader(path):
+        raise RuntimeError("Corrupt model")
+
+    with pytest.raises(RuntimeError):
+        registry.get(model_paths[0], failing_loader)
+    assert len(registry) == 0
+    with pytest.raises(RuntimeError):
+        registry.get(model_paths[0], failing_loader)
+
+
+def test_registry_caches_serialised_models_by_digest():
+    registry = ModelRegistry()
+    loader = CountingLoader()
+    first = registry.get_serialised("abc", b"model", loader)
+    assert registry.get_serialised("abc", b"model", loader) is first
+    assert registry.get_serialised("def", b"other", loader) is not first
+    assert loader.paths == [b"model", b"other"]
+
+
+def test_registry_clear(model_paths):
+    registry = ModelRegistry()
+    loader = CountingLoader()
+    registry.preload(model_paths, loader)
+    registry.clear()
+    assert len(registry) == 0
+    registry.get(model_paths[0], loader)
+    assert len(loader.paths) == 4
+
+
+def test_registry_invalid_max_size():
+    with pytest.raises(ValueError):
+        ModelRegistry(max_size=0)
+
+
+def test_opencv_detectors_share_cached_model():
+    first = load_opencv_frontal_face_detector()
+    second = load_opencv_frontal_face_detector()
+    assert first._detector is second._detector
@@ -0,0 +1,173 @@
+import random
+import threading
+import time
+
+import menpo.io as mio
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+from menpodetect.detections import Detections
+from menpodetect.opencv import load_opencv_frontal_face_detector
+from menpodetect.scheduler import MicroBatchScheduler
+
+takeo = mio.import_builtin_asset.takeo_ppm()
+
+
+class RecordingDetector(object):
+    r"""
+    A synthetic detector that returns a box the size of the image and records
+    the thread that ran each request.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.threads = []
+
+    def __call__(self, image, offset=0):
+        time.sleep(self.delay)
+        self.threads.append(threading.get_ident())
+        return Detections([[offset, offset] + list(image.shape)])
+
+
+def generate_load(scheduler, detector, n_clients, n_requests, rate, **kwargs):
+    r"""
+    Submit requests from several client threads, each with exponentially
+    distributed gaps at the given rate (requests per second per client).
+    Returns the (image, future) pairs of every request.
+    """
+    submitted = []
+    lock = threading.Lock()
+
+    def client(seed):
+        rng = random.Random(seed)
+        for i in range(n_requests):
+            time.sleep(rng.expovariate(rate))
+            image = takeo.resize((10 + seed, 10 + i))
+            future = scheduler.submit(detector, image, **kwargs)
+            with lock:
+                submitted.append((image, future))
+
+    clients = [threading.Thread(target=client, args=(i,)) for i in range(n_clients)]
+    for c in clients:
+        c.start()
+    for c in clients:
+        c.join()
+    return submitted
+
+
+def test_scheduler_resolves_every_request():
+    detector = RecordingDetector()
+    with MicroBatchScheduler(max_batch_size=4, max_wait=0.01, n_workers=2) as s:
+        submitted = generate_load(s, detector, 4, 20, rate=500)
+        for image, future in submitted:
+            assert_allclose(
+                future.result(timeout=5).boxes, [[0, 0] + list(image.shape)]
+            )
+    metrics = s.metrics()
+    assert metrics["n_requests"] == 80
+    assert metrics["queue_depth"] == 0
+    assert metrics["batch_size"]["max"] <= 4
+    # Requests were grouped into batches
+    assert metrics["n_batches"] < 80
+    assert sum(metrics["batch_size"]["counts"]) == metrics["n_batches"]
+    assert metrics["wait_time"]["count"] == 80
+
+
+def test_full_batches_start_without_waiting():
+    detector = RecordingDetector()
+    with MicroBatchScheduler(max_batch_size=3, max_wait=10, n_workers=1) as s:
+        futures = [s.submit(detector, takeo) for _ in range(3)]
+        for f in futures:
+            f.result(timeout=1)
+        # A partial batch waits for max_wait, so only starts when closed
+        partial = s.submit(detector, takeo)
+        time.sleep(0.05)
+        assert not partial.done()
+        assert s.queue_depth == 1
+    assert partial.done()
+
+
+def test_batches_start_after_max_wait():
+    detector = RecordingDetector()
+    with MicroBatchScheduler(max_batch_size=100, max_wait=0.02, n_workers=1) as s:
+        start = time.perf_counter()
+        futures = [s.submit(detector, takeo) for _ in range(5)]
+        for f in futures:
+            f.result(timeout=1)
+        elapsed = time.perf_counter() - start
+    assert 0.02 <= elapsed < 0.5
+    assert s.metrics()["n_batches"] == 1
+
+
+def test_batch_requests_run_in_parallel():
+    detector = RecordingDetector(delay=0.1)
+    with MicroBatchScheduler(max_batch_size=4, max_wait=10, n_workers=4) as s:
+        start = time.perf_counter()
+        futures = [s.submit(detector, takeo) for _ in range(4)]
+        for f in futures:
+            f.result(timeout=5)
+        elapsed = time.perf_counter() - start
+    assert s.metrics()["n_batches"] == 1
+    # The requests of the batch did not wait for each other
+    assert len(set(detector.threads)) == 4
+    assert elapsed < 0.3
+
+
+def test_requests_are_grouped_by_parameters():
+    detector = RecordingDetector()
+    other_detector = RecordingDetector()
+    with MicroBatchScheduler(max_batch_size=100, max_wait=0.02, n_workers=1) as s:
+        futures = [
+            s.submit(detector, takeo, offset=1),
+            s.submit(detector, takeo, offset=2),
+            s.submit(detector, takeo, offset=1),
+            s.submit(other_detector, takeo, offset=1),
+            # Unhashable parameters are never batched
+            s.submit(detector, takeo, offset=np.array(3)),
+        ]
+        offsets = [f.result(timeout=1).boxes[0, 0] for f in futures]
+    assert offsets == [1, 2, 1, 1, 3]
+    assert s.metrics()["n_batches"] == 4
+    assert s.metrics()["batch_size"]["max"] == 2
+
+
+def test_errors_and_cancellation_are_per_request():
+    def failing_detector(image):
+        if image.shape[0] == 10:
+            raise ValueError("Too small")
+        return Detections([])
+
+    with MicroBatchScheduler(max_batch_size=3, max_wait=10, n_workers=1) as s:
+        small = s.submit(failing_detector, takeo.resize((10, 10)))
+        cancelled = s.submit(failing_detector, takeo)
+        assert cancelled.cancel()
+        ok = s.submit(failing_detector, takeo)
+        with pytest.raises(ValueError):
+            small.result(timeout=1)
+        assert len(ok.result(timeout=1)) == 0
+    assert cancelled.cancelled()
+
+
+def test_scheduler_with_opencv_detector():
+    detector = load_opencv_frontal_face_detector()
+    expected = detector(takeo.copy())
+    images = [takeo.copy() for _ in range(6)]
+    with MicroBatchScheduler(max_batch_size=4, max_wait=0.01, n_workers=2) as s:
+        futures = [s.submit(detector, image) for image in images]
+        for image, future in zip(images, futures):
+            assert_allclose(future.result(timeout=5).boxes, expected.boxes)
+            assert "opencv_0" in image.landmarks
+
+
+def test_closed_scheduler_rejects_requests():
+    s = MicroBatchScheduler()
+    s.close()
+    with pytest.raises(RuntimeError):
+        s.submit(RecordingDetector(), takeo)
+
+
+def test_scheduler_invalid_arguments():
+    with pytest.raises(ValueError):
+        MicroBatchScheduler(max_batch_size=0)
+    with pytest.raises(ValueError):
+        MicroBatchScheduler(max_wait=-1)
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+from menpo.image import Image
+from menpodetect.detections import Detections
+from menpodetect.sequence import SequenceDetector
+from numpy.testing import assert_allclose
+
+
+def make_frame(min_y, min_x, size=20, shape=(200, 300), background=0.0):
+    pixels = np.full((1,) + shape, background)
+    pixels[0, min_y : min_y + size, min_x : min_x + size] = 1.0
+    return Image(pixels)
+
+
+class BrightSquareDetector(object):
+    r"""
+    Finds the bounds of the bright pixels and records the shape of every
+    image it is called with.
+    """
+
+    def __init__(self):
+        self.shapes = []
+
+    def __call__(self, image):
+        self.shapes.append(image.shape)
+        ys, xs = np.nonzero(image.pixels[0] > 0.5)
+        if ys.size == 0:
+            return Detections(np.zeros((0, 4)))
+        return Detections([[ys.min(), xs.min(), ys.max() + 1, xs.max() + 1]])
+
+
+def test_sequence_detector_tracks_between_keyframes():
+    detector = BrightSquareDetector()
+    sequence_detector = SequenceDetector(detector, keyframe_interval=5)
+    for i in range(10):
+        frame = make_frame(50 + 2 * i, 60 + 3 * i)
+        detections = sequence_detector(frame)
+        assert_allclose(
+            detections.boxes, [[50 + 2 * i, 60 + 3 * i, 70 + 2 * i, 80 + 3 * i]]
+        )
+        assert "sequence_0" in frame.landmarks
+    assert sequence_detector.n_frames == 10
+    assert sequence_detector.n_keyframes == 2
+    full_frames = [s for s in detector.shapes if s == (200, 300)]
+    assert len(full_frames) == 2
+    # Between keyframes only the enlarged window around the square is searched
+    assert all(s == (40, 40) for s in detector.shapes if s != (200, 300))
+
+
+def test_sequence_detector_lost_track_falls_back_to_full_detection():
+    detector = BrightSquareDetector()
+    sequence_detector = SequenceDetector(detector, keyframe_interval=100)
+    sequence_detector(make_frame(10, 10))
+    # The square jumps far outside of its search window
+    detections = sequence_detector(make_frame(150, 250))
+    assert_allclose(detections.boxes, [[150, 250, 170, 270]])
+    assert sequence_detector.n_keyframes == 2
+
+
+def test_sequence_detector_scene_cut():
+    detector = BrightSquareDetector()
+    sequence_detector = SequenceDetector(detector, keyframe_interval=100)
+    sequence_detector(make_frame(10, 10))
+    sequence_detector(make_frame(10, 10, background=0.4))
+    assert sequence_detector.n_keyframes == 2
+
+
+def test_sequence_detector_waits_for_keyframe_without_tracks():
+    detector = BrightSquareDetector()
+    sequence_detector = SequenceDetector(detector, keyframe_interval=3)
+    empty = Image(np.zeros((1, 200, 300)))
+    for _ in range(3):
+        assert len(sequence_detector(empty.copy())) == 0
+    assert len(detector.shapes) == 1
+    assert len(sequence_detector(make_frame(10, 10))) == 1
+    assert sequence_detector.n_keyframes == 2
+
+
+def test_sequence_detector_reset():
+    detector = BrightSquareDetector()
+    sequence_detector = SequenceDetector(detector)
+    sequence_detector(make_frame(10, 10))
+    sequence_detector.reset()
+    sequence_detector(make_frame(10, 10))
+    assert detector.shapes == [(200, 300), (200, 300)]
+
+
+def test_sequence_detector_keyframe_interval():
+    with pytest.raises(ValueError):
+        SequenceDetector(BrightSquareDetector(), keyframe_interval=0)
+
+
+def test_sequence_detector_members_do_not_attach_landmarks():
+    from menpodetect.detect import detect
+
+    attached = []
+
+    def opencv_like_detector(image, attach="per_box"):
+        attached.append(attach)
+        detector = BrightSquareDetector()
+        return detect(
+            lambda uint8_image: detector(Image(uint8_image[None] / 255.0)),
+            image,
+            attach=attach,
+        )
+
+    sequence_detector = SequenceDetector(opencv_like_detector, keyframe_interval=2)
+    frames = [make_frame(50 + i, 60) for i in range(3)]
+    for frame in frames:
+        sequence_detector(frame)
+    assert set(attached) == {None}
+    for frame in frames:
+        assert list(frame.landmarks.keys_matching("*_*")) == ["sequence_0"]
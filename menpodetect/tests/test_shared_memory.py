@@ -0,0 +1,58 @@
+from multiprocessing import shared_memory
+
+import menpo.io as mio
+import pytest
+from numpy.testing import assert_allclose
+from menpodetect.dlib import load_dlib_frontal_face_detector
+from menpodetect.opencv import load_opencv_frontal_face_detector
+from menpodetect.shared_memory import SharedMemoryExecutor
+
+takeo = mio.import_builtin_asset.takeo_ppm()
+
+
+@pytest.mark.parametrize("transport", ["shared_memory", "pickle"])
+def test_shared_memory_executor_matches_detector(transport):
+    detector = load_dlib_frontal_face_detector()
+    expected = detector(takeo.copy())
+    images = [takeo.copy() for _ in range(3)]
+    with SharedMemoryExecutor(detector, n_workers=2, transport=transport) as executor:
+        results = executor.detect_batch(images)
+    assert len(results) == 3
+    for image, detections in zip(images, results):
+        assert_allclose(detections.boxes, expected.boxes)
+        assert_allclose(detections.scores, expected.scores)
+        assert_allclose(image.landmarks["dlib_0"].points, expected[0].points)
+
+
+def test_shared_memory_executor_passes_kwargs():
+    detector = load_opencv_frontal_face_detector()
+    with SharedMemoryExecutor(detector, n_workers=1, n_slots=1) as executor:
+        image = takeo.copy()
+        detections = executor(image, group_prefix="face", min_size=(500, 500))
+        assert len(detections) == 0
+        detections = executor(image, group_prefix="face", attach="combined")
+    assert len(detections) == 1
+    assert "face" in image.landmarks
+
+
+def test_shared_memory_executor_large_frames_are_pickled():
+    detector = load_opencv_frontal_face_detector()
+    expected = detector(takeo.copy())
+    with SharedMemoryExecutor(detector, n_workers=1, slot_size=16) as executor:
+        assert_allclose(executor(takeo.copy()).boxes, expected.boxes)
+
+
+def test_shared_memory_executor_frees_memory():
+    executor = SharedMemoryExecutor(load_opencv_frontal_face_detector(), n_workers=1)
+    name = executor._memory.name
+    executor.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_shared_memory_executor_invalid_arguments():
+    detector = load_opencv_frontal_face_detector()
+    with pytest.raises(ValueError):
+        SharedMemoryExecutor(detector, transport="zmq")
+    with pytest.raises(ValueError):
+        SharedMemoryExecutor(detector, n_slots=0)
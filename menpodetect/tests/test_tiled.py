@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+from menpo.image import Image
+import menpo.io as mio
+from menpodetect.detections import Detections
+from menpodetect.opencv import load_opencv_frontal_face_detector
+from menpodetect.tiled import detect_tiled, _tile_starts
+from numpy.testing import assert_allclose
+
+takeo = mio.import_builtin_asset.takeo_ppm()
+# Squares in the middle of tiles, across vertical and horizontal seams, and
+# across the corner shared by four tiles
+square_starts = [(10, 10), (40, 90), (90, 40), (92, 92), (150, 170)]
+
+
+def make_pixels(size=20, shape=(200, 250)):
+    pixels = np.zeros((1,) + shape)
+    for min_y, min_x in square_starts:
+        pixels[0, min_y : min_y + size, min_x : min_x + size] = 1.0
+    return pixels
+
+
+def connected_squares(image):
+    r"""
+    Detects square blobs of bright pixels, including those cut by the edge of
+    the image.
+    """
+    bright = image.pixels[0] > 0.5
+    boxes = []
+    visited = np.zeros_like(bright)
+    for y, x in zip(*np.nonzero(bright)):
+        if visited[y, x]:
+            continue
+        max_y, max_x = y, x
+        while max_y < bright.shape[0] and bright[max_y, x]:
+            max_y += 1
+        while max_x < bright.shape[1] and bright[y, max_x]:
+            max_x += 1
+        visited[y:max_y, x:max_x] = True
+        boxes.append([y, x, max_y, max_x])
+    return Detections(boxes)
+
+
+def expected_boxes(size=20):
+    return sorted([y, x, y + size, x + size] for y, x in square_starts)
+
+
+def test_tile_starts():
+    assert _tile_starts(50, 100, 10) == [0]
+    assert _tile_starts(200, 100, 20) == [0, 50, 100]
+    assert _tile_starts(250, 100, 30) == [0, 50, 100, 150]
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_detect_tiled_finds_each_object_once(n_workers):
+    image = Image(make_pixels())
+    shapes = []
+
+    def detector(tile):
+        shapes.append(tile.shape)
+        return connected_squares(tile)
+
+    detections = detect_tiled(
+        detector, image, tile_shape=(100, 100), overlap=30, n_workers=n_workers
+    )
+    assert sorted(detections.boxes.tolist()) == expected_boxes()
+    assert all(s[0] <= 100 and s[1] <= 100 for s in shapes)
+    assert len(shapes) == 3 * 4
+    assert "object_0" in image.landmarks
+
+
+def test_detect_tiled_memmap(tmpdir):
+    path = str(tmpdir.join("pixels.npy"))
+    np.save(path, make_pixels())
+    pixels = np.load(path, mmap_mode="r")
+    detections = detect_tiled(
+        connected_squares, pixels, tile_shape=(64, 64), overlap=24
+    )
+    assert sorted(detections.boxes.tolist()) == expected_boxes()
+
+
+def test_detect_tiled_invalid_arguments():
+    image = Image(make_pixels())
+    with pytest.raises(ValueError):
+        detect_tiled(connected_squares, image, tile_shape=(100, 100), overlap=100)
+    with pytest.raises(ValueError):
+        detect_tiled(connected_squares, image, image_diagonal=100)
+
+
+def test_opencv_detect_tiled():
+    canvas = np.zeros((3, 600, 500))
+    canvas[:, 300:525, 320:470] = takeo.pixels
+    opencv_detector = load_opencv_frontal_face_detector()
+    full = opencv_detector(Image(canvas))
+    image = Image(canvas)
+    tiled = opencv_detector.detect_tiled(image, tile_shape=(256, 256), overlap=140)
+    assert len(tiled) == 1
+    assert_allclose(tiled.boxes, full.boxes, atol=5)
+    assert "opencv_0" in image.landmarks
+
+
+def test_detect_tiled_tiles_do_not_attach_landmarks():
+    attached = []
+
+    def recording_detector(image, attach="per_box"):
+        attached.append(attach)
+        return connected_squares(image)
+
+    detect_tiled(
+        recording_detector, Image(make_pixels()), tile_shape=(100, 100), overlap=30
+    )
+    assert len(attached) > 1
+    assert set(attached) == {None}
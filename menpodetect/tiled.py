@@ -0,0 +1,185 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+
+import numpy as np
+from menpo.image import Image
+
+from menpodetect.batch import _n_workers
+from menpodetect.detect import _accepts_attach, _attach_landmarks, _check_attach
+from menpodetect.detections import Detections
+from menpodetect.nms import non_maximum_suppression
+
+
+def _tile_starts(length, tile_length, overlap):
+    r"""
+    The start of each tile along an axis. The fewest tiles are used such that
+    consecutive tiles overlap by at least ``overlap``, and they are spread
+    evenly so that the first starts at 0 and the last ends at ``length``.
+    """
+    if length <= tile_length:
+        return [0]
+    n_tiles = int(np.ceil((length - overlap) / (tile_length - overlap)))
+    starts = np.floor(np.linspace(0, length - tile_length, n_tiles))
+    return starts.astype(int).tolist()
+
+
+def _axis_tiles(length, tile_length, overlap):
+    r"""
+    The ``(start, stop, core_start, core_stop)`` of each tile along an axis.
+    The core is the part of the tile that it is responsible for: the cores
+    meet in the middle of the overlap between consecutive tiles, so they
+    partition the axis.
+    """
+    starts = _tile_starts(length, tile_length, overlap)
+    stops = [min(start + tile_length, length) for start in starts]
+    boundaries = [(start + stop) / 2 for start, stop in zip(starts[1:], stops[:-1])]
+    core_starts = [-np.inf] + boundaries
+    core_stops = boundaries + [np.inf]
+    return list(zip(starts, stops, core_starts, core_stops))
+
+
+def _detect_tile(detector, pixels, tile, kwargs):
+    r"""
+    Detect the objects in a single tile, returning the detections (in the
+    coordinates of the whole image) whose centres lie in the tile core.
+    """
+    (min_y, max_y, *core_y), (min_x, max_x, *core_x) = tile
+    # Only this tile is read into memory, which is important for memmaps
+    tile_image = Image(
+        np.ascontiguousarray(pixels[:, min_y:max_y, min_x:max_x]), copy=False
+    )
+    detections = detector(tile_image, **kwargs)
+    if not isinstance(detections, Detections):
+        detections = Detections.from_pointgraphs(detections)
+    boxes = detections.boxes + [min_y, min_x, min_y, min_x]
+    centres = (boxes[:, :2] + boxes[:, 2:]) / 2
+    in_core = (
+        (centres[:, 0] >= core_y[0])
+        & (centres[:, 0] < core_y[1])
+        & (centres[:, 1] >= core_x[0])
+        & (centres[:, 1] < core_x[1])
+    )
+    return Detections(
+        boxes, scores=detections.scores, detector_ids=detections.detector_ids
+    )[in_core]
+
+
+def detect_tiled(
+    detector,
+    image,
+    tile_shape=(1024, 1024),
+    overlap=128,
+    n_workers=1,
+    iou_threshold=0.3,
+    group_prefix="object",
+    attach="per_box",
+    **kwargs
+):
+    r"""
+    Apply a detector to a very large image one overlapping tile at a time.
+
+    Only the tiles currently being detected are converted for the detector,
+    so the peak memory is proportional to ``n_workers`` tiles rather than to
+    the whole image, and the pixels may be a memory mapped array that is
+    never read into memory in full.
+
+    Each tile is responsible for the objects whose centre lies within it,
+    up to the middle of the overlap that it shares with each neighbouring
+    tile.
+    Therefore, provided that ``overlap`` is at least the size of the largest
+    object, every object is found exactly once. Any remaining duplicates
+    across the seams are removed using non-maximum suppression.
+
+    Parameters
+    ----------
+    detector : `callable`
+        A detector such as :map:`DlibDetector` or :map:`OpenCVDetector`. It is
+        called with each tile as a Menpo image and the given ``kwargs``.
+    image : `menpo.image.Image` or ``(n_channels, height, width)`` `ndarray`
+        The image to detect. A raw array of pixels (such as a `numpy.memmap`)
+        in the Menpo channels-first layout may also be given, in which case
+        no landmarks are attached.
+    tile_shape : `tuple` of 2 `int`, optional
+        The ``(height, width)`` of each tile.
+    overlap : `int`, optional
+        The number of pixels shared by neighbouring tiles. This should be at
+        least the size of the largest object to be detected.
+    n_workers : `int` > 0, optional
+        The number of threads used to detect tiles concurrently. If ``None``,
+        one thread per core is used.
+    iou_threshold : `float`, optional
+        Detections that overlap a detection with a higher score (or an earlier
+        detection if there are no scores) by more than this intersection over
+        union are discarded.
+    group_prefix : `str`, optional
+        The prefix string to be appended to each each landmark group that is
+        stored on the image. Each detection will be stored as group_prefix_#
+        where # is a count starting from 0.
+    attach : ``{per_box, combined}`` or ``None``, optional
+        How the detections are attached to the image as landmarks.
+        See :func:`menpodetect.detect.detect`.
+    kwargs : `dict`, optional
+        Passed through to the detector for every tile. ``image_diagonal`` is
+        not supported, as every tile would be rescaled differently.
+
+    Returns
+    -------
+    bounding_boxes : :map:`Detections`
+        The detected objects, in the coordinates of the whole image.
+
+    Raises
+    ------
+    ValueError
+        If ``overlap`` is negative or not less than the tile size, or if an
+        ``image_diagonal`` is given.
+
+    Examples
+    --------
+    >>> pixels = np.load('./scan.npy', mmap_mode='r')
+    >>> detector = load_opencv_frontal_face_detector()
+    >>> bounding_boxes = detect_tiled(detector, pixels, tile_shape=(2048, 2048),
+    ...                               overlap=256, n_workers=4)
+    """
+    _check_attach(attach)
+    if kwargs.get("image_diagonal") is not None:
+        raise ValueError("image_diagonal is not supported for tiled detection")
+    if overlap < 0 or overlap >= min(tile_shape):
+        raise ValueError(
+            "overlap must be >= 0 and less than the tile size, "
+            "got {}".format(overlap)
+        )
+    if isinstance(image, np.ndarray):
+        pixels = image
+        image = None
+    else:
+        pixels = image.pixels
+    height, width = pixels.shape[1:]
+    tiles = list(
+        product(
+            _axis_tiles(height, tile_shape[0], overlap),
+            _axis_tiles(width, tile_shape[1], overlap),
+        )
+    )
+
+    if _accepts_attach(detector):
+        # The tiles are discarded, so their landmarks are never needed
+        kwargs = dict(kwargs, attach=None)
+
+    def detect_tile(tile):
+        return _detect_tile(detector, pixels, tile, kwargs)
+
+    n_workers = _n_workers(n_workers, len(tiles))
+    if n_workers == 1:
+        detections = [detect_tile(tile) for tile in tiles]
+    else:
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            detections = list(executor.map(detect_tile, tiles))
+    detections = Detections.concatenate(detections)
+    keep = non_maximum_suppression(
+        detections.boxes, scores=detections.scores, iou_threshold=iou_threshold
+    )
+    detections = detections[np.sort(keep)]
+
+    if image is not None:
+        _attach_landmarks(image, detections, group_prefix, attach=attach)
+    return detections